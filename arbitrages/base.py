@@ -0,0 +1,237 @@
+import websocket
+import time
+from arbitrages.runtime import STABLE_AFTER, Backoff
+from functions import codec
+from functions.log_settings import logger
+from functions.order_book import OrderBook
+from functions.symbols import registry as default_registry
+
+
+class BaseWebSocket:
+    """
+    Общая часть коннекторов бирж. Наследник задаёт name, title, url, сообщение подписки,
+    быстрый разбор верхушки стакана в decode_quote() и разбор прочих сообщений в process();
+    транспорт (поток websocket-client или asyncio) выбирается снаружи.
+    Сырой ключ канала из кадра (топик, instId) один раз при создании соединения сопоставляется
+    с символом и ячейкой хранилища, поэтому на каждый кадр приходится одно обращение к словарю routes.
+    Символы берутся из реестра (functions.symbols); одно соединение ведёт не больше max_topics каналов,
+    остальные символы биржи обслуживают соседние соединения-шарды.
+    По умолчанию в хранилище пишется верхушка стакана быстрым разбором decode_quote().
+    Локальные стаканы L2 в books[(символ, биржа)] включаются по бирже: depth > 0 (обычно book_depth),
+    тогда в хранилище пишется их верхушка
+    """
+    name = None
+    title = None
+    url = None
+    depth = 0
+    # Глубина локального стакана L2, если его включить (main.py --l2)
+    book_depth = 0
+    # Консервативный предел каналов на соединение и каналов в одном сообщении подписки
+    max_topics = 100
+    topics_per_message = 1
+
+    def __init__(self, prices, on_update=None, url=None, recorder=None, books=None, registry=None, symbols=None,
+                 shard=0, depth=None):
+        """
+        :param depth: глубина локального стакана L2, 0 - только верхушка; по умолчанию - depth класса
+        :param registry: реестр символов, по умолчанию - из symbols.json
+        :param symbols: символы этого соединения (шард из registry.shards), по умолчанию - все символы биржи
+        :param shard: номер шарда - отличает соединения одной биржи в метриках
+        """
+        registry = registry or default_registry
+        self.ws = None
+        self.prices = prices
+        if depth is not None:
+            self.depth = depth
+        self.symbols = list(symbols) if symbols is not None else registry.venue_symbols(self.name)
+        self.venue_names = [registry.venue_name(self.name, symbol) for symbol in self.symbols]
+        self.routes = self.build_routes()
+        self.shard = shard
+        self.label = f'{self.name}-{shard}' if shard else self.name
+        self.on_update = on_update
+        self.url = url or self.url
+        self.recorder = recorder
+        self.books = books if books is not None else {}
+        # Источник времени отметок котировок; при проигрывании записи - время записи (ReplayEngine.now)
+        self.now = time.time_ns
+        self.received_ns = 0
+        self.decoded_ns = 0
+        self.opened_at = None
+        self.reconnect = True
+
+    @classmethod
+    def shards(cls, registry=None):
+        """
+        :return: символы биржи, разбитые на группы по max_topics - по соединению на группу
+        """
+        return (registry or default_registry).shards(cls.name, cls.max_topics)
+
+    def build_routes(self):
+        """
+        :return: {сырой ключ канала: (символ, номер ячейки хранилища)} для символов, которые есть в хранилище
+        """
+        routes = {}
+        for symbol, name in zip(self.symbols, self.venue_names):
+            if symbol in self.prices:
+                routes[self.channel(name)] = (symbol, self.prices.slot(symbol, self.name))
+        return routes
+
+    def channel(self, name):
+        """
+        :param name: название символа на бирже (BTC-USDT)
+        :return: ключ канала, каким он приходит в кадрах биржи (BTC-USDT@depth5@500ms)
+        """
+        return name
+
+    def subscribe_message(self, names):
+        """
+        :param names: названия символов на бирже, не больше topics_per_message
+        :return: сообщение подписки
+        """
+        raise NotImplementedError
+
+    def subscriptions(self):
+        """
+        :return: список сообщений подписки, отправляемых после подключения
+        """
+        names = self.venue_names
+        step = self.topics_per_message
+        return [self.subscribe_message(names[i:i + step]) for i in range(0, len(names), step)]
+
+    def decode_message(self, message):
+        return message
+
+    def handle_ping(self, payload, send):
+        """
+        :return: True, если кадр - служебный ping и на него уже ответили без разбора JSON
+        """
+        return False
+
+    def decode_quote(self, payload):
+        """
+        :return: (ключ канала, bid, ask, bid_size, ask_size, ts) из codec или None для прочих сообщений
+        """
+        return None
+
+    def process(self, data, send):
+        """
+        :param data: разобранное служебное сообщение биржи (подтверждение подписки, ping)
+        :param send: функция отправки текста в сокет (для pong)
+        """
+
+    def store_quote(self, key, bid, ask, bid_size, ask_size, exchange_ts):
+        route = self.routes.get(key)
+        if route is not None:
+            symbol, slot = route
+            self.prices.write_slot(slot, bid, ask, bid_size, ask_size, exchange_ts,
+                                   self.received_ns, self.decoded_ns, self.now())
+            self.publish(symbol)
+
+    def book(self, symbol):
+        """
+        :return: локальный стакан биржи по символу, создаётся при первом обращении
+        """
+        book = self.books.get((symbol, self.name))
+        if book is None:
+            book = self.books[(symbol, self.name)] = OrderBook(symbol, self.name)
+        return book
+
+    def store_book(self, route, book, exchange_ts):
+        """
+        :param route: (символ, ячейка) из routes
+        :return: пишет верхушку локального стакана в хранилище котировок
+        """
+        best_bid = book.best_bid()
+        best_ask = book.best_ask()
+        if best_bid is None or best_ask is None:
+            return
+        symbol, slot = route
+        self.prices.write_slot(slot, best_bid[0], best_ask[0], best_bid[1], best_ask[1], exchange_ts,
+                               self.received_ns, self.decoded_ns, self.now())
+        self.publish(symbol)
+
+    def handle_message(self, message, send, received_ns=None):
+        """
+        :param received_ns: время приёма кадра из сокета (time_ns), по умолчанию - момент вызова
+        """
+        if received_ns is None:
+            received_ns = self.now()
+        self.received_ns = received_ns
+        if self.recorder is not None:
+            self.recorder.write(message, received_ns)
+        try:
+            payload = self.decode_message(message)
+            self.decoded_ns = self.now()
+            if self.handle_ping(payload, send):
+                return
+            quote = None if self.depth else self.decode_quote(payload)
+            if quote is None:
+                self.process(codec.loads(payload), send)
+            else:
+                self.store_quote(*quote)
+        except Exception as e:
+            logger.error(f"Ошибка обработки данных {self.title}: {e}")
+
+    def publish(self, symbol):
+        if self.on_update:
+            self.on_update(symbol, self.name)
+
+    def keepalive(self, message, send):
+        """
+        :return: для резервного соединения: отвечает на служебный ping без разбора рыночных данных
+        """
+        try:
+            self.handle_ping(self.decode_message(message), send)
+        except Exception:
+            pass
+
+    def on_open(self, ws):
+        logger.info(f"Подключено к WebSocket {self.title}")
+        self.opened_at = time.monotonic()
+        for sub in self.subscriptions():
+            ws.send(codec.dumps(sub))
+            logger.info(f"Подписка отправлена: {sub}")
+
+    def on_message(self, ws, message):
+        self.handle_message(message, ws.send)
+
+    def on_error(self, ws, error):
+        logger.error(f"Ошибка WebSocket {self.title}: {error}")
+
+    def on_close(self, ws, close_status_code, close_msg):
+        # Переподключение делает цикл start(): здесь только отмечаем обрыв
+        logger.warning(f'WebSocket {self.title} закрыт, Close_status_code: {close_status_code}, Close_msg: {close_msg}')
+        self.mark_disconnected()
+
+    def mark_disconnected(self):
+        """
+        :return: при обрыве котировки не стираются - детектор отбросит их по возрасту;
+                 стаканы L2 соединения ждут нового снимка
+        """
+        for symbol in self.symbols:
+            book = self.books.get((symbol, self.name))
+            if book is not None:
+                book.synced = False
+
+    def start(self):
+        """
+        :return: поток websocket-client: переподключение с экспоненциальной задержкой Backoff
+        """
+        backoff = Backoff()
+        while self.reconnect:
+            self.opened_at = None
+            try:
+                self.ws = websocket.WebSocketApp(
+                    self.url,
+                    on_open=self.on_open,
+                    on_message=self.on_message,
+                    on_error=self.on_error,
+                    on_close=self.on_close)
+                self.ws.run_forever()
+            except Exception as e:
+                logger.error(f"Ошибка WebSocket {self.title} (перезапуск): {e}")
+            if self.opened_at is not None and time.monotonic() - self.opened_at > STABLE_AFTER:
+                backoff.reset()
+            delay = backoff.next()
+            logger.info(f"Переподключение к WebSocket {self.title} через {delay * 1000:.0f} мс")
+            time.sleep(delay)
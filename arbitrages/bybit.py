@@ -1,96 +1,72 @@
-import json
-import websocket
 import threading
 import time
+from arbitrages.base import BaseWebSocket
+from functions import codec
 from functions.log_settings import logger
+from functions.quote_store import QuoteStore
+from functions.symbols import registry
 
 
 BYBIT_WS_URL = "wss://stream.bybit.com/v5/public/spot"
-PAIRS = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'XRPUSDT', 'DOGEUSDT', 'SUIUSDT', 'LTCUSDT', 'IPUSDT', 'ADAUSDT', 'TONUSDT']
-SUBSCRIPTIONS = {"op": "subscribe", "args": [f"orderbook.1.{pair}" for pair in PAIRS]}
-bybit_prices = {
-    'BTCUSDT': {},
-    'ETHUSDT': {},
-    'SOLUSDT': {},
-    'XRPUSDT': {},
-    'DOGEUSDT': {},
-    'SUIUSDT': {},
-    'LTCUSDT': {},
-    'IPUSDT': {},
-    'ADAUSDT': {},
-    'TONUSDT': {}
-}
-
-
-class BybitWebSocket:
-    def __init__(self, prices):
-        self.ws = None
-        self.prices = prices
-        self.reconnect = True
-
-    def on_open(self, ws):
-        logger.info("Подключено к WebSocket Bybit")
-        ws.send(json.dumps(SUBSCRIPTIONS))
-        print("Подписка отправлена:", SUBSCRIPTIONS)
-
-    def on_message(self, ws, message):
-        try:
-            data = json.loads(message)
-            if "success" in data and data["success"]:
-                print(f"Подписка успешна: {data}")
+# Глубина локального стакана L2 (orderbook.50 со снимком и изменениями); без L2 - только верхушка orderbook.1
+BYBIT_DEPTH = 50
+# Спот Bybit принимает до 10 каналов в одном сообщении подписки
+BYBIT_ARGS_LIMIT = 10
+
+
+class BybitWebSocket(BaseWebSocket):
+    name = "bybit"
+    title = "Bybit"
+    url = BYBIT_WS_URL
+    book_depth = BYBIT_DEPTH
+    topics_per_message = BYBIT_ARGS_LIMIT
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Каналы, по которым переподписка уже отправлена: их изменения отбрасываются до нового снимка
+        self.resync_pending = set()
+
+    def channel(self, name):
+        return f"orderbook.{self.depth or 1}.{name}"
+
+    def subscribe_message(self, names):
+        return {"op": "subscribe", "args": [self.channel(name) for name in names]}
+
+    def decode_quote(self, payload):
+        return codec.decode_bybit(payload)
+
+    def process(self, data, send):
+        if "success" in data and data["success"]:
+            logger.info(f"Подписка успешна: {data}")
+            return
+
+        topic = data.get("topic")
+        route = self.routes.get(topic)
+        if route is not None:
+            book_data = data["data"]
+            book = self.book(route[0])
+            # u == 1 в изменении означает перезапуск сервиса Bybit - это новый снимок
+            if data["type"] == "snapshot" or book_data["u"] == 1:
+                self.resync_pending.discard(topic)
+                book.apply_snapshot(book_data["b"], book_data["a"], book_data["u"])
+            elif topic in self.resync_pending:
                 return
+            elif not book.apply_delta(book_data["b"], book_data["a"], book_data["u"]):
+                self.resync(topic, send)
+                return
+            self.store_book(route, book, int(data["ts"]))
 
-            if "topic" in data and "orderbook" in data["topic"]:
-                orderbook_data = data["data"]
-                symbol = orderbook_data["s"]
-                bids = orderbook_data.get("b", [])
-                asks = orderbook_data.get("a", [])
-
-                if bids and asks:
-                    bid_price = float(bids[0][0])
-                    ask_price = float(asks[0][0])
-
-                    if symbol in bybit_prices:
-                        self.prices[symbol]["bybit"] = {"bid": bid_price, "ask": ask_price}
-
-        except Exception as e:
-            print(f"Ошибка обработки данных Bybit: {e}")
-
-    def on_error(self, ws, error):
-        print(f"Ошибка WebSocket Bybit: {error}")
-        self.clear_prices()
-
-    def on_close(self, ws, close_status_code, close_msg):
-        logger.warning(f'BYBIT WS: {ws}, Close_status_code: {close_status_code}, Close_msg: {close_msg}')
-        if self.reconnect:
-            logger.error("WebSocket Bybit закрыт")
-            logger.info("Переподключение к WebSocket Bybit через 5 сек...")
-            time.sleep(5)
-            self.start()
-
-    def clear_prices(self):
-        for symbol in self.prices:
-            if "bybit" in self.prices[symbol]:
-                del self.prices[symbol]["bybit"]
-
-    def start(self):
-        while True:
-            try:
-                self.ws = websocket.WebSocketApp(
-                    BYBIT_WS_URL,
-                    on_open=self.on_open,
-                    on_message=self.on_message,
-                    on_error=self.on_error,
-                    on_close=self.on_close)
-                self.ws.run_forever()
-            except Exception as e:
-                print(f"Ошибка WebSocket Bybit (перезапуск): {e}")
-            time.sleep(5)
+    def resync(self, topic, send):
+        # Переподписка на канал заставляет Bybit прислать свежий снимок стакана; до него канал ждёт без
+        # повторных переподписок, иначе каждое следующее изменение после разрыва отправляло бы ещё одну
+        self.resync_pending.add(topic)
+        send(codec.dumps({"op": "unsubscribe", "args": [topic]}))
+        send(codec.dumps({"op": "subscribe", "args": [topic]}))
 
 
 if __name__ == '__main__':
     def run_bybit_websocket():
-        bybit_ws = BybitWebSocket(bybit_prices)
+        bybit_ws = BybitWebSocket(QuoteStore(registry.symbols, ["bybit"]))
         bybit_ws.start()
     bybit_thread = threading.Thread(target=run_bybit_websocket, daemon=True)
     bybit_thread.start()
@@ -1,96 +1,62 @@
-import json
-import websocket
 import threading
 import time
-import gzip
-from functions.log_settings import logger
+from arbitrages.base import BaseWebSocket
+from functions import codec
+from functions.decompress import gunzip, parse_ping
+from functions.quote_store import QuoteStore
+from functions.symbols import registry
 
 
 HTX_WS_URL = "wss://api.huobi.pro/ws"
-PAIRS = ['btcusdt', 'ethusdt', 'solusdt', 'xrpusdt', 'dogeusdt', 'suiusdt', 'ltcusdt', 'tonusdt', 'adausdt',
-         'ipusdt']
-SUBSCRIPTIONS = [{"sub": f"market.{pair}.depth.step0", "id": pair} for pair in PAIRS]
-htx_prices = {
-    'BTCUSDT': {},
-    'ETHUSDT': {},
-    'SOLUSDT': {},
-    'XRPUSDT': {},
-    'DOGEUSDT': {},
-    'SUIUSDT': {},
-    'LTCUSDT': {},
-    'IPUSDT': {},
-    'ADAUSDT': {},
-    'TONUSDT': {}
-}
+# depth.step0 присылает снимок до 150 уровней; для объёма сделки хватает ближних, поэтому локальный стакан L2
+# берёт только HTX_DEPTH лучших уровней каждой стороны (без L2 - только верхушка)
+HTX_DEPTH = 20
 
 
-class HTXWebSocket:
-    def __init__(self, prices):
-        self.ws = None
-        self.prices = prices
-        self.reconnect = True
+class HTXWebSocket(BaseWebSocket):
+    name = "htx"
+    title = "HTX"
+    url = HTX_WS_URL
+    book_depth = HTX_DEPTH
 
-    def on_open(self, ws):
-        logger.info("Подключено к WebSocket HTX")
-        for sub in SUBSCRIPTIONS:
-            ws.send(json.dumps(sub))
-            print("Подписка отправлена:", sub)
+    def channel(self, name):
+        return f"market.{name}.depth.step0"
 
-    def decode_message(self, message):
-        return gzip.decompress(message).decode("utf-8")
-
-    def on_message(self, ws, message):
-        try:
-            utf8_data = self.decode_message(message)
-            data = json.loads(utf8_data)
-
-            if "ping" in data:
-                ws.send(json.dumps({"pong": data["ping"]}))
+    def subscribe_message(self, names):
+        name, = names
+        return {"sub": self.channel(name), "id": name}
 
-            if "tick" in data and "bids" in data["tick"] and "asks" in data["tick"]:
-                symbol = data["ch"].split(".")[1].upper()
-                bid_price = float(data["tick"]["bids"][0][0])
-                ask_price = float(data["tick"]["asks"][0][0])
-                if symbol in htx_prices:
-                    self.prices[symbol]["htx"] = {"bid": bid_price, "ask": ask_price}
-
-        except Exception as e:
-            print(f"Ошибка обработки данных HTX: {e}")
+    def decode_message(self, message):
+        return gunzip(message)
 
-    def on_error(self, ws, error):
-        print(f"Ошибка WebSocket HTX: {error}")
-        self.clear_prices()
+    def handle_ping(self, payload, send):
+        ping = parse_ping(payload)
+        if ping is None:
+            return False
+        send(f'{{"pong": {ping}}}')
+        return True
 
-    def on_close(self, ws, close_status_code, close_msg):
-        if self.reconnect:
-            logger.error(f"WebSocket HTX закрыт")
-            logger.info("Переподключение к WebSocket HTX через 5 сек...")
-            time.sleep(5)
-            self.start()
+    def decode_quote(self, payload):
+        return codec.decode_htx(payload)
 
-    def clear_prices(self):
-        for symbol in self.prices:
-            if "htx" in self.prices[symbol]:
-                del self.prices[symbol]["htx"]
+    def process(self, data, send):
+        if "ping" in data:
+            send(codec.dumps({"pong": data["ping"]}))
 
-    def start(self):
-        while True:
-            try:
-                self.ws = websocket.WebSocketApp(
-                    HTX_WS_URL,
-                    on_open=self.on_open,
-                    on_message=self.on_message,
-                    on_error=self.on_error,
-                    on_close=self.on_close)
-                self.ws.run_forever()
-            except Exception as e:
-                print(f"Ошибка WebSocket HTX (перезапуск): {e}")
-            time.sleep(5)
+        if "tick" in data and "bids" in data["tick"] and "asks" in data["tick"]:
+            route = self.routes.get(data["ch"])
+            if route is not None:
+                book = self.book(route[0])
+                # Уровни снимка HTX отсортированы от лучшей цены
+                depth = self.depth
+                book.apply_snapshot(data["tick"]["bids"][:depth], data["tick"]["asks"][:depth],
+                                    data["tick"].get("version"))
+                self.store_book(route, book, int(data["ts"]))
 
 
 if __name__ == '__main__':
     def run_htx_websocket():
-        htx_ws = HTXWebSocket(htx_prices)
+        htx_ws = HTXWebSocket(QuoteStore(registry.symbols, ["htx"]))
         htx_ws.start()
     htx_thread = threading.Thread(target=run_htx_websocket, daemon=True)
     htx_thread.start()
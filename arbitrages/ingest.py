@@ -0,0 +1,177 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+from arbitrages.runtime import ConnectorRuntime
+from functions.log_settings import logger, forward_logs, process_log_queue
+from functions.recorder import FrameRecorder
+from functions.shared_quotes import create_store, attach_store, UpdateRing
+
+
+CPU_REPORT_INTERVAL = 1
+IDLE_SLEEP = 0.0001
+# Сколько ждать штатной остановки процесса приёма, прежде чем завершить его принудительно
+STOP_TIMEOUT = 5
+
+
+def run_ingest_process(connector_class, store_name, ring_name, symbols, exchanges, capture_path=None, url=None,
+                       registry=None, standby=False, log_queue=None, stop=None):
+    """
+    Точка входа процесса приёма: соединения биржи (по одному на шард символов) пишут котировки
+    прямо в разделяемое хранилище, а в кольцо кладут только номер изменившейся ячейки.
+    Логи процесса пишет главный процесс: записи уходят в log_queue.
+    :param stop: multiprocessing.Event - процесс закрывает соединения и запись кадров и выходит.
+                 Ctrl-C процесс игнорирует: остановкой управляет главный процесс
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if log_queue is not None:
+        forward_logs(log_queue)
+    store_shm, store = attach_store(store_name, symbols, exchanges)
+    ring = UpdateRing.attach(ring_name)
+
+    def publish(symbol, exchange):
+        ring.push(store.slot(symbol, exchange))
+
+    recorder = FrameRecorder(capture_path, connector_class.name) if capture_path else None
+    runtime = ConnectorRuntime([connector_class(store, publish, url=url, recorder=recorder, registry=registry,
+                                                symbols=shard, shard=i)
+                                for i, shard in enumerate(connector_class.shards(registry))], standby=standby)
+
+    async def run():
+        task = asyncio.create_task(runtime.run())
+        while not task.done() and not (stop is not None and stop.is_set()):
+            ring.set_cpu_time()
+            ring.set_reconnects(sum(stats.reconnects for stats in runtime.stats.values()))
+            if recorder is not None:
+                recorder.flush()
+            await asyncio.sleep(CPU_REPORT_INTERVAL)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    try:
+        asyncio.run(run())
+    finally:
+        if recorder is not None:
+            recorder.close()
+        ring.close()
+        store.release()
+        store_shm.close()
+
+
+class HandoffStats:
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, latency):
+        self.count += 1
+        self.total_ns += latency
+        if latency > self.max_ns:
+            self.max_ns = latency
+
+
+class SharedIngest:
+    """
+    Режим "процесс на биржу": разбор JSON и gzip идёт в отдельных процессах и не делит GIL
+    с детектором. Детектор в главном процессе читает кольца обновлений и вызывает on_update
+    """
+    def __init__(self, connector_classes, symbols, exchanges, capture_dir=None, urls=None, registry=None,
+                 standby=False):
+        """
+        :param urls: {биржа: url} вместо адресов бирж по умолчанию (например, simulator.ws)
+        :param registry: реестр символов для коннекторов, по умолчанию - из symbols.json
+        :param standby: резервное соединение на каждое соединение процесса приёма
+        """
+        self.connector_classes = connector_classes
+        self.capture_dir = capture_dir
+        self.urls = urls or {}
+        self.exchanges = list(exchanges)
+        self.registry = registry
+        self.standby = standby
+        self.store_shm, self.store = create_store(symbols, exchanges)
+        self.rings = {}
+        self.processes = {}
+        self.handoff = {}
+        self.on_update = None
+        self.stop = multiprocessing.Event()
+
+    def start(self, on_update):
+        self.on_update = on_update
+        for name in self.exchanges:
+            ring = UpdateRing.create()
+            capture_path = None
+            if self.capture_dir:
+                capture_path = os.path.join(self.capture_dir, f'{name}-{time.strftime("%Y%m%d-%H%M%S")}.bin')
+            process = multiprocessing.Process(
+                target=run_ingest_process,
+                args=(self.connector_classes[name], self.store_shm.name, ring.name,
+                      self.store.symbols, self.store.exchanges, capture_path, self.urls.get(name), self.registry,
+                      self.standby, process_log_queue(), self.stop),
+                daemon=True)
+            process.start()
+            self.rings[name] = ring
+            self.processes[name] = process
+            self.handoff[name] = HandoffStats()
+            logger.info(f"Запущен процесс приёма {name}, pid {process.pid}")
+
+    def poll_forever(self):
+        while True:
+            if not self.poll():
+                time.sleep(IDLE_SLEEP)
+
+    def poll(self):
+        """
+        :return: количество обработанных уведомлений из всех колец
+        """
+        delivered = 0
+        for name, ring in self.rings.items():
+            delivered += ring.drain(self.handoff_callback(self.handoff[name]))
+        return delivered
+
+    def handoff_callback(self, stats):
+        store = self.store
+        exchanges_count = len(store.exchanges)
+
+        def deliver(slot, published_ns):
+            stats.add(time.monotonic_ns() - published_ns)
+            self.on_update(store.symbols[slot // exchanges_count], store.exchanges[slot % exchanges_count])
+        return deliver
+
+    def stats(self):
+        """
+        :return: по каждому процессу: процессорное время, сообщения, переполнения кольца, переподключения
+                 и задержка передачи от приёма до детектора в мкс
+        """
+        result = {}
+        for name, ring in self.rings.items():
+            handoff = self.handoff[name]
+            result[name] = dict(ring.counters(),
+                                alive=self.processes[name].is_alive(),
+                                avg_handoff_us=handoff.total_ns / handoff.count / 1000 if handoff.count else 0.0,
+                                max_handoff_us=handoff.max_ns / 1000)
+        return result
+
+    def close(self):
+        """
+        Останавливает процессы приёма через событие stop; не успевший за STOP_TIMEOUT процесс завершается
+        принудительно (его запись кадров теряет хвост после последнего сброса буфера)
+        """
+        self.stop.set()
+        deadline = time.monotonic() + STOP_TIMEOUT
+        for name, process in self.processes.items():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"Процесс приёма {name} не остановился за {STOP_TIMEOUT} с, завершается принудительно")
+                process.terminate()
+                process.join()
+        for ring in self.rings.values():
+            ring.close()
+            ring.shm.unlink()
+        self.store.release()
+        self.store_shm.close()
+        self.store_shm.unlink()
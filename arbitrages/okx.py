@@ -1,91 +1,50 @@
-import json
-import websocket
 import threading
 import time
+from arbitrages.base import BaseWebSocket
+from functions import codec
 from functions.log_settings import logger
+from functions.quote_store import QuoteStore
+from functions.symbols import registry
 
 
 OKX_WS_URL = "wss://ws.okx.com:8443/ws/v5/public"
-PAIRS = ['BTC-USDT', 'ETH-USDT', 'SOL-USDT', 'XRP-USDT', 'DOGE-USDT', 'SUI-USDT', 'LTC-USDT', 'IP-USDT', 'ADA-USDT',
-         'TON-USDT']
-SUBSCRIPTIONS = [{"op": "subscribe", "args": [{"channel": "tickers", "instId": pair}]} for pair in PAIRS]
-okx_prices = {
-    'BTCUSDT': {},
-    'ETHUSDT': {},
-    'SOLUSDT': {},
-    'XRPUSDT': {},
-    'DOGEUSDT': {},
-    'SUIUSDT': {},
-    'LTCUSDT': {},
-    'IPUSDT': {},
-    'ADAUSDT': {},
-    'TONUSDT': {}
-}
+# Локальный стакан L2 - канал books5 (снимок из 5 уровней); без L2 - канал tickers (только верхушка)
+OKX_DEPTH = 5
+# Каналов в одном сообщении подписки (общая длина сообщения OKX ограничена 64 КБ)
+OKX_ARGS_LIMIT = 20
 
 
-class OKXWebSocket:
-    def __init__(self, prices):
-        self.ws = None
-        self.prices = prices
-        self.reconnect = True
+class OKXWebSocket(BaseWebSocket):
+    name = "okx"
+    title = "OKX"
+    url = OKX_WS_URL
+    book_depth = OKX_DEPTH
+    topics_per_message = OKX_ARGS_LIMIT
 
-    def on_open(self, ws):
-        logger.info("Подключено к WebSocket OKX")
-        for sub in SUBSCRIPTIONS:
-            ws.send(json.dumps(sub))
-            print("Подписка отправлена:", sub)
+    def subscribe_message(self, names):
+        channel = "books5" if self.depth else "tickers"
+        return {"op": "subscribe", "args": [{"channel": channel, "instId": name} for name in names]}
 
-    def on_message(self, ws, message):
-        try:
-            data = json.loads(message)
-            if "event" in data and data["event"] == "subscribe":
-                print(f"Подписка успешна: {data}")
-                return
+    def decode_quote(self, payload):
+        return codec.decode_okx(payload)
 
-            if "arg" in data and "data" in data:
-                ticker_data = data["data"][0]
-                symbol = data["arg"]["instId"].replace('-', '')
-                bid_price = float(ticker_data["bidPx"])
-                ask_price = float(ticker_data["askPx"])
-                if symbol in okx_prices:
-                    self.prices[symbol]["okx"] = {"bid": bid_price, "ask": ask_price}
-        except Exception as e:
-            print(f"Ошибка обработки данных OKX: {e}")
+    def process(self, data, send):
+        if "event" in data and data["event"] == "subscribe":
+            logger.info(f"Подписка успешна: {data}")
+            return
 
-    def on_error(self, ws, error):
-        print(f"Ошибка WebSocket OKX: {error}")
-        self.clear_prices()
-
-    def on_close(self, ws, close_status_code, close_msg):
-        if self.reconnect:
-            logger.error("WebSocket OKX закрыт")
-            logger.info("Переподключение к WebSocket OKX через 5 сек...")
-            time.sleep(5)
-            self.start()
-
-    def clear_prices(self):
-        for symbol in self.prices:
-            if "okx" in self.prices[symbol]:
-                del self.prices[symbol]["okx"]
-
-    def start(self):
-        while True:
-            try:
-                self.ws = websocket.WebSocketApp(
-                    OKX_WS_URL,
-                    on_open=self.on_open,
-                    on_message=self.on_message,
-                    on_error=self.on_error,
-                    on_close=self.on_close)
-                self.ws.run_forever()
-            except Exception as e:
-                print(f"Ошибка WebSocket OKX (перезапуск): {e}")
-            time.sleep(5)
+        if "arg" in data and "data" in data:
+            route = self.routes.get(data["arg"]["instId"])
+            if route is not None:
+                book_data = data["data"][0]
+                book = self.book(route[0])
+                book.apply_snapshot(book_data["bids"], book_data["asks"], book_data.get("seqId"))
+                self.store_book(route, book, int(book_data["ts"]))
 
 
 if __name__ == '__main__':
     def run_okx_websocket():
-        okx_ws = OKXWebSocket(okx_prices)
+        okx_ws = OKXWebSocket(QuoteStore(registry.symbols, ["okx"]))
         okx_ws.start()
     okx_thread = threading.Thread(target=run_okx_websocket, daemon=True)
     okx_thread.start()
@@ -0,0 +1,235 @@
+import asyncio
+import random
+import time
+import websockets
+from functions import codec
+from functions.log_settings import logger
+
+
+QUEUE_SIZE = 1000
+# Переподключение: первая попытка через десятки миллисекунд, дальше вдвое дольше, но не больше RECONNECT_MAX
+RECONNECT_INITIAL = 0.02
+RECONNECT_MAX = 5
+RECONNECT_FACTOR = 2
+# Соединение, прожившее столько секунд, считается удачным - задержка переподключения начинается заново;
+# сокет, который рвётся сразу после подключения, получает всё большие паузы
+STABLE_AFTER = 1
+# Служебные ping бирж - короткие кадры: резервное соединение распаковывает и проверяет только их
+PING_FRAME_LIMIT = 128
+
+
+class Backoff:
+    """
+    Экспоненциальная задержка со случайным разбросом: очередная задержка выбирается
+    равномерно из [d/2, d], чтобы соединения после общего обрыва не переподключались одновременно
+    """
+    def __init__(self, initial=RECONNECT_INITIAL, maximum=RECONNECT_MAX, factor=RECONNECT_FACTOR, jitter=True):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.jitter = jitter
+        self.attempt = 0
+        self.random = random.Random()
+
+    def next(self):
+        """
+        :return: задержка перед следующей попыткой в секундах
+        """
+        delay = min(self.maximum, self.initial * self.factor ** self.attempt)
+        self.attempt += 1
+        return self.random.uniform(delay / 2, delay) if self.jitter else delay
+
+    def reset(self):
+        self.attempt = 0
+
+
+class ConnectionStats:
+    """
+    Метрики одного соединения: сколько кадров принято и разобрано, глубина очереди
+    между чтением сокета и разбором, сколько раз чтение упиралось в полную очередь,
+    переподключения, переключения на резервное соединение и простой - от обрыва основного
+    соединения до первого разобранного кадра после него
+    """
+    def __init__(self, name):
+        self.name = name
+        self.received = 0
+        self.processed = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.blocked = 0
+        self.total_wait_ns = 0
+        self.max_wait_ns = 0
+        self.total_process_ns = 0
+        self.max_process_ns = 0
+        self.reconnects = 0
+        self.failovers = 0
+        self.down_since_ns = 0
+        self.outages = 0
+        self.total_downtime_ns = 0
+        self.max_downtime_ns = 0
+        self.last_downtime_ns = 0
+
+    def recovered(self, now_ns):
+        downtime = now_ns - self.down_since_ns
+        self.down_since_ns = 0
+        self.outages += 1
+        self.total_downtime_ns += downtime
+        self.last_downtime_ns = downtime
+        if downtime > self.max_downtime_ns:
+            self.max_downtime_ns = downtime
+
+    def as_dict(self):
+        processed = self.processed or 1
+        return {
+            'received': self.received,
+            'processed': self.processed,
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'blocked': self.blocked,
+            'avg_wait_us': self.total_wait_ns / processed / 1000,
+            'max_wait_us': self.max_wait_ns / 1000,
+            'avg_process_us': self.total_process_ns / processed / 1000,
+            'max_process_us': self.max_process_ns / 1000,
+            'reconnects': self.reconnects,
+            'failovers': self.failovers,
+            'outages': self.outages,
+            'avg_downtime_ms': self.total_downtime_ns / self.outages / 1e6 if self.outages else 0.0,
+            'max_downtime_ms': self.max_downtime_ns / 1e6,
+            'last_downtime_ms': self.last_downtime_ns / 1e6,
+            'down': bool(self.down_since_ns),
+        }
+
+
+class ConnectorRuntime:
+    """
+    Один цикл asyncio обслуживает сокеты всех коннекторов вместо потока на биржу.
+    Чтение сокета и разбор разделены ограниченной очередью: если разбор не успевает,
+    чтение останавливается и давление передаётся на TCP, а метрики это показывают.
+    Обрыв не стирает котировки (детектор сам отбрасывает устаревшие по возрасту): соединение
+    переподключается с экспоненциальной задержкой, а при standby=True разбор сразу переходит
+    на заранее открытое и подписанное резервное соединение
+    """
+    def __init__(self, connectors, queue_size=QUEUE_SIZE, standby=False, backoff=Backoff):
+        """
+        :param standby: держать на каждое соединение резервное для горячего переключения
+        :param backoff: фабрика задержек переподключения (по умолчанию Backoff с параметрами модуля)
+        """
+        self.connectors = list(connectors)
+        self.queue_size = queue_size
+        self.standby = standby
+        self.backoff = backoff
+        self.stats = {connector.label: ConnectionStats(connector.label) for connector in self.connectors}
+        # Открытые соединения и основное из них по каждому коннектору
+        self.links = {connector.label: [] for connector in self.connectors}
+        self.active = {}
+
+    async def run(self):
+        await asyncio.gather(*(self.run_connector(connector) for connector in self.connectors))
+
+    async def run_connector(self, connector):
+        stats = self.stats[connector.label]
+        queue = asyncio.Queue(self.queue_size)
+        consumer = asyncio.create_task(self.consume(connector, queue, stats))
+        try:
+            await asyncio.gather(*(self.link(connector, queue, stats) for _ in range(2 if self.standby else 1)))
+        finally:
+            consumer.cancel()
+
+    async def link(self, connector, queue, stats):
+        """
+        :return: держит одно соединение коннектора: подключается, подписывается, читает до обрыва
+                 и переподключается с задержкой Backoff
+        """
+        backoff = self.backoff()
+        links = self.links[connector.label]
+        while connector.reconnect:
+            connected_at = time.monotonic()
+            ws = None
+            try:
+                async with websockets.connect(connector.url, max_size=None) as ws:
+                    for sub in connector.subscriptions():
+                        await ws.send(codec.dumps(sub))
+                    links.append(ws)
+                    if self.active.get(connector.label) is None:
+                        self.active[connector.label] = ws
+                    role = 'основное' if self.active[connector.label] is ws else 'резервное'
+                    logger.info(f"Подключено к WebSocket {connector.title} ({connector.label}, {role})")
+                    await self.pump(connector, ws, queue, stats)
+            except Exception as e:
+                logger.error(f"Ошибка WebSocket {connector.title}: {e}")
+            if ws is not None and ws in links:
+                self.release(connector, ws, stats)
+            if time.monotonic() - connected_at > STABLE_AFTER:
+                backoff.reset()
+            delay = backoff.next()
+            stats.reconnects += 1
+            logger.info(f"Переподключение к WebSocket {connector.title} через {delay * 1000:.0f} мс")
+            await asyncio.sleep(delay)
+
+    def release(self, connector, ws, stats):
+        """
+        :return: убирает оборвавшееся соединение; если оно было основным - переключает разбор
+                 на резервное, а без резервного отмечает стаканы биржи несинхронизированными
+        """
+        links = self.links[connector.label]
+        links.remove(ws)
+        if self.active.get(connector.label) is not ws:
+            return
+        if not stats.down_since_ns:
+            stats.down_since_ns = time.monotonic_ns()
+        if links:
+            self.active[connector.label] = links[0]
+            stats.failovers += 1
+            logger.warning(f"WebSocket {connector.title} ({connector.label}): переключение на резервное соединение")
+        else:
+            self.active[connector.label] = None
+            connector.mark_disconnected()
+
+    async def pump(self, connector, ws, queue, stats):
+        loop = asyncio.get_running_loop()
+        active = self.active
+        label = connector.label
+
+        def send(text):
+            loop.create_task(ws.send(text))
+
+        async for message in ws:
+            if active.get(label) is not ws:
+                # Резервное соединение: рыночные данные отбрасываются, на ping отвечаем, чтобы биржа не закрыла сокет
+                if len(message) <= PING_FRAME_LIMIT:
+                    connector.keepalive(message, send)
+                continue
+            stats.received += 1
+            if queue.full():
+                stats.blocked += 1
+            await queue.put((message, time.time_ns(), send))
+            depth = queue.qsize()
+            stats.queue_depth = depth
+            if depth > stats.max_queue_depth:
+                stats.max_queue_depth = depth
+
+    @staticmethod
+    async def consume(connector, queue, stats):
+        while True:
+            message, received_ns, send = await queue.get()
+            started = time.time_ns()
+            connector.handle_message(message, send, received_ns)
+            finished = time.time_ns()
+            if stats.down_since_ns:
+                stats.recovered(time.monotonic_ns())
+            wait = started - received_ns
+            spent = finished - started
+            stats.processed += 1
+            stats.queue_depth = queue.qsize()
+            stats.total_wait_ns += wait
+            stats.total_process_ns += spent
+            if wait > stats.max_wait_ns:
+                stats.max_wait_ns = wait
+            if spent > stats.max_process_ns:
+                stats.max_process_ns = spent
+
+    def snapshot(self):
+        """
+        :return: метрики по каждому соединению
+        """
+        return {name: stats.as_dict() for name, stats in self.stats.items()}
@@ -0,0 +1,59 @@
+"""
+Сравнение разбора сообщений по биржам: stdlib json, codec.loads и типизированные декодеры верхушки стакана.
+Кадры HTX и BingX распаковываются заранее, чтобы мерить только разбор.
+Запуск: python -m benchmarks.codec
+"""
+import json
+import time
+from benchmarks import samples
+from functions import codec
+from functions.decompress import gunzip
+
+
+ROUNDS = 3000
+
+
+def extract_bybit(data):
+    book = data["data"]
+    return data["topic"], float(book["b"][0][0]), float(book["a"][0][0])
+
+
+def extract_okx(data):
+    ticker = data["data"][0]
+    return data["arg"]["instId"], float(ticker["bidPx"]), float(ticker["askPx"])
+
+
+def extract_htx(data):
+    return data["ch"], float(data["tick"]["bids"][0][0]), float(data["tick"]["asks"][0][0])
+
+
+def extract_bingx(data):
+    return data["dataType"], float(data["data"]["bids"][0][0]), float(data["data"]["asks"][0][0])
+
+
+VENUES = {
+    'bybit': (extract_bybit, codec.decode_bybit),
+    'okx': (extract_okx, codec.decode_okx),
+    'htx': (extract_htx, codec.decode_htx),
+    'bingx': (extract_bingx, codec.decode_bingx),
+}
+
+
+def measure(func, frames):
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        for frame in frames:
+            func(frame)
+    return ROUNDS * len(frames) / (time.perf_counter() - started)
+
+
+if __name__ == '__main__':
+    frames = samples.frames()
+    print(f"Бэкенд JSON: {codec.BACKEND}, типизированные схемы: {'msgspec' if codec.TYPED else 'нет'}")
+    print(f"{'биржа':<7} {'json, сообщ/с':>14} {'codec.loads, сообщ/с':>21} {'декодер, сообщ/с':>17}")
+    for venue, (extract, typed) in VENUES.items():
+        batch = [gunzip(frame) if isinstance(frame, bytes) else frame for frame in frames[venue]]
+        batch = [frame for frame in batch if typed(frame) is not None]
+        print(f"{venue:<7} {measure(lambda raw: extract(json.loads(raw)), batch):>14.0f} "
+              f"{measure(lambda raw: extract(codec.loads(raw)), batch):>21.0f} "
+              f"{measure(typed, batch):>17.0f}")
@@ -0,0 +1,39 @@
+"""
+Общие помощники бенчмарков: процентиль выборки и замер одной операции
+"""
+import time
+
+
+ITERATIONS = 20000
+MIN_SECONDS = 1
+
+
+def percentile(samples, percent):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * percent / 100))]
+
+
+def measure(op, iterations=ITERATIONS, min_seconds=MIN_SECONDS):
+    """
+    :return: операций в секунду, p50 и p99 одной операции в мкс; замер заканчивается после iterations
+             операций или, для медленных операций, после min_seconds секунд, но не меньше чем через 5 операций
+    """
+    clock = time.perf_counter_ns
+    op()
+    latencies = []
+    started = clock()
+    deadline = started + int(min_seconds * 1e9)
+    while True:
+        before = clock()
+        op()
+        finished = clock()
+        latencies.append(finished - before)
+        if len(latencies) >= iterations or (finished >= deadline and len(latencies) >= 5):
+            break
+    elapsed = clock() - started
+    return {
+        'iterations': len(latencies),
+        'ops_per_sec': len(latencies) / elapsed * 1e9,
+        'p50_us': percentile(latencies, 50) / 1000,
+        'p99_us': percentile(latencies, 99) / 1000,
+    }
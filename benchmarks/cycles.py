@@ -0,0 +1,55 @@
+"""
+Заранее перечисленные циклы через USDT длиной 3 и 4: время подготовки, число циклов, задержка обновления пары
+(поэлементно и через numpy) и векторная проверка всех циклов разом.
+Циклов длины 4 квадратично больше, поэтому они считаются только до 500 пар.
+Запуск: python -m benchmarks.cycles
+"""
+import random
+import time
+from benchmarks.common import percentile
+from benchmarks.triangular import make_universe, quote_for
+from functions.cycles import CycleIndex
+
+
+SIZES = [50, 500, 5000]
+LENGTH_4_LIMIT = 500
+FEE = 0.001
+UPDATES = 5000
+
+
+def run(pairs, max_length, vectorized):
+    random.seed(pairs)
+    universe, values = make_universe(pairs)
+    started = time.perf_counter()
+    index = CycleIndex(universe, FEE, max_length=max_length, start_currencies=['USDT'], vectorized=vectorized)
+    build_ms = (time.perf_counter() - started) * 1000
+    for venue, base, quote in universe:
+        index.update(venue, base, quote, *quote_for(values, base, quote, 0.0005))
+
+    latencies = []
+    for _ in range(UPDATES):
+        venue, base, quote = random.choice(universe)
+        bid, ask = quote_for(values, base, quote, 0.001)
+        started = time.perf_counter_ns()
+        index.update(venue, base, quote, bid, ask)
+        latencies.append(time.perf_counter_ns() - started)
+
+    # Первый вызов импортирует numpy и строит матрицу циклов - прогрев вне замера, как в benchmarks.common.measure
+    index.evaluate_all()
+    started = time.perf_counter()
+    index.evaluate_all()
+    vector_ms = (time.perf_counter() - started) * 1000
+    return len(index.cycles), build_ms, percentile(latencies, 50), percentile(latencies, 99), vector_ms
+
+
+if __name__ == '__main__':
+    print(f"{'пар':>6} {'длина':>5} {'numpy':>5} {'циклов':>8} {'подготовка, мс':>15} {'p50, мкс':>9} {'p99, мкс':>9} "
+          f"{'все циклы, мс':>14}")
+    for size in SIZES:
+        for max_length in (3, 4):
+            if max_length == 4 and size > LENGTH_4_LIMIT:
+                continue
+            for vectorized in (False, True):
+                cycles, build_ms, p50, p99, vector_ms = run(size, max_length, vectorized)
+                print(f"{size:>6} {max_length:>5} {'да' if vectorized else 'нет':>5} {cycles:>8} {build_ms:>15.1f} "
+                      f"{p50 / 1000:>9.1f} {p99 / 1000:>9.1f} {vector_ms:>14.2f}")
@@ -0,0 +1,52 @@
+"""
+Сравнение распаковки gzip-кадров HTX и BingX: прежний путь через GzipFile/BytesIO и str
+против functions.decompress (zlib или нативный бэкенд) с передачей байтов в json.loads.
+Запуск: python -m benchmarks.decompress
+"""
+import gzip
+import io
+import json
+import time
+from benchmarks import samples
+from functions.decompress import BACKEND, gunzip, parse_ping
+
+
+ROUNDS = 2000
+
+
+def old_bingx(frame):
+    text = gzip.GzipFile(fileobj=io.BytesIO(frame), mode="rb").read().decode("utf-8")
+    try:
+        return json.loads(text)
+    except ValueError:
+        # Текстовый "Ping" прежний код отдавал в json.loads и получал исключение
+        return None
+
+
+def old_htx(frame):
+    return json.loads(gzip.decompress(frame).decode("utf-8"))
+
+
+def new_path(frame):
+    payload = gunzip(frame)
+    if parse_ping(payload) is not None or payload == b"Ping":
+        return None
+    return json.loads(payload)
+
+
+def measure(func, frames):
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        for frame in frames:
+            func(frame)
+    return ROUNDS * len(frames) / (time.perf_counter() - started)
+
+
+if __name__ == '__main__':
+    frames = samples.frames()
+    pings = {'htx': [samples.htx_ping()], 'bingx': [samples.bingx_ping(), samples.bingx_uuid_ping()]}
+    print(f"Бэкенд распаковки: {BACKEND}")
+    print(f"{'биржа':<7} {'кадры':<8} {'было, сообщ/с':>14} {'стало, сообщ/с':>15}")
+    for venue, old in (('htx', old_htx), ('bingx', old_bingx)):
+        for kind, batch in (('поток', frames[venue]), ('ping', pings[venue])):
+            print(f"{venue:<7} {kind:<8} {measure(old, batch):>14.0f} {measure(new_path, batch):>15.0f}")
@@ -0,0 +1,94 @@
+"""
+Журнал возможностей по колонкам (functions.event_store) против JSON Lines (functions.opportunity_log):
+цена emit() в горячем пути, время до записи всего на диск, размер файлов и время сводки по символам и парам бирж.
+Запуск: python -m benchmarks.event_store
+"""
+import json
+import os
+import random
+import tempfile
+import time
+from benchmarks.common import percentile
+from functions.event_store import BACKEND, OpportunityStore, aggregate
+from functions.opportunity_log import OpportunitySink
+
+
+EVENTS = 100000
+SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'XRPUSDT', 'DOGEUSDT', 'SUIUSDT', 'LTCUSDT', 'IPUSDT', 'ADAUSDT', 'TONUSDT']
+EXCHANGES = ['bybit', 'okx', 'htx', 'bingx']
+
+
+def make_events(count, seed=1):
+    rng = random.Random(seed)
+    started = time.time_ns()
+    events = []
+    for i in range(count):
+        buy_exchange, sell_exchange = rng.sample(EXCHANGES, 2)
+        price = rng.uniform(1, 100000)
+        events.append({
+            'ts': started + i * 1_000_000,
+            'symbol': rng.choice(SYMBOLS),
+            'buy_exchange': buy_exchange,
+            'buy_price': price,
+            'sell_exchange': sell_exchange,
+            'sell_price': price * 1.003,
+            'buy_size': rng.uniform(0, 10),
+            'sell_size': rng.uniform(0, 10),
+            'net_profit': rng.uniform(0, 0.01),
+            'quantity': rng.uniform(0, 1),
+            'pnl': rng.uniform(0, 5),
+            'buy_age_ms': rng.uniform(0, 50),
+            'sell_age_ms': rng.uniform(0, 50),
+        })
+    return events
+
+
+def measure(sink, events):
+    latencies = []
+    started = time.perf_counter_ns()
+    for event in events:
+        before = time.perf_counter_ns()
+        sink.emit(event)
+        latencies.append(time.perf_counter_ns() - before)
+    hot = time.perf_counter_ns() - started
+    sink.close()
+    drained = time.perf_counter_ns() - started
+    return percentile(latencies, 50), percentile(latencies, 99), hot, drained
+
+
+def aggregate_jsonl(path):
+    groups = {}
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            event = json.loads(line)
+            key = (event['symbol'], f"{event['buy_exchange']}->{event['sell_exchange']}")
+            groups[key] = groups.get(key, 0) + 1
+    return groups
+
+
+def directory_size(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+if __name__ == '__main__':
+    events = make_events(EVENTS)
+    print(f'событий: {EVENTS}, формат журнала по колонкам: {BACKEND}')
+    print(f"{'журнал':<12} {'p50, мкс':>9} {'p99, мкс':>9} {'горячий путь, мс':>17} {'до записи всего, мс':>20} "
+          f"{'размер, КБ':>11} {'сводка, мс':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        jsonl_dir = os.path.join(directory, 'jsonl')
+        path = os.path.join(jsonl_dir, 'opportunities.jsonl')
+        p50, p99, hot, drained = measure(OpportunitySink(path), events)
+        started = time.perf_counter()
+        aggregate_jsonl(path)
+        summary = time.perf_counter() - started
+        print(f"{'JSON Lines':<12} {p50 / 1000:>9.1f} {p99 / 1000:>9.1f} {hot / 1e6:>17.1f} {drained / 1e6:>20.1f} "
+              f"{directory_size(jsonl_dir) / 1024:>11.0f} {summary * 1000:>11.1f}")
+
+        store_dir = os.path.join(directory, 'columns')
+        p50, p99, hot, drained = measure(OpportunityStore(store_dir), events)
+        started = time.perf_counter()
+        aggregate(store_dir, ('symbol', 'pair'))
+        summary = time.perf_counter() - started
+        print(f"{'колонки':<12} {p50 / 1000:>9.1f} {p99 / 1000:>9.1f} {hot / 1e6:>17.1f} {drained / 1e6:>20.1f} "
+              f"{directory_size(store_dir) / 1024:>11.0f} {summary * 1000:>11.1f}")
@@ -0,0 +1,69 @@
+"""
+Исполнение сигналов: сборка и подпись ордера (json.dumps полного payload и новый HMAC на каждый вызов
+против заготовки OrderTemplate) и задержки сигнал -> отправка и отправка -> ответ для двух ног
+против локального mock API с проверкой подписи (simulator.rest).
+Запуск: python -m benchmarks.execution
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+from functions.execution import ExecutionEngine, OrderTemplate, fetch_filters
+from simulator.rest import MockRestServer
+
+
+ITERATIONS = 50000
+SIGNALS = 200
+API_KEY = 'bench-key'
+API_SECRET = 'bench-secret'
+
+
+def naive_render(symbol, side, quantity, price, link_id):
+    payload = {'category': 'spot', 'symbol': symbol, 'isLeverage': 0, 'side': side, 'orderType': 'Limit',
+               'qty': str(quantity), 'price': str(price), 'triggerPrice': None, 'triggerDirection': None,
+               'triggerBy': None, 'orderFilter': None, 'orderIv': None, 'timeInForce': 'IOC', 'positionIdx': 0,
+               'orderLinkId': link_id, 'takeProfit': None, 'stopLoss': None, 'tpTriggerBy': None,
+               'slTriggerBy': None, 'reduceOnly': False, 'closeOnTrigger': False, 'smpType': None, 'mmp': None,
+               'tpslMode': None, 'tpLimitPrice': None, 'slLimitPrice': None, 'tpOrderType': None,
+               'slOrderType': None}
+    body = json.dumps(payload)
+    timestamp = str(time.time_ns() // 1_000_000)
+    sign = hmac.new(API_SECRET.encode(), (timestamp + API_KEY + '5000' + body).encode(), hashlib.sha256).hexdigest()
+    return body, {'X-BAPI-API-KEY': API_KEY, 'X-BAPI-TIMESTAMP': timestamp, 'X-BAPI-RECV-WINDOW': '5000',
+                  'X-BAPI-SIGN': sign}
+
+
+def bench_render(render):
+    started = time.perf_counter_ns()
+    for i in range(ITERATIONS):
+        render('BTCUSDT', 'Buy', 0.001, 65000.5, f'bench-{i}')
+    return (time.perf_counter_ns() - started) / ITERATIONS
+
+
+async def bench_engine(url):
+    filters = fetch_filters(url)
+    engine = ExecutionEngine({name: OrderTemplate(name, url, API_KEY, API_SECRET, filters=filters)
+                              for name in ('bybit', 'okx')})
+    engine.attach(asyncio.get_running_loop())
+    for _ in range(SIGNALS):
+        engine.on_signal('BTCUSDT', 'bybit', 'okx', 65000.0, 65200.0, 0.001, time.time_ns())
+        await asyncio.sleep(0)
+        while engine.in_flight:
+            await asyncio.sleep(0.0005)
+    await engine.close()
+    return engine.stats()
+
+
+if __name__ == '__main__':
+    template = OrderTemplate('bybit', 'http://127.0.0.1', API_KEY, API_SECRET)
+    print(f'json.dumps + новый HMAC: {bench_render(naive_render) / 1000:.2f} мкс на ордер')
+    print(f'OrderTemplate.render:    {bench_render(template.render) / 1000:.2f} мкс на ордер')
+
+    server = MockRestServer(secret=API_SECRET).start()
+    stats = asyncio.run(bench_engine(server.url))
+    server.shutdown()
+    print(f"сделок {stats['trades']}, ордера по состояниям {stats['orders']}")
+    for exchange, stages in stats['latency'].items():
+        for stage, summary in stages.items():
+            print(f"{exchange:<6} {stage:<15} p50 {summary['p50_us']:>8.0f} мкс  p99 {summary['p99_us']:>8.0f} мкс")
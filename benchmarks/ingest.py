@@ -0,0 +1,79 @@
+"""
+Предельная скорость приёма и отставание детектора на одной машине: симулятор бирж (simulator.ws)
+в отдельном процессе шлёт кадры с заданной скоростью на каждое из 4 соединений, коннекторы
+в одном цикле asyncio пишут котировки в QuoteStore и вызывают детектор.
+Скорость считается устойчивой, если разобрано не меньше 95% заданного и очередь не упирается в предел.
+Запуск: python -m benchmarks.ingest [--rates 2500 10000 50000] [--pool 256]
+"""
+import argparse
+import asyncio
+import time
+from arbitrages.bingx import BingXWebSocket
+from arbitrages.bybit import BybitWebSocket
+from arbitrages.htx import HTXWebSocket
+from arbitrages.okx import OKXWebSocket
+from arbitrages.runtime import ConnectorRuntime
+from functions.detector import ArbitrageDetector
+from functions.quote_store import QuoteStore
+from functions.symbols import registry
+from simulator.ws import start_in_process, urls
+
+
+CONNECTORS = [BingXWebSocket, BybitWebSocket, HTXWebSocket, OKXWebSocket]
+RATES = [2500, 10000, 50000]
+DURATION = 5
+WARMUP = 1
+PORT = 9100
+SUSTAINED = 0.95
+# Порог выше любого расхождения симулятора: меряется приём и проверка, а не запись сигналов в лог
+THRESHOLD = 1.0
+
+
+async def measure(port):
+    store = QuoteStore(registry.symbols, [connector.name for connector in CONNECTORS])
+    books = {}
+    detector = ArbitrageDetector(store, THRESHOLD, 0.001, books=books)
+    addresses = urls(port=port)
+    connectors = [connector(store, detector.on_update, url=addresses[connector.name], books=books)
+                  for connector in CONNECTORS]
+    runtime = ConnectorRuntime(connectors)
+    task = asyncio.create_task(runtime.run())
+    await asyncio.sleep(WARMUP)
+    before = {name: stats.processed for name, stats in runtime.stats.items()}
+    ticks = detector.ticks
+    await asyncio.sleep(DURATION)
+    result = {name: (stats.processed - before[name]) / DURATION for name, stats in runtime.stats.items()}
+    snapshot = runtime.snapshot()
+    ticks_per_second = (detector.ticks - ticks) / DURATION
+    for connector in connectors:
+        connector.reconnect = False
+    task.cancel()
+    return result, snapshot, ticks_per_second, detector.latency_stats()
+
+
+def run(rate, pool):
+    port = PORT + rate % 1000
+    process = start_in_process(port=port, rate=rate, pool=pool, seed=1)
+    time.sleep(0.5)
+    try:
+        return asyncio.run(measure(port))
+    finally:
+        process.terminate()
+        process.join()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rates', type=int, nargs='+', default=RATES, help='кадров в секунду на соединение')
+    parser.add_argument('--pool', type=int, default=0, help='готовые кадры в симуляторе (кроме Bybit)')
+    args = parser.parse_args()
+    print(f"{'задано/с':>9} {'биржа':>6} {'разобрано/с':>12} {'ожидание, мкс':>14} {'макс. очередь':>14} "
+          f"{'весь путь p99, мкс':>19}")
+    for rate in args.rates:
+        processed, snapshot, ticks, latency = run(rate, args.pool)
+        for name, per_second in sorted(processed.items()):
+            total = latency.get(name, {}).get('total', {}).get('p99_us', 0.0)
+            print(f"{rate:>9} {name:>6} {per_second:>12.0f} {snapshot[name]['avg_wait_us']:>14.0f} "
+                  f"{snapshot[name]['max_queue_depth']:>14} {total:>19.0f}")
+        sustained = all(value >= rate * SUSTAINED for value in processed.values())
+        print(f"{'':>9} детектор: {ticks:.0f} тиков/с, {'устойчиво' if sustained else 'не успевает'}")
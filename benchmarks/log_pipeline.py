@@ -0,0 +1,83 @@
+"""
+Цена вызова logger.info в горячем пути: прежние RotatingFileHandler + StreamHandler (запись и flush
+на каждый вызов) против очереди с пакетной записью в отдельном потоке (functions.log_settings),
+отдельно - при шторме одинаковых сообщений, которые подавляет RateLimitFilter.
+Консоль направлена в /dev/null, файлы - во временный каталог.
+Запуск: python -m benchmarks.log_pipeline
+"""
+import logging
+import os
+import queue
+import tempfile
+import time
+from logging.handlers import QueueHandler, RotatingFileHandler
+from benchmarks.common import percentile
+from functions.log_settings import (BatchQueueListener, BatchRotatingFileHandler, BatchStreamHandler,
+                                    LOGGING_FORMATTER_STRING, RateLimitFilter)
+
+
+MESSAGES = 20000
+
+
+def sync_logger(directory, console):
+    logger = logging.getLogger('bench.sync')
+    formatter = logging.Formatter(LOGGING_FORMATTER_STRING)
+    file_handler = RotatingFileHandler(os.path.join(directory, 'sync.log'), maxBytes=10000000, backupCount=1)
+    stream_handler = logging.StreamHandler(console)
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger, None
+
+
+def queued_logger(directory, console, rate_limit):
+    logger = logging.getLogger(f'bench.queue.{rate_limit}')
+    formatter = logging.Formatter(LOGGING_FORMATTER_STRING)
+    file_handler = BatchRotatingFileHandler(os.path.join(directory, f'queue-{rate_limit}.log'), maxBytes=10000000,
+                                            backupCount=1)
+    stream_handler = BatchStreamHandler(console)
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+    log_queue = queue.SimpleQueue()
+    listener = BatchQueueListener(log_queue, file_handler, stream_handler)
+    listener.start()
+    handler = QueueHandler(log_queue)
+    if rate_limit:
+        handler.addFilter(RateLimitFilter())
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger, listener
+
+
+def measure(logger, listener, message):
+    latencies = []
+    started = time.perf_counter_ns()
+    for i in range(MESSAGES):
+        before = time.perf_counter_ns()
+        logger.info(message(i))
+        latencies.append(time.perf_counter_ns() - before)
+    hot = time.perf_counter_ns() - started
+    if listener is not None:
+        listener.stop()
+    drained = time.perf_counter_ns() - started
+    return percentile(latencies, 50), percentile(latencies, 99), hot, drained
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, 'w') as console:
+        cases = [
+            ('синхронно, разные сообщения', sync_logger(directory, console), lambda i: f'Монета: C{i}USDT'),
+            ('очередь, разные сообщения', queued_logger(directory, console, False), lambda i: f'Монета: C{i}USDT'),
+            ('синхронно, шторм ошибок', sync_logger(directory, console), lambda i: 'Ошибка WebSocket OKX'),
+            ('очередь + фильтр, шторм ошибок', queued_logger(directory, console, True),
+             lambda i: 'Ошибка WebSocket OKX'),
+        ]
+        print(f"{'сценарий':<32} {'p50, мкс':>9} {'p99, мкс':>9} {'горячий путь, мс':>17} {'до записи всего, мс':>20}")
+        for name, (logger, listener), message in cases:
+            p50, p99, hot, drained = measure(logger, listener, message)
+            print(f'{name:<32} {p50 / 1000:>9.1f} {p99 / 1000:>9.1f} {hot / 1e6:>17.1f} {drained / 1e6:>20.1f}')
+            for handler in logger.handlers:
+                logger.removeHandler(handler)
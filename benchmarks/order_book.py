@@ -0,0 +1,68 @@
+"""
+Скорость применения изменений к локальному стакану при глубине 50, 200 и 500 уровней
+и расчёта исполнимого объёма арбитража по двум стаканам.
+Запуск: python -m benchmarks.order_book
+"""
+import random
+import time
+from functions.order_book import OrderBook
+from functions.sizing import max_profit_fill
+
+
+DEPTHS = [50, 200, 500]
+DELTAS = 50000
+LEVELS_PER_DELTA = 3
+TICK = 0.01
+MID = 65000.0
+
+
+def make_deltas(depth):
+    deltas = []
+    for _ in range(DELTAS):
+        bids, asks = [], []
+        for _ in range(LEVELS_PER_DELTA):
+            side = bids if random.random() < 0.5 else asks
+            sign = -1 if side is bids else 1
+            price = f"{MID + sign * TICK * random.randint(1, depth + depth // 10):.2f}"
+            # Примерно каждое пятое изменение удаляет уровень, остальные меняют или добавляют
+            size = "0" if random.random() < 0.2 else f"{random.uniform(0.01, 5):.4f}"
+            side.append([price, size])
+        deltas.append((bids, asks))
+    return deltas
+
+
+def run(depth):
+    book = OrderBook('BTCUSDT', 'bench')
+    book.apply_snapshot([[f"{MID - TICK * (i + 1):.2f}", "1"] for i in range(depth)],
+                        [[f"{MID + TICK * (i + 1):.2f}", "1"] for i in range(depth)], seq=0)
+    deltas = make_deltas(depth)
+    started = time.perf_counter()
+    for seq, (bids, asks) in enumerate(deltas, start=1):
+        book.apply_delta(bids, asks, seq)
+    elapsed = time.perf_counter() - started
+
+    queries = 10000
+    query_started = time.perf_counter()
+    for _ in range(queries):
+        book.vwap_buy(100000)
+        book.size_within_bps('bid', 5)
+    query_elapsed = time.perf_counter() - query_started
+
+    # Вторая биржа дороже на 0.1%: пересечение захватывает несколько десятков уровней
+    other = OrderBook('BTCUSDT', 'other')
+    other.apply_snapshot([[f"{MID * 1.001 - TICK * (i + 1):.2f}", "1"] for i in range(depth)], [])
+    fill_started = time.perf_counter()
+    for _ in range(queries):
+        max_profit_fill(book, other, 0.0001, 0.0001)
+    fill_elapsed = time.perf_counter() - fill_started
+    return DELTAS / elapsed, queries / query_elapsed, queries / fill_elapsed, len(book.bids), len(book.asks)
+
+
+if __name__ == '__main__':
+    random.seed(3)
+    print(f"{'глубина':>8} {'изменений/с':>12} {'запросов VWAP+bps/с':>20} {'расчётов объёма/с':>18} "
+          f"{'уровней bid/ask':>16}")
+    for depth in DEPTHS:
+        deltas_per_second, queries_per_second, fills_per_second, bids, asks = run(depth)
+        print(f"{depth:>8} {deltas_per_second:>12.0f} {queries_per_second:>20.0f} {fills_per_second:>18.0f} "
+              f"{f'{bids}/{asks}':>16}")
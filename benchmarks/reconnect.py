@@ -0,0 +1,63 @@
+"""
+Простой биржи при обрывах соединения: симулятор (simulator.ws) закрывает каждое соединение
+в среднем раз в DROP_INTERVAL секунд, коннекторы работают в ConnectorRuntime в трёх режимах:
+прежняя фиксированная пауза 5 с, экспоненциальная задержка Backoff и Backoff с резервным соединением.
+Простой - от обрыва основного соединения до первого разобранного кадра после него.
+Запуск: python -m benchmarks.reconnect [--duration 15] [--drop-interval 2]
+"""
+import argparse
+import asyncio
+import functools
+import time
+from arbitrages.runtime import Backoff, ConnectorRuntime
+from functions.detector import ArbitrageDetector
+from functions.quote_store import QuoteStore
+from functions.symbols import registry
+from main import CONNECTORS, EXCHANGES
+from simulator.ws import start_in_process, urls
+
+
+DURATION = 15
+DROP_INTERVAL = 2.0
+RATE = 200
+PORT = 9200
+MODES = {
+    'пауза 5 с': (functools.partial(Backoff, initial=5, factor=1, jitter=False), False),
+    'backoff': (Backoff, False),
+    'backoff + резерв': (Backoff, True),
+}
+
+
+async def measure(port, backoff, standby, duration):
+    store = QuoteStore(registry.symbols, EXCHANGES)
+    detector = ArbitrageDetector(store, 1.0, 0.001)
+    addresses = urls(port=port)
+    connectors = [CONNECTORS[name](store, detector.on_update, url=addresses[name]) for name in EXCHANGES]
+    runtime = ConnectorRuntime(connectors, standby=standby, backoff=backoff)
+    task = asyncio.create_task(runtime.run())
+    await asyncio.sleep(duration)
+    for connector in connectors:
+        connector.reconnect = False
+    task.cancel()
+    return runtime.snapshot()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--duration', type=float, default=DURATION)
+    parser.add_argument('--drop-interval', type=float, default=DROP_INTERVAL)
+    args = parser.parse_args()
+    print(f"{'режим':<18} {'биржа':<7} {'обрывов':>8} {'переключений':>13} {'простой ср., мс':>16} "
+          f"{'макс., мс':>10} {'доля простоя':>13}")
+    for i, (mode, (backoff, standby)) in enumerate(MODES.items()):
+        port = PORT + i
+        process = start_in_process(port=port, rate=RATE, seed=1, drop_interval=args.drop_interval)
+        time.sleep(0.5)
+        try:
+            snapshot = asyncio.run(measure(port, backoff, standby, args.duration))
+        finally:
+            process.terminate()
+        for name, stats in snapshot.items():
+            down = stats['avg_downtime_ms'] * stats['outages'] / 1000 / args.duration
+            print(f"{mode:<18} {name:<7} {stats['outages']:>8} {stats['failovers']:>13} "
+                  f"{stats['avg_downtime_ms']:>16.1f} {stats['max_downtime_ms']:>10.1f} {down:>13.1%}")
@@ -0,0 +1,72 @@
+"""
+Задержка REST-запросов к локальному mock API (simulator.rest): новый requests.get на каждый запрос
+против keep-alive пула HttpClient, и две ноги сделки подряд против одновременной отправки через AsyncHttpClient.
+Запуск: python -m benchmarks.rest
+"""
+import asyncio
+import time
+import requests
+from benchmarks.common import percentile
+from functions.http_client import AsyncHttpClient, HttpClient
+from simulator.rest import MockRestServer
+
+
+REQUESTS = 300
+LEG_DELAY = 0.005
+ORDER = b'{"category":"linear","symbol":"BTCUSDT","side":"Buy","orderType":"Limit","qty":"0.001","price":"60000"}'
+
+
+def measure(call, count=REQUESTS):
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter_ns()
+        call()
+        latencies.append(time.perf_counter_ns() - started)
+    return latencies
+
+
+async def measure_async(call, count):
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter_ns()
+        await call()
+        latencies.append(time.perf_counter_ns() - started)
+    return latencies
+
+
+def report(name, latencies):
+    print(f'{name:<40} {percentile(latencies, 50) / 1000:>9.0f} {percentile(latencies, 99) / 1000:>9.0f}')
+
+
+def run():
+    print(f"{'сценарий':<40} {'p50, мкс':>9} {'p99, мкс':>9}")
+    server = MockRestServer().start()
+    url = f'{server.url}/v5/market/time'
+    report('requests.get, новое соединение', measure(lambda: requests.get(url).json()))
+    client = HttpClient()
+    report('HttpClient, keep-alive', measure(lambda: client.get(url).json()))
+    server.shutdown()
+
+    slow = MockRestServer(delay=LEG_DELAY).start()
+    order_url = f'{slow.url}/v5/order/create'
+    report(f'2 ноги подряд (ответ {LEG_DELAY * 1000:.0f} мс)',
+           measure(lambda: (client.post(order_url, data=ORDER), client.post(order_url, data=ORDER)), REQUESTS // 3))
+
+    async def concurrent():
+        async_client = AsyncHttpClient()
+
+        def legs():
+            return asyncio.gather(async_client.post(order_url, data=ORDER), async_client.post(order_url, data=ORDER))
+
+        latencies = await measure_async(legs, REQUESTS // 3)
+        await async_client.close()
+        return latencies, async_client.http2
+
+    latencies, http2 = asyncio.run(concurrent())
+    report(f'2 ноги одновременно ({"HTTP/2" if http2 else "HTTP/1.1, потоки"})', latencies)
+    client.close()
+    slow.shutdown()
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,129 @@
+"""
+Цена сопоставления кадра с ячейкой хранилища: прежний путь (разбор строки канала split/replace/upper,
+проверка символа и запись через QuoteStore.write по строковым ключам) против таблицы routes коннектора
+(одно обращение к словарю по сырому ключу и write_slot). Отдельно - полный handle_message на тех же кадрах.
+Кадры - записи main.py --capture или, если файлы не заданы, образцы по всем символам реестра.
+Запуск: python -m benchmarks.routing [capture.bin ...]
+"""
+import argparse
+import time
+from benchmarks import samples
+from benchmarks.common import percentile
+from functions import codec
+from functions.quote_store import QuoteStore
+from functions.recorder import open_capture
+from functions.symbols import registry
+from main import CONNECTORS, EXCHANGES
+
+
+ROUNDS = 20
+
+# Сырой ключ канала из разобранного кадра - то, что коннектор ищет в routes
+KEYS = {
+    'bybit': lambda data: data.get('topic'),
+    'okx': lambda data: data['arg']['instId'] if 'arg' in data else None,
+    'htx': lambda data: data.get('ch'),
+    'bingx': lambda data: data.get('dataType'),
+}
+
+
+# Прежнее приведение ключа канала к символу хранилища в коннекторах
+def legacy_bybit(key, symbols):
+    if 'orderbook' in key:
+        symbol = key.rsplit('.', 1)[-1]
+        if symbol in symbols:
+            return symbol
+
+
+def legacy_okx(key, symbols):
+    symbol = key.replace('-', '')
+    if symbol in symbols:
+        return symbol
+
+
+def legacy_htx(key, symbols):
+    symbol = key.split('.')[1].upper()
+    if symbol in symbols:
+        return symbol
+
+
+def legacy_bingx(key, symbols):
+    symbol = key.split('@')[0].replace('-', '')
+    if symbol in symbols:
+        return symbol
+
+
+LEGACY = {'bybit': legacy_bybit, 'okx': legacy_okx, 'htx': legacy_htx, 'bingx': legacy_bingx}
+
+
+def sample_frames():
+    mid = 100.0
+    frames = {name: [] for name in EXCHANGES}
+    for symbol in registry.symbols:
+        frames['bybit'].append(samples.bybit_orderbook(registry.venue_name('bybit', symbol), mid))
+        frames['okx'].append(samples.okx_ticker(registry.venue_name('okx', symbol), mid))
+        frames['htx'].append(samples.htx_depth(registry.venue_name('htx', symbol), mid, 20))
+        frames['bingx'].append(samples.bingx_depth(registry.venue_name('bingx', symbol), mid))
+    return frames
+
+
+def captured_frames(paths):
+    frames = {name: [] for name in EXCHANGES}
+    for path in paths:
+        exchange, records = open_capture(path)
+        frames[exchange].extend(frame for _, frame in records)
+    return frames
+
+
+def per_message(func, items):
+    """
+    :return: медиана по ROUNDS проходам времени на сообщение, в нс
+    """
+    timings = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter_ns()
+        for item in items:
+            func(item)
+        timings.append((time.perf_counter_ns() - started) / len(items))
+    return percentile(timings, 50)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('paths', nargs='*', help='файлы записи из main.py --capture')
+    args = parser.parse_args()
+    frames = captured_frames(args.paths) if args.paths else sample_frames()
+    print(f"{'биржа':<7} {'кадров':>7} {'ключ -> ячейка: было, нс':>25} {'стало, нс':>10} "
+          f"{'handle_message, мкс':>20}")
+    for name in EXCHANGES:
+        store = QuoteStore(registry.symbols, EXCHANGES)
+        connector = CONNECTORS[name](store)
+        keys = []
+        for frame in frames[name]:
+            payload = connector.decode_message(frame)
+            try:
+                key = KEYS[name](codec.loads(payload))
+            except ValueError:
+                continue
+            if key is not None:
+                keys.append(key)
+        if not keys:
+            continue
+        legacy = LEGACY[name]
+        symbols = store.symbol_ids
+        routes = connector.routes
+
+        def before(key):
+            symbol = legacy(key, symbols)
+            if symbol is not None:
+                store.write(symbol, name, 1.0, 1.0)
+
+        def after(key):
+            route = routes.get(key)
+            if route is not None:
+                store.write_slot(route[1], 1.0, 1.0)
+
+        before_ns = per_message(before, keys)
+        after_ns = per_message(after, keys)
+        handle_ns = per_message(lambda frame: connector.handle_message(frame, lambda text: None), frames[name])
+        print(f'{name:<7} {len(frames[name]):>7} {before_ns:>25.0f} {after_ns:>10.0f} {handle_ns / 1000:>20.2f}')
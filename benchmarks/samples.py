@@ -0,0 +1,75 @@
+"""
+Образцы сообщений бирж для бенчмарков: форма полей совпадает с реальными потоками
+"""
+import gzip
+import json
+import random
+
+
+def depth_levels(mid, step, count, side):
+    sign = -1 if side == 'bids' else 1
+    return [[f"{mid + sign * step * (i + 1):.2f}", f"{random.uniform(0.01, 5):.4f}"] for i in range(count)]
+
+
+def bybit_orderbook(symbol='BTCUSDT', mid=65000.0, depth=1):
+    return json.dumps({
+        "topic": f"orderbook.{depth}.{symbol}", "type": "snapshot", "ts": 1738705080000,
+        "data": {"s": symbol, "b": depth_levels(mid, 0.1, 1, 'bids'), "a": depth_levels(mid, 0.1, 1, 'asks'),
+                 "u": 18521288, "seq": 7961638724},
+        "cts": 1738705079998})
+
+
+def okx_ticker(inst_id='BTC-USDT', mid=65000.0):
+    return json.dumps({
+        "arg": {"channel": "tickers", "instId": inst_id},
+        "data": [{"instType": "SPOT", "instId": inst_id, "last": f"{mid:.1f}", "lastSz": "0.0015",
+                  "askPx": f"{mid + 0.1:.1f}", "askSz": "0.6", "bidPx": f"{mid - 0.1:.1f}", "bidSz": "1.2",
+                  "open24h": "64000", "high24h": "66000", "low24h": "63000", "sodUtc0": "64500",
+                  "sodUtc8": "64600", "volCcy24h": "2222222.22", "vol24h": "3333.33", "ts": "1738705080000"}]})
+
+
+def okx_books5(inst_id='BTC-USDT', mid=65000.0):
+    return json.dumps({
+        "arg": {"channel": "books5", "instId": inst_id},
+        "data": [{"asks": [level + ["0", "1"] for level in depth_levels(mid, 0.1, 5, 'asks')],
+                  "bids": [level + ["0", "1"] for level in depth_levels(mid, 0.1, 5, 'bids')],
+                  "instId": inst_id, "ts": "1738705080000", "seqId": 123456}]})
+
+
+def htx_depth(pair='btcusdt', mid=65000.0, levels=150):
+    return gzip.compress(json.dumps({
+        "ch": f"market.{pair}.depth.step0", "ts": 1738705080000,
+        "tick": {"bids": [[float(p), float(s)] for p, s in depth_levels(mid, 0.01, levels, 'bids')],
+                 "asks": [[float(p), float(s)] for p, s in depth_levels(mid, 0.01, levels, 'asks')],
+                 "version": 100434317651, "ts": 1738705079990}}).encode())
+
+
+def bingx_depth(pair='BTC-USDT', mid=65000.0):
+    return gzip.compress(json.dumps({
+        "code": 0, "dataType": f"{pair}@depth5@500ms", "ts": 1738705080000,
+        "data": {"bids": depth_levels(mid, 0.1, 5, 'bids'), "asks": depth_levels(mid, 0.1, 5, 'asks')}}).encode())
+
+
+def htx_ping():
+    return gzip.compress(b'{"ping": 1738705080000}')
+
+
+def bingx_ping():
+    return gzip.compress(b'Ping')
+
+
+def bingx_uuid_ping():
+    return gzip.compress(b'{"ping":"3f2b8a1e-6c4d-4e0f-9a57-1d2c3b4a5e6f","time":"2025-02-04T21:38:00.000+0800"}')
+
+
+def frames():
+    """
+    :return: {биржа: список сырых кадров} с типичной смесью рыночных данных и ping
+    """
+    random.seed(7)
+    return {
+        'bybit': [bybit_orderbook() for _ in range(10)],
+        'okx': [okx_ticker() for _ in range(10)],
+        'htx': [htx_depth() for _ in range(9)] + [htx_ping()],
+        'bingx': [bingx_depth() for _ in range(8)] + [bingx_ping(), bingx_uuid_ping()],
+    }
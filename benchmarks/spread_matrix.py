@@ -0,0 +1,85 @@
+"""
+Сравнение поиска арбитража: цикл на чистом Python против векторного расчёта спредов.
+Запуск: python -m benchmarks.spread_matrix
+"""
+import random
+import time
+import numpy as np
+from functions.quote_store import QuoteStore
+from functions.spread_matrix import store_snapshot, find_opportunities
+
+
+EXCHANGES = ['bingx', 'bybit', 'htx', 'okx']
+SIZES = [10, 100, 1000]
+THRESHOLD = 0.002
+FEE = 0.001
+REPEATS = 20
+
+
+def make_store(n_symbols, exchanges):
+    symbols = [f'COIN{i}USDT' for i in range(n_symbols)]
+    store = QuoteStore(symbols, exchanges)
+    for symbol in symbols:
+        mid = random.uniform(0.1, 1000)
+        for exchange in exchanges:
+            price = mid * random.uniform(0.99, 1.01)
+            store.write(symbol, exchange, price * 0.9995, price * 1.0005, 1.0, 1.0)
+    return store
+
+
+def loop_best_pair(store):
+    # Логика прежнего find_arbitrage_opportunities из main.py: только лучшая пара на символ
+    found = []
+    for symbol in store:
+        best_bid = best_ask = bid_exchange = ask_exchange = None
+        for exchange in store.exchanges:
+            quote = store.read(symbol, exchange)
+            if quote is None:
+                continue
+            if best_bid is None or quote.bid > best_bid:
+                best_bid, bid_exchange = quote.bid, exchange
+            if best_ask is None or quote.ask < best_ask:
+                best_ask, ask_exchange = quote.ask, exchange
+        if best_bid and best_ask and best_bid > best_ask:
+            net = (best_bid - best_ask) / best_ask - 2 * FEE
+            if net > THRESHOLD:
+                found.append((symbol, ask_exchange, bid_exchange, net))
+    return found
+
+
+def loop_all_pairs(store):
+    found = []
+    for symbol in store:
+        quotes = [(exchange, store.read(symbol, exchange)) for exchange in store.exchanges]
+        for buy_exchange, buy in quotes:
+            for sell_exchange, sell in quotes:
+                if buy_exchange == sell_exchange or buy is None or sell is None:
+                    continue
+                net = (sell.bid - buy.ask) / buy.ask - 2 * FEE
+                if net > THRESHOLD:
+                    found.append((symbol, buy_exchange, sell_exchange, net))
+    return found
+
+
+def vectorized(store):
+    bid, ask = store_snapshot(store)
+    return find_opportunities(bid, ask, np.full(len(store.exchanges), FEE), THRESHOLD)
+
+
+def measure(func, store):
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        func(store)
+    return (time.perf_counter() - started) / REPEATS * 1000
+
+
+if __name__ == '__main__':
+    random.seed(1)
+    print(f"{'символов':>9} {'бирж':>5} {'лучшая пара, мс':>16} {'все пары, мс':>13} {'numpy, мс':>10} {'найдено':>8}")
+    for exchanges in (EXCHANGES, [f'ex{i}' for i in range(16)]):
+        for size in SIZES:
+            store = make_store(size, exchanges)
+            assert len(loop_all_pairs(store)) == len(vectorized(store)[0])
+            print(f"{size:>9} {len(exchanges):>5} {measure(loop_best_pair, store):>16.3f} "
+                  f"{measure(loop_all_pairs, store):>13.3f} {measure(vectorized, store):>10.3f} "
+                  f"{len(vectorized(store)[0]):>8}")
@@ -0,0 +1,208 @@
+"""
+Набор бенчмарков горячих путей по отдельности: разбор кадра каждой биржи целиком (handle_message),
+распаковка gzip HTX/BingX, запись котировки в QuoteStore, проверка символа и полный проход детектора,
+build_graph + bellman_ford + calculate_arbitrage_profit при росте числа пар.
+Для каждого замера - операций в секунду, p50 и p99 одной операции. Результат сохраняется в JSON,
+два файла сравниваются через --compare, чтобы видеть регрессии между коммитами.
+Запуск: python -m benchmarks.suite [--filter parse] [--output results.json]
+        python -m benchmarks.suite --compare old.json new.json
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import time
+from benchmarks import samples
+from benchmarks.common import measure
+from functions import codec
+from functions.algoritmic_functions import bellman_ford, build_graph
+from functions.decompress import BACKEND, gunzip
+from functions.detector import ArbitrageDetector
+from functions.functions import calculate_arbitrage_profit
+from functions.quote_store import QuoteStore
+
+
+GRAPH_SIZES = [10, 100, 1000]
+EXCHANGES = ['bingx', 'bybit', 'htx', 'okx']
+SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'XRPUSDT', 'DOGEUSDT', 'SUIUSDT', 'LTCUSDT', 'IPUSDT', 'ADAUSDT', 'TONUSDT']
+# Изменение больше этой доли считается регрессией при сравнении
+REGRESSION = 0.1
+
+CASES = {}
+
+
+def case(name):
+    def register(func):
+        CASES[name] = func
+        return func
+    return register
+
+
+def cycle(items):
+    """
+    :return: функция без аргументов, по кругу отдающая элементы items
+    """
+    state = {'index': 0}
+    count = len(items)
+
+    def next_item():
+        index = state['index']
+        state['index'] = index + 1
+        return items[index % count]
+    return next_item
+
+
+def parse_case(name):
+    from main import CONNECTORS
+
+    store = QuoteStore(SYMBOLS, EXCHANGES)
+    connector = CONNECTORS[name](store)
+    frames = samples.frames()[name]
+    if name == 'okx' and connector.depth:
+        frames = [samples.okx_books5() for _ in range(10)]
+    frames = cycle(frames)
+
+    def send(text):
+        pass
+    return lambda: connector.handle_message(frames(), send)
+
+
+for _venue in EXCHANGES:
+    case(f'parse.{_venue}')(lambda venue=_venue: parse_case(venue))
+
+
+@case('gzip.htx')
+def gzip_htx():
+    frames = cycle([samples.htx_depth() for _ in range(10)])
+    return lambda: gunzip(frames())
+
+
+@case('gzip.bingx')
+def gzip_bingx():
+    frames = cycle([samples.bingx_depth() for _ in range(10)])
+    return lambda: gunzip(frames())
+
+
+@case('store.write')
+def store_write():
+    store = QuoteStore(SYMBOLS, EXCHANGES)
+    slots = cycle([(symbol, exchange) for symbol in SYMBOLS for exchange in EXCHANGES])
+
+    def write():
+        symbol, exchange = slots()
+        store.write(symbol, exchange, 100.0, 100.1, 1.0, 1.0, 0, 0, 0, 0)
+    return write
+
+
+def filled_detector():
+    store = QuoteStore(SYMBOLS, EXCHANGES)
+    for symbol in SYMBOLS:
+        for exchange in EXCHANGES:
+            mid = random.uniform(99.9, 100.1)
+            store.write(symbol, exchange, mid - 0.01, mid + 0.01, 1.0, 1.0, 0, 0, 0, 0)
+    detector = ArbitrageDetector(store, threshold=1.0, fee=0.001)
+    detector.scan()
+    return detector
+
+
+@case('detect.on_update')
+def detect_on_update():
+    detector = filled_detector()
+    updates = cycle([(symbol, exchange) for symbol in SYMBOLS for exchange in EXCHANGES])
+    return lambda: detector.on_update(*updates())
+
+
+@case('detect.scan')
+def detect_scan():
+    return filled_detector().scan
+
+
+def graph_prices(pairs):
+    prices = {}
+    for i in range(pairs):
+        mid = random.uniform(0.1, 1000)
+        prices[f'C{i}USDT'] = {'bid': mid * 0.9995, 'ask': mid * 1.0005, 'bidSize': 100.0, 'askSize': 100.0}
+    return prices
+
+
+def graph_case(pairs):
+    prices = graph_prices(pairs)
+    loop = ['USDT', 'C0', 'USDT']
+
+    def run():
+        graph = build_graph(prices, 'USDT', 0.001, 10)
+        found = bellman_ford(graph, 'USDT')
+        calculate_arbitrage_profit(found or loop, prices, 0.001, 10)
+    return run
+
+
+for _size in GRAPH_SIZES:
+    case(f'graph.{_size}')(lambda size=_size: graph_case(size))
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run(names):
+    random.seed(3)
+    results = {}
+    for name in names:
+        results[name] = result = measure(CASES[name]())
+        print(f"{name:<20} {result['ops_per_sec']:>12.0f} {result['p50_us']:>10.2f} {result['p99_us']:>10.2f}")
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'json_backend': codec.BACKEND,
+            'gzip_backend': BACKEND,
+        },
+        'results': results,
+    }
+
+
+def compare(old_path, new_path, threshold=REGRESSION):
+    """
+    :return: печатает изменение ops/s и p99 по общим замерам; возвращает список регрессий
+    """
+    with open(old_path) as old_file, open(new_path) as new_file:
+        old, new = json.load(old_file), json.load(new_file)
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']}")
+    print(f"{'замер':<20} {'ops/s было':>12} {'ops/s стало':>12} {'Δ ops/s':>8} {'Δ p99':>8}")
+    regressions = []
+    for name, before in old['results'].items():
+        after = new['results'].get(name)
+        if after is None:
+            continue
+        speed = after['ops_per_sec'] / before['ops_per_sec'] - 1
+        p99 = after['p99_us'] / before['p99_us'] - 1 if before['p99_us'] else 0.0
+        mark = ''
+        if speed < -threshold or p99 > threshold:
+            regressions.append(name)
+            mark = '  регрессия'
+        print(f"{name:<20} {before['ops_per_sec']:>12.0f} {after['ops_per_sec']:>12.0f} {speed:>+8.1%} "
+              f"{p99:>+8.1%}{mark}")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Бенчмарки горячих путей')
+    parser.add_argument('--filter', default='', help='только замеры, в имени которых есть эта строка')
+    parser.add_argument('--output', help='файл JSON с результатами (по умолчанию bench-<коммит>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='сравнить два файла результатов')
+    args = parser.parse_args()
+    if args.compare:
+        raise SystemExit(1 if compare(*args.compare) else 0)
+    print(f"{'замер':<20} {'ops/s':>12} {'p50, мкс':>10} {'p99, мкс':>10}")
+    report = run([name for name in CASES if args.filter in name])
+    output = args.output or f"bench-{report['meta']['commit']}.json"
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+    print(f'Результаты сохранены в {output}')
@@ -0,0 +1,88 @@
+"""
+Задержка от обновления котировки до найденного цикла: инкрементальная проверка изменённых рёбер
+по потенциалам против полного пересчёта (SPFA и прежний bellman_ford) при 50, 500 и 5000 парах.
+Шум цен меньше комиссии, поэтому обычное обновление цикла не даёт; в доле MISPRICED обновлений пара
+завышается на MISPRICING, и задержка обновлений с найденным циклом считается отдельно.
+Запуск: python -m benchmarks.triangular
+"""
+import random
+import time
+from benchmarks.common import percentile
+from functions.algoritmic_functions import TriangularArbitrage, bellman_ford
+
+
+SIZES = [50, 500, 5000]
+QUOTES = {'USDT': 1.0, 'BTC': 65000.0, 'ETH': 3000.0}
+VENUES = ['bybit', 'okx']
+FEE = 0.001
+UPDATES = 2000
+# Доля обновлений с ценой пары выше справедливой на MISPRICING - больше трёх комиссий и спредов цикла
+MISPRICED = 0.05
+MISPRICING = 0.01
+BELLMAN_FORD_LIMIT = 500
+
+
+def make_universe(pairs):
+    coins = [f'C{i}' for i in range(max(1, pairs // (len(QUOTES) * len(VENUES))))]
+    values = {coin: random.uniform(0.01, 1000) for coin in coins}
+    values.update(QUOTES)
+    universe = [(venue, 'BTC', 'USDT') for venue in VENUES] + [(venue, 'ETH', 'USDT') for venue in VENUES]
+    for coin in coins:
+        for quote in QUOTES:
+            for venue in VENUES:
+                universe.append((venue, coin, quote))
+    return universe[:max(pairs, 4)], values
+
+
+def quote_for(values, base, quote, noise, skew=0.0):
+    mid = values[base] / values[quote] * random.uniform(1 - noise, 1 + noise) * (1 + skew)
+    return mid * 0.9999, mid * 1.0001
+
+
+def run(pairs):
+    universe, values = make_universe(pairs)
+    engine = TriangularArbitrage(FEE)
+    for venue, base, quote in universe:
+        engine.update(venue, base, quote, *quote_for(values, base, quote, 0.0005))
+
+    latencies = {False: [], True: []}
+    for _ in range(UPDATES):
+        venue, base, quote = random.choice(universe)
+        mispriced = random.random() < MISPRICED
+        bid, ask = quote_for(values, base, quote, 0.001, MISPRICING if mispriced else 0.0)
+        started = time.perf_counter_ns()
+        found = engine.update(venue, base, quote, bid, ask)
+        latencies[bool(found)].append(time.perf_counter_ns() - started)
+        if mispriced:
+            # Ошибка цены живёт одно обновление: иначе она давала бы циклы и обычным обновлениям соседних пар
+            engine.update(venue, base, quote, *quote_for(values, base, quote, 0.0005))
+    cycles = len(latencies[True])
+    assert cycles, f'{pairs} пар: ни одно обновление с ошибкой цены не дало цикла'
+
+    started = time.perf_counter()
+    engine.full_check()
+    spfa_ms = (time.perf_counter() - started) * 1000
+
+    bellman_ms = None
+    if pairs <= BELLMAN_FORD_LIMIT:
+        graph = engine.graph
+        adjacency = {node: [(graph.target[edge], graph.weights[edge]) for edge in graph.out_edges[node]]
+                     for node in range(len(graph.currencies))}
+        started = time.perf_counter()
+        bellman_ford(adjacency, 0)
+        bellman_ms = (time.perf_counter() - started) * 1000
+    quiet, found = latencies[False], latencies[True]
+    return len(engine.graph.currencies), percentile(quiet, 50), percentile(quiet, 99), percentile(found, 50), \
+        percentile(found, 99), cycles, spfa_ms, bellman_ms
+
+
+if __name__ == '__main__':
+    random.seed(5)
+    print(f"{'':>13} {'без цикла, мкс':>19} {'с циклом, мкс':>19}")
+    print(f"{'пар':>6} {'валют':>6} {'p50':>9} {'p99':>9} {'p50':>9} {'p99':>9} {'циклов':>7} {'SPFA, мс':>9} "
+          f"{'bellman_ford, мс':>17}")
+    for size in SIZES:
+        currencies, p50, p99, found_p50, found_p99, cycles, spfa_ms, bellman_ms = run(size)
+        bellman = f'{bellman_ms:.1f}' if bellman_ms is not None else '-'
+        print(f"{size:>6} {currencies:>6} {p50 / 1000:>9.1f} {p99 / 1000:>9.1f} {found_p50 / 1000:>9.1f} "
+              f"{found_p99 / 1000:>9.1f} {cycles:>7} {spfa_ms:>9.2f} {bellman:>17}")
@@ -1,4 +1,15 @@
+"""
+Арбитраж внутри графа валют: bellman_ford/build_graph по словарю цен, CurrencyGraph на массивах,
+инкрементальный NegativeCycleDetector и TriangularArbitrage (functions.cycles - перечисленные заранее циклы).
+Это библиотека: коннекторы и main.py её не вызывают, живые котировки идут в межбиржевой ArbitrageDetector.
+Замеры: python -m benchmarks.triangular, python -m benchmarks.cycles
+"""
 import math
+from array import array
+from collections import deque
+
+
+EPSILON = 1e-12
 
 
 def bellman_ford(graph, start):
@@ -59,4 +70,217 @@ def build_graph(prices: dict, base_currency: str, fee_rate: float, min_liquidity
             if bid * bid_size >= min_liquidity:
                 graph[coin].append((base, math.log(bid * (1 - fee_rate))))
 
-    return graph
\ No newline at end of file
+    return graph
+
+
+class CurrencyGraph:
+    """
+    Граф валют на массивах: валюты - номера, рёбра - параллельные массивы (откуда, куда, вес),
+    у каждой валюты список номеров исходящих рёбер. Вес ребра -log(курса обмена с комиссией),
+    поэтому отрицательный цикл - это цепочка обменов с прибылью.
+    Ребро задаётся ключом (биржа, пара, сторона), курс обновляется на месте
+    """
+    def __init__(self):
+        self.currency_ids = {}
+        self.currencies = []
+        self.out_edges = []
+        self.edge_ids = {}
+        self.edge_keys = []
+        self.source = array('i')
+        self.target = array('i')
+        self.weights = array('d')
+
+    def currency(self, name):
+        currency_id = self.currency_ids.get(name)
+        if currency_id is None:
+            currency_id = self.currency_ids[name] = len(self.currencies)
+            self.currencies.append(name)
+            self.out_edges.append([])
+        return currency_id
+
+    def set_edge(self, key, source, target, weight):
+        """
+        :return: номер ребра; новое ребро создаётся, у существующего меняется только вес
+        """
+        edge_id = self.edge_ids.get(key)
+        if edge_id is None:
+            edge_id = self.edge_ids[key] = len(self.edge_keys)
+            self.edge_keys.append(key)
+            self.source.append(source)
+            self.target.append(target)
+            self.weights.append(weight)
+            self.out_edges[source].append(edge_id)
+        else:
+            self.weights[edge_id] = weight
+        return edge_id
+
+    def update_pair(self, venue, base, quote, bid, ask, fee_rate):
+        """
+        :param venue: биржа
+        :param base: базовая валюта пары (BTC в BTCUSDT)
+        :param quote: котируемая валюта пары (USDT в BTCUSDT)
+        :return: номера двух рёбер пары: покупка base за quote по ask и продажа base за quote по bid
+        """
+        base_id = self.currency(base)
+        quote_id = self.currency(quote)
+        buy = self.set_edge((venue, base, quote, 'buy'), quote_id, base_id, math.log(ask) - math.log(1 - fee_rate))
+        sell = self.set_edge((venue, base, quote, 'sell'), base_id, quote_id, -math.log(bid * (1 - fee_rate)))
+        return buy, sell
+
+
+def _cycle_from_predecessors(graph, predecessor, node, limit):
+    # Идём по рёбрам-предкам, пока не повторится вершина; повторившийся участок и есть цикл
+    seen = {}
+    edges = []
+    while node not in seen:
+        if len(edges) > limit or predecessor[node] < 0:
+            return None
+        seen[node] = len(edges)
+        edge = predecessor[node]
+        edges.append(edge)
+        node = graph.source[edge]
+    cycle_edges = edges[seen[node]:]
+    cycle_edges.reverse()
+    return [graph.source[cycle_edges[0]]] + [graph.target[edge] for edge in cycle_edges], cycle_edges
+
+
+class NegativeCycleDetector:
+    """
+    Поиск отрицательных циклов на потенциалах: distance[v] <= distance[u] + w(u, v) для всех рёбер.
+    Пока неравенства выполняются, отрицательных циклов нет. После изменения одного ребра
+    проверяется только оно, и если неравенство нарушено, релаксация SPFA идёт от его конца:
+    любой новый отрицательный цикл обязан проходить через изменённое ребро.
+    Пока найденный цикл не исчез, потенциалов не существует, и проверка идёт полным SPFA
+    """
+    def __init__(self, graph):
+        self.graph = graph
+        self.distance = []
+        self.predecessor = []
+        self.dirty = False
+        self.cycle = None
+
+    def grow(self):
+        missing = len(self.graph.currencies) - len(self.distance)
+        if missing > 0:
+            self.distance.extend([0.0] * missing)
+            self.predecessor.extend([-1] * missing)
+
+    def full_check(self):
+        """
+        SPFA с виртуальным истоком (все расстояния 0) и ранним выходом по длине пути
+        :return: (номера валют цикла, номера рёбер цикла) или None
+        """
+        graph = self.graph
+        count = len(graph.currencies)
+        self.distance = distance = [0.0] * count
+        self.predecessor = predecessor = [-1] * count
+        length = [0] * count
+        queue = deque(range(count))
+        in_queue = [True] * count
+        out_edges, target, weights = graph.out_edges, graph.target, graph.weights
+        relaxations = 0
+
+        while queue:
+            node = queue.popleft()
+            in_queue[node] = False
+            node_distance = distance[node]
+            for edge in out_edges[node]:
+                neighbor = target[edge]
+                candidate = node_distance + weights[edge]
+                if candidate < distance[neighbor] - EPSILON:
+                    distance[neighbor] = candidate
+                    predecessor[neighbor] = edge
+                    length[neighbor] = length[node] + 1
+                    relaxations += 1
+                    # Раз в count релаксаций ищем цикл по предкам: обычно он виден задолго до length >= count
+                    if length[neighbor] >= count or relaxations % count == 0:
+                        cycle = _cycle_from_predecessors(graph, predecessor, neighbor, count)
+                        if cycle is not None:
+                            return self.found(cycle)
+                    if not in_queue[neighbor]:
+                        in_queue[neighbor] = True
+                        queue.append(neighbor)
+        self.dirty = False
+        self.cycle = None
+        return None
+
+    def found(self, cycle):
+        self.dirty = True
+        self.cycle = cycle
+        return cycle
+
+    def edge_changed(self, edge):
+        """
+        :return: (номера валют цикла, номера рёбер цикла) через изменённое ребро или None
+        """
+        self.grow()
+        if self.dirty:
+            # Пока прежний цикл отрицателен, полный пересчёт ничего не добавит
+            weights = self.graph.weights
+            if sum(weights[cycle_edge] for cycle_edge in self.cycle[1]) < -EPSILON:
+                return self.cycle
+            return self.full_check()
+        graph = self.graph
+        distance, predecessor = self.distance, self.predecessor
+        out_edges, target, weights = graph.out_edges, graph.target, graph.weights
+        start = graph.source[edge]
+        finish = target[edge]
+        if distance[start] + weights[edge] >= distance[finish] - EPSILON:
+            return None
+
+        distance[finish] = distance[start] + weights[edge]
+        predecessor[finish] = edge
+        queue = deque([finish])
+        in_queue = {finish}
+        while queue:
+            node = queue.popleft()
+            in_queue.discard(node)
+            node_distance = distance[node]
+            for next_edge in out_edges[node]:
+                neighbor = target[next_edge]
+                candidate = node_distance + weights[next_edge]
+                if candidate < distance[neighbor] - EPSILON:
+                    distance[neighbor] = candidate
+                    predecessor[neighbor] = next_edge
+                    if neighbor == start and candidate + weights[edge] < distance[finish] - EPSILON:
+                        cycle = _cycle_from_predecessors(graph, predecessor, start, len(distance))
+                        if cycle is not None:
+                            return self.found(cycle)
+                    if neighbor not in in_queue:
+                        in_queue.add(neighbor)
+                        queue.append(neighbor)
+        return None
+
+
+class TriangularArbitrage:
+    """
+    Многоногий арбитраж по графу валют всех пар всех бирж. Обновление котировки меняет два ребра,
+    после чего проверяются только эти рёбра относительно потенциалов, без полного Bellman-Ford.
+    Валюта - одна вершина на все биржи: ноги на разных биржах предполагают предзаведённые остатки
+    """
+    def __init__(self, fee_rate):
+        self.graph = CurrencyGraph()
+        self.detector = NegativeCycleDetector(self.graph)
+        self.fee_rate = fee_rate
+
+    def update(self, venue, base, quote, bid, ask):
+        """
+        :return: список найденных циклов [(валюты цикла, рёбра цикла, доходность)]
+        """
+        graph = self.graph
+        found = []
+        for edge in graph.update_pair(venue, base, quote, bid, ask, self.fee_rate):
+            result = self.detector.edge_changed(edge)
+            if result is not None:
+                nodes, edges = result
+                total = sum(graph.weights[cycle_edge] for cycle_edge in edges)
+                found.append(([graph.currencies[node] for node in nodes], edges, math.exp(-total) - 1))
+                break
+        return found
+
+    def full_check(self):
+        """
+        :return: валюты любого отрицательного цикла во всём графе (SPFA) или None
+        """
+        result = self.detector.full_check()
+        return None if result is None else [self.graph.currencies[node] for node in result[0]]
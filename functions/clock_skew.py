@@ -0,0 +1,87 @@
+"""
+Смещение часов бирж относительно локальных. Для Bybit оно меряется запросом времени сервера
+(functions.estimate_clock_offset), для остальных бирж выводится из меток времени в самих кадрах:
+разность "время приёма - время биржи" равна задержке сети минус смещение часов, а её минимум
+за окно - минимальная задержка минус смещение. Минимум обновляется одним сравнением на котировку
+"""
+# Окно скользящего минимума: старое окно хранится целиком, поэтому оценка опирается на 1-2 последних окна
+SKEW_WINDOW = 60.0
+
+
+class SkewWindow:
+    __slots__ = ('started_ns', 'current', 'previous', 'samples')
+
+    def __init__(self, started_ns, delta):
+        self.started_ns = started_ns
+        self.current = delta
+        self.previous = delta
+        self.samples = 0
+
+
+class ClockSkew:
+    """
+    offset(exchange) - сколько нс прибавить к локальному времени, чтобы получить время биржи (биржа - локальные).
+    Замер по REST точнее (не включает задержку сети) и имеет приоритет; оценка по кадрам включает
+    минимальную задержку сети, поэтому события такой биржи выглядят позже на единицы-десятки мс
+    """
+    def __init__(self, window=SKEW_WINDOW):
+        self.window_ns = int(window * 1e9)
+        # Смещения, измеренные запросом времени сервера: {биржа: нс}
+        self.offsets = {}
+        self.windows = {}
+
+    def observe(self, exchange, exchange_ts, received_ns):
+        """
+        :param exchange_ts: время котировки на бирже в мс (0 - биржа его не прислала)
+        :param received_ns: время приёма кадра (time_ns)
+        """
+        if not exchange_ts or not received_ns:
+            return
+        delta = received_ns - exchange_ts * 1_000_000
+        window = self.windows.get(exchange)
+        if window is None:
+            window = self.windows[exchange] = SkewWindow(received_ns, delta)
+        elif received_ns - window.started_ns > self.window_ns:
+            window.started_ns = received_ns
+            window.previous = window.current
+            window.current = delta
+        elif delta < window.current:
+            window.current = delta
+        window.samples += 1
+
+    def offset(self, exchange):
+        """
+        :return: смещение часов биржи в нс: замер по REST, иначе оценка по кадрам, иначе 0
+        """
+        offset = self.offsets.get(exchange)
+        if offset is not None:
+            return offset
+        window = self.windows.get(exchange)
+        if window is None:
+            return 0
+        return -min(window.current, window.previous)
+
+    def local_ns(self, exchange, exchange_ts):
+        """
+        :param exchange_ts: время биржи в мс
+        :return: тот же момент по локальным часам в нс
+        """
+        return exchange_ts * 1_000_000 - self.offset(exchange)
+
+    def summary(self):
+        """
+        :return: по каждой бирже: смещение в мс, источник оценки и наблюдаемая минимальная задержка в мс
+                 (для биржи с замером по REST - задержка сети, для остальных всегда 0)
+        """
+        result = {}
+        for exchange in sorted(set(self.offsets) | set(self.windows)):
+            window = self.windows.get(exchange)
+            min_delta = min(window.current, window.previous) if window is not None else None
+            offset = self.offset(exchange)
+            result[exchange] = {
+                'offset_ms': round(offset / 1e6, 3),
+                'source': 'rest' if exchange in self.offsets else 'feed',
+                'min_delay_ms': round((min_delta + offset) / 1e6, 3) if min_delta is not None else None,
+                'samples': window.samples if window is not None else 0,
+            }
+        return result
@@ -0,0 +1,158 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+if orjson is not None:
+    BACKEND = 'orjson'
+    loads = orjson.loads
+
+    def dumps(obj):
+        return orjson.dumps(obj).decode()
+elif msgspec is not None:
+    BACKEND = 'msgspec'
+    loads = msgspec.json.decode
+
+    def dumps(obj):
+        return msgspec.json.encode(obj).decode()
+else:
+    BACKEND = 'json'
+    loads = json.loads
+    dumps = json.dumps
+
+
+# Декодеры верхушки стакана: на вход сырой кадр (str/bytes), на выход кортеж
+# (ключ канала, bid, ask, bid_size, ask_size, ts) или None, если кадр не рыночные данные.
+# Ключ канала - сырой топик или инструмент из кадра, по нему коннектор находит ячейку в таблице routes
+
+if msgspec is not None:
+    TYPED = True
+
+    class BybitBook(msgspec.Struct):
+        s: str
+        b: list
+        a: list
+
+    class BybitMessage(msgspec.Struct):
+        topic: str
+        ts: int
+        data: BybitBook
+
+    class OKXArg(msgspec.Struct):
+        instId: str
+
+    class OKXTicker(msgspec.Struct):
+        bidPx: str
+        askPx: str
+        bidSz: str
+        askSz: str
+        ts: str
+
+    class OKXMessage(msgspec.Struct):
+        arg: OKXArg
+        data: list[OKXTicker]
+
+    class HTXTick(msgspec.Struct):
+        bids: list
+        asks: list
+
+    class HTXMessage(msgspec.Struct):
+        ch: str
+        ts: int
+        tick: HTXTick
+
+    class BingXBook(msgspec.Struct):
+        bids: list
+        asks: list
+
+    class BingXMessage(msgspec.Struct):
+        dataType: str
+        data: BingXBook
+        ts: int = 0
+
+    _bybit = msgspec.json.Decoder(BybitMessage)
+    _okx = msgspec.json.Decoder(OKXMessage)
+    _htx = msgspec.json.Decoder(HTXMessage)
+    _bingx = msgspec.json.Decoder(BingXMessage)
+    _invalid = (msgspec.ValidationError, msgspec.DecodeError)
+
+    def decode_bybit(raw):
+        try:
+            message = _bybit.decode(raw)
+        except _invalid:
+            return None
+        book = message.data
+        if not book.b or not book.a:
+            return None
+        bid, ask = book.b[0], book.a[0]
+        return message.topic, float(bid[0]), float(ask[0]), float(bid[1]), float(ask[1]), message.ts
+
+    def decode_okx(raw):
+        try:
+            message = _okx.decode(raw)
+        except _invalid:
+            return None
+        ticker = message.data[0]
+        return (message.arg.instId, float(ticker.bidPx), float(ticker.askPx),
+                float(ticker.bidSz), float(ticker.askSz), int(ticker.ts))
+
+    def decode_htx(raw):
+        try:
+            message = _htx.decode(raw)
+        except _invalid:
+            return None
+        bid, ask = message.tick.bids[0], message.tick.asks[0]
+        return message.ch, float(bid[0]), float(ask[0]), float(bid[1]), float(ask[1]), message.ts
+
+    def decode_bingx(raw):
+        try:
+            message = _bingx.decode(raw)
+        except _invalid:
+            return None
+        bid, ask = message.data.bids[0], message.data.asks[0]
+        return message.dataType, float(bid[0]), float(ask[0]), float(bid[1]), float(ask[1]), message.ts
+else:
+    TYPED = False
+
+    def decode_bybit(raw):
+        data = loads(raw)
+        if "topic" not in data:
+            return None
+        book = data["data"]
+        bids = book.get("b", [])
+        asks = book.get("a", [])
+        if not bids or not asks:
+            return None
+        return (data["topic"], float(bids[0][0]), float(asks[0][0]), float(bids[0][1]), float(asks[0][1]),
+                int(data["ts"]))
+
+    def decode_okx(raw):
+        data = loads(raw)
+        if "arg" not in data or "data" not in data:
+            return None
+        ticker = data["data"][0]
+        return (data["arg"]["instId"], float(ticker["bidPx"]), float(ticker["askPx"]),
+                float(ticker["bidSz"]), float(ticker["askSz"]), int(ticker["ts"]))
+
+    def decode_htx(raw):
+        data = loads(raw)
+        if "tick" not in data or "bids" not in data["tick"] or "asks" not in data["tick"]:
+            return None
+        bid, ask = data["tick"]["bids"][0], data["tick"]["asks"][0]
+        return data["ch"], float(bid[0]), float(ask[0]), float(bid[1]), float(ask[1]), int(data["ts"])
+
+    def decode_bingx(raw):
+        data = loads(raw)
+        if "data" not in data or "bids" not in data["data"] or "asks" not in data["data"]:
+            return None
+        bid, ask = data["data"]["bids"][0], data["data"]["asks"][0]
+        return (data["dataType"], float(bid[0]), float(ask[0]), float(bid[1]), float(ask[1]),
+                int(data.get("ts", 0)))
@@ -0,0 +1,132 @@
+import math
+from array import array
+from functions.algoritmic_functions import CurrencyGraph
+
+
+class CycleIndex:
+    """
+    Заранее перечисленные циклы длиной от min_length до max_length рёбер по известному списку пар.
+    Для каждой пары хранится список циклов, в которые она входит, веса рёбер (-log курса с комиссией)
+    кэшируются в массиве. Обновление пары пересчитывает суммы только затронутых циклов
+    """
+    def __init__(self, pairs, fee_rate, max_length=4, min_length=3, start_currencies=None, vectorized=False):
+        """
+        :param pairs: список (биржа, базовая валюта, котируемая валюта)
+        :param start_currencies: если задано, берутся только циклы через эти валюты (например, ['USDT'])
+        :param vectorized: пересчитывать затронутые циклы через numpy (выгодно, когда на пару приходятся
+                           тысячи циклов, например при длине 4)
+        """
+        self.graph = graph = CurrencyGraph()
+        self.log_fee = math.log(1 - fee_rate)
+        self.pair_edges = {}
+        for venue, base, quote in pairs:
+            base_id, quote_id = graph.currency(base), graph.currency(quote)
+            buy = graph.set_edge((venue, base, quote, 'buy'), quote_id, base_id, math.inf)
+            sell = graph.set_edge((venue, base, quote, 'sell'), base_id, quote_id, math.inf)
+            self.pair_edges[(venue, base, quote)] = (buy, sell)
+
+        self.cycles = []
+        starts = range(len(graph.currencies)) if start_currencies is None else \
+            sorted(graph.currency_ids[name] for name in start_currencies if name in graph.currency_ids)
+        for i, start in enumerate(starts):
+            # Цикл через несколько стартовых валют перечисляется только от меньшей из них:
+            # стартовые валюты, пройденные раньше, сразу считаются посещёнными
+            self._enumerate(start, start, [], {start, *starts[:i]}, max_length, min_length,
+                            start_currencies is None)
+
+        # Обратный индекс: пара -> номера циклов, в которые входит её покупка или продажа
+        edge_cycles = [[] for _ in graph.edge_keys]
+        for cycle_id, edges in enumerate(self.cycles):
+            for edge in set(edges):
+                edge_cycles[edge].append(cycle_id)
+        self.pair_cycles = {pair: sorted(set(edge_cycles[buy]) | set(edge_cycles[sell]))
+                            for pair, (buy, sell) in self.pair_edges.items()}
+        self.sums = array('d', [math.inf]) * len(self.cycles)
+        self.vectorized = vectorized
+        self._matrix = None
+        if vectorized:
+            import numpy as np
+
+            self._weights = np.full(len(graph.edge_keys) + 1, np.inf)
+            self._weights[-1] = 0.0
+            self._sums = np.frombuffer(self.sums, dtype=np.float64)
+            self._pair_rows = {pair: np.array(cycle_ids, dtype=np.intp)
+                               for pair, cycle_ids in self.pair_cycles.items()}
+            self.matrix()
+
+    def _enumerate(self, start, node, path, visited, max_length, min_length, canonical):
+        # Канонический обход: все вершины цикла больше стартовой, чтобы не повторять один цикл со сдвигом
+        graph = self.graph
+        for edge in graph.out_edges[node]:
+            target = graph.target[edge]
+            if target == start:
+                if len(path) + 1 >= min_length:
+                    self.cycles.append(tuple(path + [edge]))
+            elif target not in visited and len(path) + 1 < max_length and (not canonical or target > start):
+                visited.add(target)
+                self._enumerate(start, target, path + [edge], visited, max_length, min_length, canonical)
+                visited.discard(target)
+
+    def update(self, venue, base, quote, bid, ask):
+        """
+        :return: список (номер цикла, доходность) прибыльных циклов среди затронутых обновлением
+        """
+        pair = (venue, base, quote)
+        buy, sell = self.pair_edges[pair]
+        weights = self.graph.weights
+        weights[buy] = buy_weight = math.log(ask) - self.log_fee
+        weights[sell] = sell_weight = -math.log(bid) - self.log_fee
+
+        if self.vectorized:
+            import numpy as np
+
+            self._weights[buy] = buy_weight
+            self._weights[sell] = sell_weight
+            rows = self._pair_rows[pair]
+            totals = self._weights[self._matrix[rows]].sum(axis=1)
+            self._sums[rows] = totals
+            negative = totals < 0
+            return list(zip(rows[negative].tolist(), np.expm1(-totals[negative]).tolist()))
+
+        sums = self.sums
+        cycles = self.cycles
+        found = []
+        for cycle_id in self.pair_cycles[pair]:
+            total = 0.0
+            for edge in cycles[cycle_id]:
+                total += weights[edge]
+            sums[cycle_id] = total
+            if total < 0:
+                found.append((cycle_id, math.exp(-total) - 1))
+        return found
+
+    def evaluate_all(self):
+        """
+        :return: векторная проверка всех циклов (нужен numpy): массивы номеров циклов и их доходности
+        """
+        import numpy as np
+
+        weights = np.append(np.frombuffer(self.graph.weights, dtype=np.float64), 0.0)
+        totals = weights[self.matrix()].sum(axis=1)
+        profitable = np.nonzero(totals < 0)[0]
+        return profitable, np.expm1(-totals[profitable])
+
+    def matrix(self):
+        """
+        :return: матрица номеров рёбер циклов (циклы × max_length); короткие циклы дополнены
+                 фиктивным ребром с нулевым весом (индекс за последним ребром)
+        """
+        import numpy as np
+
+        if self._matrix is None:
+            width = max((len(edges) for edges in self.cycles), default=1)
+            padding = len(self.graph.edge_keys)
+            self._matrix = np.array([edges + (padding,) * (width - len(edges)) for edges in self.cycles],
+                                    dtype=np.intp).reshape(len(self.cycles), width)
+        return self._matrix
+
+    def describe(self, cycle_id):
+        """
+        :return: ноги цикла в виде [(биржа, базовая валюта, котируемая валюта, 'buy' или 'sell')]
+        """
+        return [self.graph.edge_keys[edge] for edge in self.cycles[cycle_id]]
@@ -0,0 +1,36 @@
+import zlib
+
+try:
+    from isal import isal_zlib as native_zlib
+except ImportError:
+    try:
+        from zlib_ng import zlib_ng as native_zlib
+    except ImportError:
+        native_zlib = None
+
+
+# 16 + MAX_WBITS: zlib сам разбирает gzip-заголовок, без GzipFile и BytesIO
+GZIP_WBITS = 31
+BACKEND = native_zlib.__name__ if native_zlib is not None else 'zlib'
+_decompress = native_zlib.decompress if native_zlib is not None else zlib.decompress
+
+
+def gunzip(frame):
+    """
+    :param frame: gzip-кадр из сокета (HTX, BingX)
+    :return: распакованные байты; json.loads принимает их напрямую, без decode("utf-8")
+    """
+    return _decompress(frame, GZIP_WBITS)
+
+
+def parse_ping(payload):
+    """
+    :param payload: распакованный кадр
+    :return: значение ping для кадров вида {"ping": 123} без вызова json.loads, иначе None
+             (в том числе для {"ping": "<uuid>", "time": ...} - такой кадр разбирается как JSON в process())
+    """
+    if payload.startswith(b'{"ping":') and payload.endswith(b'}'):
+        value = payload[8:-1].strip()
+        if value.isdigit():
+            return int(value)
+    return None
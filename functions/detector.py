@@ -0,0 +1,308 @@
+import threading
+import time
+from collections import Counter
+from functions.clock_skew import ClockSkew
+from functions.latency import LatencyRecorder
+from functions.log_settings import logger
+from functions.sizing import max_profit_fill
+from functions.top_of_book import TopOfBook
+
+
+# Котировка старше стольких секунд от приёма не участвует в сравнении (соединение оборвалось или молчит)
+MAX_QUOTE_AGE = 5.0
+# Котировки двух бирж, чьи моменты на биржах (после поправки на смещение часов) разошлись больше чем на столько
+# секунд, описывают разные состояния рынка - такой спред не сравнивается
+MAX_TIME_GAP = 1.0
+
+
+class ArbitrageDetector:
+    """
+    Событийный детектор арбитража: коннекторы сообщают "символ X изменился на бирже Y",
+    детектор пересчитывает только этот символ, без опроса всего хранилища котировок
+    """
+    def __init__(self, prices, threshold, fee, exchange_fees=None, books=None, on_signal=None, sink=None,
+                 max_quote_age=MAX_QUOTE_AGE, max_time_gap=MAX_TIME_GAP):
+        """
+        :param on_signal: вызывается на каждую новую возможность (например, ExecutionEngine.on_signal)
+        :param max_quote_age: предельный возраст котировки в секундах - число для всех бирж
+                              или словарь {биржа: секунды} (биржи без записи - MAX_QUOTE_AGE), None - без проверки
+        :param max_time_gap: предельное расхождение моментов котировок двух бирж в секундах, None - без проверки
+        :param sink: журнал возможностей с методом emit (OpportunitySink, OpportunityStore), пишет в фоновом потоке
+        """
+        self.prices = prices
+        self.books = books if books is not None else {}
+        self.threshold = threshold
+        self.fee = fee
+        self.exchange_fees = exchange_fees or {}
+        self.on_signal = on_signal
+        self.sink = sink
+        self.max_age_ns = None
+        if max_quote_age is not None:
+            ages = max_quote_age if isinstance(max_quote_age, dict) else {}
+            default = MAX_QUOTE_AGE if isinstance(max_quote_age, dict) else max_quote_age
+            self.max_age_ns = {exchange: int(ages.get(exchange, default) * 1e9) for exchange in prices.exchanges}
+        self.max_gap_ns = int(max_time_gap * 1e9) if max_time_gap is not None else None
+        # Источник времени в нс; при проигрывании записи - время записи (ReplayEngine.now)
+        self.now = time.time_ns
+        self.clock = ClockSkew()
+        # Смещения часов, измеренные по REST (main.set_clock_offsets), - часть модели self.clock
+        self.clock_offsets = self.clock.offsets
+        self.latency = LatencyRecorder()
+        self.lock = threading.Lock()
+        self.book = TopOfBook()
+        self.active = {}
+        self.fills = {}
+        self.ticks = 0
+        self.evaluations = 0
+        self.opportunities = 0
+        self.symbol_opportunities = Counter()
+        self.stale_quotes = 0
+        self.stale_signals = Counter()
+        self.evaluations_per_tick = Counter()
+        self.last_latency_ns = 0
+        self.max_latency_ns = 0
+        self.total_latency_ns = 0
+
+    def on_update(self, symbol, exchange):
+        """
+        :param symbol: символ, по которому пришла котировка (BTCUSDT)
+        :param exchange: биржа, приславшая котировку (bybit)
+        :return: вызывается из on_message коннектора сразу после записи цены
+        """
+        started = time.perf_counter_ns()
+        with self.lock:
+            evaluations = 0
+            quote = None
+            if symbol in self.prices:
+                quote = self.index(symbol, exchange)
+                if quote is not None:
+                    self.clock.observe(exchange, quote.exchange_ts, quote.received_ns)
+                evaluations = self.evaluate(symbol)
+            if quote is not None and quote.received_ns:
+                self.record_latency(exchange, quote, self.now())
+            latency = time.perf_counter_ns() - started
+            self.latency.record(exchange, 'pass', latency)
+            self.ticks += 1
+            self.evaluations += evaluations
+            self.evaluations_per_tick[evaluations] += 1
+            self.last_latency_ns = latency
+            self.total_latency_ns += latency
+            if latency > self.max_latency_ns:
+                self.max_latency_ns = latency
+
+    def index(self, symbol, exchange):
+        """
+        :return: переносит котировку биржи из хранилища в индекс лучших цен и возвращает её
+        """
+        quote = self.prices.read(symbol, exchange)
+        if quote is None:
+            self.book.remove(symbol, exchange)
+        else:
+            bid = quote.bid if quote.bid == quote.bid else None
+            ask = quote.ask if quote.ask == quote.ask else None
+            self.book.update(symbol, exchange, bid, ask)
+        return quote
+
+    def record_latency(self, exchange, quote, detected_ns):
+        """
+        :return: раскладывает путь котировки по этапам: сеть (с поправкой на смещение часов биржи),
+                 распаковка, разбор, передача и проверка в детекторе, и весь путь от биржи до сигнала
+        """
+        latency = self.latency
+        if quote.exchange_ts:
+            exchange_ns = quote.exchange_ts * 1_000_000 - self.clock_offsets.get(exchange, 0)
+            latency.record(exchange, 'network', quote.received_ns - exchange_ns)
+            latency.record(exchange, 'total', detected_ns - exchange_ns)
+        latency.record(exchange, 'decompress', quote.decoded_ns - quote.received_ns)
+        latency.record(exchange, 'parse', quote.parsed_ns - quote.decoded_ns)
+        latency.record(exchange, 'detect', detected_ns - quote.parsed_ns)
+
+    def evaluate(self, symbol):
+        """
+        :param symbol: символ для проверки
+        :return: количество выполненных проверок (1)
+        """
+        now_ns = self.now()
+        best_bid, bid_exchange = self.fresh(symbol, self.book.best_bid, now_ns) or (None, None)
+        best_ask, ask_exchange = self.fresh(symbol, self.book.best_ask, now_ns) or (None, None)
+
+        opportunity = None
+        if best_bid and best_ask and best_bid > best_ask:
+            profit_percent = (best_bid - best_ask) / best_ask
+            net_profit_percent = profit_percent - self.fee_for(ask_exchange) - self.fee_for(bid_exchange)
+            if net_profit_percent > self.threshold and self.aligned(symbol, ask_exchange, bid_exchange, now_ns):
+                opportunity = (ask_exchange, best_ask, bid_exchange, best_bid)
+                fill = self.size(symbol, ask_exchange, bid_exchange)
+                if fill is not None and not fill.quantity:
+                    opportunity = None
+                # Логируем только новую или изменившуюся возможность, а не каждый тик
+                elif self.active.get(symbol) != opportunity:
+                    self.opportunities += 1
+                    self.symbol_opportunities[symbol] += 1
+                    txt = f'''Монета: {symbol} с чистой прибылью {net_profit_percent * 100:.2f}%!
+                    Купить на {ask_exchange} за {best_ask}
+                    Продать на {bid_exchange} за {best_bid}'''
+                    if fill is not None:
+                        txt += f'''
+                    Объём {fill.quantity:.6f}, ожидаемая прибыль {fill.pnl:.4f} USDT
+                    Средние цены: покупка {fill.buy_price:.8g}, продажа {fill.sell_price:.8g}'''
+                    logger.info(txt)
+                    detected_ns = self.now()
+                    if self.sink is not None:
+                        self.emit_event(symbol, ask_exchange, best_ask, bid_exchange, best_bid, net_profit_percent,
+                                        fill, detected_ns)
+                    if self.on_signal is not None:
+                        self.on_signal(symbol, ask_exchange, bid_exchange, best_ask, best_bid,
+                                       fill.quantity if fill is not None else None, detected_ns)
+
+        if opportunity is None:
+            self.active.pop(symbol, None)
+            self.fills.pop(symbol, None)
+        else:
+            self.active[symbol] = opportunity
+            self.fills[symbol] = fill
+        return 1
+
+    def fresh(self, symbol, best, now_ns):
+        """
+        :param best: self.book.best_bid или self.book.best_ask
+        :return: (цена, биржа) лучшей свежей котировки; устаревшая убирается из индекса
+                 до следующей котировки своей биржи. Котировка без времени приёма считается свежей
+        """
+        while True:
+            top = best(symbol)
+            if top is None or self.max_age_ns is None:
+                return top
+            received_ns = self.prices.received_ns[self.prices.slot(symbol, top[1])]
+            if not received_ns or now_ns - received_ns <= self.max_age_ns[top[1]]:
+                return top
+            self.book.remove(symbol, top[1])
+            self.stale_quotes += 1
+
+    def aligned(self, symbol, buy_exchange, sell_exchange, now_ns):
+        """
+        :return: False, если кандидата нужно отбросить, - причина считается в stale_signals: биржа,
+                 чья котировка по времени биржи (с поправкой на смещение часов) старше её предела,
+                 или 'time_gap', если моменты котировок двух бирж разошлись больше max_time_gap.
+                 Котировки без времени биржи не проверяются
+        """
+        prices = self.prices
+        buy_ts = prices.exchange_ts[prices.slot(symbol, buy_exchange)]
+        sell_ts = prices.exchange_ts[prices.slot(symbol, sell_exchange)]
+        buy_ns = self.clock.local_ns(buy_exchange, buy_ts) if buy_ts else None
+        sell_ns = self.clock.local_ns(sell_exchange, sell_ts) if sell_ts else None
+        reason = None
+        if self.max_age_ns is not None and buy_ns is not None and now_ns - buy_ns > self.max_age_ns[buy_exchange]:
+            reason = buy_exchange
+        elif self.max_age_ns is not None and sell_ns is not None \
+                and now_ns - sell_ns > self.max_age_ns[sell_exchange]:
+            reason = sell_exchange
+        elif self.max_gap_ns is not None and buy_ns is not None and sell_ns is not None \
+                and abs(buy_ns - sell_ns) > self.max_gap_ns:
+            reason = 'time_gap'
+        if reason is None:
+            return True
+        self.stale_signals[reason] += 1
+        return False
+
+    def emit_event(self, symbol, buy_exchange, buy_price, sell_exchange, sell_price, net_profit, fill, detected_ns):
+        """
+        :return: передаёт возможность в журнал: цены, размеры верхушки, объём и прибыль по стаканам,
+                 возраст котировок обеих бирж от приёма до обнаружения в мс
+        """
+        buy_quote = self.prices.read(symbol, buy_exchange)
+        sell_quote = self.prices.read(symbol, sell_exchange)
+        buy_age = (detected_ns - buy_quote.received_ns) / 1e6 if buy_quote and buy_quote.received_ns else None
+        sell_age = (detected_ns - sell_quote.received_ns) / 1e6 if sell_quote and sell_quote.received_ns else None
+        self.sink.emit({
+            'ts': detected_ns,
+            'symbol': symbol,
+            'buy_exchange': buy_exchange,
+            'buy_price': buy_price,
+            'sell_exchange': sell_exchange,
+            'sell_price': sell_price,
+            'buy_size': buy_quote.ask_size if buy_quote is not None else None,
+            'sell_size': sell_quote.bid_size if sell_quote is not None else None,
+            'net_profit': net_profit,
+            'quantity': fill.quantity if fill is not None else None,
+            'pnl': fill.pnl if fill is not None else None,
+            'buy_age_ms': buy_age,
+            'sell_age_ms': sell_age,
+        })
+
+    def size(self, symbol, buy_exchange, sell_exchange):
+        """
+        :return: Fill с исполнимым объёмом по стаканам обеих бирж или None, если стаканов L2 нет
+        """
+        buy_book = self.books.get((symbol, buy_exchange))
+        sell_book = self.books.get((symbol, sell_exchange))
+        if buy_book is None or sell_book is None or not buy_book.synced or not sell_book.synced:
+            return None
+        return max_profit_fill(buy_book, sell_book, self.fee_for(buy_exchange), self.fee_for(sell_exchange))
+
+    def fee_for(self, exchange):
+        """
+        :return: комиссия биржи, если задана, иначе общая TRADING_FEE
+        """
+        return self.exchange_fees.get(exchange, self.fee)
+
+    def batch_scan(self):
+        """
+        :return: векторный проход по всему хранилищу (нужен numpy): список всех пар бирж
+                 с чистым спредом выше порога, а не только лучшей пары по символу
+        """
+        from functions.spread_matrix import store_snapshot, find_opportunities
+
+        bid, ask = store_snapshot(self.prices)
+        fees = [self.fee_for(exchange) for exchange in self.prices.exchanges]
+        symbol_idx, buy_idx, sell_idx, net = find_opportunities(bid, ask, fees, self.threshold)
+        return [{
+            'symbol': self.prices.symbols[s],
+            'buy_exchange': self.prices.exchanges[b],
+            'buy_price': float(ask[s, b]),
+            'sell_exchange': self.prices.exchanges[e],
+            'sell_price': float(bid[s, e]),
+            'net_profit': float(profit),
+        } for s, b, e, profit in zip(symbol_idx.tolist(), buy_idx.tolist(), sell_idx.tolist(), net.tolist())]
+
+    def scan(self):
+        """
+        :return: один полный проход по всем символам (для начальной проверки и отладки)
+        """
+        with self.lock:
+            for symbol in self.prices:
+                for exchange in self.prices.exchanges:
+                    self.index(symbol, exchange)
+            return sum(self.evaluate(symbol) for symbol in self.prices)
+
+    def clock_stats(self):
+        """
+        :return: оценки смещения часов бирж (ClockSkew.summary)
+        """
+        with self.lock:
+            return self.clock.summary()
+
+    def latency_stats(self):
+        """
+        :return: процентили задержек по биржам и этапам в мкс
+        """
+        with self.lock:
+            return self.latency.summary()
+
+    def stats(self):
+        """
+        :return: счётчики детектора: тики, проверки, распределение проверок на тик и задержка в мкс
+        """
+        with self.lock:
+            ticks = self.ticks
+            return {
+                'ticks': ticks,
+                'evaluations': self.evaluations,
+                'opportunities': self.opportunities,
+                'stale_quotes': self.stale_quotes,
+                'stale_signals': dict(self.stale_signals),
+                'evaluations_per_tick': dict(self.evaluations_per_tick),
+                'last_latency_us': self.last_latency_ns / 1000,
+                'avg_latency_us': self.total_latency_ns / ticks / 1000 if ticks else 0.0,
+                'max_latency_us': self.max_latency_ns / 1000,
+            }
@@ -0,0 +1,276 @@
+import argparse
+import glob
+import json
+import os
+import queue
+import struct
+import threading
+import time
+from array import array
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+
+# Колонки события: имя и тип ('q' - int64, 'd' - float64, 's' - строка со словарём внутри пачки)
+COLUMNS = [
+    ('ts', 'q'),
+    ('symbol', 's'),
+    ('buy_exchange', 's'),
+    ('sell_exchange', 's'),
+    ('buy_price', 'd'),
+    ('sell_price', 'd'),
+    ('buy_size', 'd'),
+    ('sell_size', 'd'),
+    ('quantity', 'd'),
+    ('pnl', 'd'),
+    ('net_profit', 'd'),
+    ('buy_age_ms', 'd'),
+    ('sell_age_ms', 'd'),
+]
+BATCH_SIZE = 4096
+FLUSH_INTERVAL = 1.0
+BACKEND = 'arrow' if pyarrow is not None else 'binary'
+
+# Запасной формат без pyarrow: файл - последовательность самодостаточных пачек
+# MAGIC, заголовок (число строк, длина словаря строк), словарь строк JSON, затем колонки подряд:
+# числа - массивы int64/float64, строки - номера в словаре (uint16)
+MAGIC = b'ARBEVT1'
+BATCH_HEADER = struct.Struct('<II')
+MISSING = float('nan')
+
+
+def segment_name(ts_ns, extension):
+    return f"opportunities-{time.strftime('%Y%m%d-%H', time.gmtime(ts_ns / 1e9))}.{extension}"
+
+
+class OpportunityStore:
+    """
+    Журнал возможностей по колонкам только на дозапись. Детектор вызывает emit() - это только
+    запись в очередь; фоновый поток собирает колонки и раз в batch_size событий или flush_interval
+    секунд дописывает пачку в файл текущего часа (Arrow IPC при наличии pyarrow, иначе свой двоичный формат)
+    """
+    def __init__(self, directory, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, backend=BACKEND):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.backend = backend
+        self.queue = queue.SimpleQueue()
+        self.columns = {name: [] for name, _ in COLUMNS}
+        self.path = None
+        self.file = None
+        self.writer = None
+        self.written = 0
+        self.batches = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def emit(self, event):
+        """
+        :param event: словарь с полями из COLUMNS; отсутствующие числа пишутся как NaN
+        """
+        self.queue.put(event)
+
+    def run(self):
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                event = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                event = ()
+            if event is None:
+                self.flush()
+                return
+            if event:
+                for name, _ in COLUMNS:
+                    value = event.get(name)
+                    self.columns[name].append(MISSING if value is None and name != 'ts' else value)
+            if len(self.columns['ts']) >= self.batch_size or time.monotonic() >= deadline:
+                self.flush()
+                deadline = time.monotonic() + self.flush_interval
+
+    def flush(self):
+        rows = len(self.columns['ts'])
+        if not rows:
+            return
+        path = os.path.join(self.directory, segment_name(self.columns['ts'][0],
+                                                         'arrow' if self.backend == 'arrow' else 'bin'))
+        if path != self.path:
+            self.close_segment()
+            self.path = path
+        if self.backend == 'arrow':
+            self.write_arrow()
+        else:
+            self.write_binary()
+        self.written += rows
+        self.batches += 1
+        self.columns = {name: [] for name, _ in COLUMNS}
+
+    def write_arrow(self):
+        types = {'q': pyarrow.int64(), 'd': pyarrow.float64(), 's': pyarrow.string()}
+        schema = pyarrow.schema([(name, types[kind]) for name, kind in COLUMNS])
+        batch = pyarrow.record_batch([pyarrow.array(self.columns[name], type=types[kind]) for name, kind in COLUMNS],
+                                     schema=schema)
+        if self.writer is None:
+            # Файл этого часа мог остаться от прошлого запуска - новый поток IPC пишется в соседний файл
+            base, extension = os.path.splitext(self.path)
+            path, number = self.path, 0
+            while os.path.exists(path):
+                number += 1
+                path = f'{base}-{number}{extension}'
+            self.file = open(path, 'wb')
+            self.writer = pyarrow.ipc.new_stream(self.file, schema)
+        self.writer.write_batch(batch)
+        self.file.flush()
+
+    def write_binary(self):
+        strings = {}
+        for name, kind in COLUMNS:
+            if kind == 's':
+                for value in self.columns[name]:
+                    strings.setdefault(value, len(strings))
+        dictionary = json.dumps(list(strings)).encode()
+        parts = [MAGIC, BATCH_HEADER.pack(len(self.columns['ts']), len(dictionary)), dictionary]
+        for name, kind in COLUMNS:
+            if kind == 's':
+                parts.append(array('H', [strings[value] for value in self.columns[name]]).tobytes())
+            else:
+                parts.append(array(kind, self.columns[name]).tobytes())
+        if self.file is None:
+            self.file = open(self.path, 'ab')
+        self.file.write(b''.join(parts))
+        self.file.flush()
+
+    def close_segment(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def stats(self):
+        return {'written': self.written, 'batches': self.batches, 'backend': self.backend}
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        self.close_segment()
+
+
+def read_binary(path):
+    """
+    :return: колонки одного файла запасного формата; недописанная последняя пачка пропускается
+    """
+    columns = {name: [] for name, _ in COLUMNS}
+    with open(path, 'rb') as file:
+        data = file.read()
+    offset = 0
+    while offset + len(MAGIC) + BATCH_HEADER.size <= len(data):
+        if data[offset:offset + len(MAGIC)] != MAGIC:
+            raise ValueError(f'{path}: повреждённая пачка на смещении {offset}')
+        rows, dictionary_size = BATCH_HEADER.unpack_from(data, offset + len(MAGIC))
+        position = offset + len(MAGIC) + BATCH_HEADER.size
+        end = position + dictionary_size + sum(rows * (2 if kind == 's' else 8) for _, kind in COLUMNS)
+        if end > len(data):
+            break
+        strings = json.loads(data[position:position + dictionary_size])
+        position += dictionary_size
+        for name, kind in COLUMNS:
+            values = array('H' if kind == 's' else kind)
+            values.frombytes(data[position:position + rows * values.itemsize])
+            position += rows * values.itemsize
+            if kind == 's':
+                columns[name].extend(strings[code] for code in values)
+            else:
+                columns[name].extend(values)
+        offset = end
+    return columns
+
+
+def read_arrow(path):
+    """
+    :return: колонки одного файла Arrow IPC; недописанная при аварийной остановке пачка пропускается
+    """
+    columns = {name: [] for name, _ in COLUMNS}
+    with pyarrow.OSFile(path, 'rb') as file:
+        try:
+            for batch in pyarrow.ipc.open_stream(file):
+                for name, values in batch.to_pydict().items():
+                    columns[name].extend(values)
+        except pyarrow.ArrowInvalid:
+            pass
+    return columns
+
+
+def load(directory):
+    """
+    :return: все события каталога в виде {колонка: список значений}
+    """
+    columns = {name: [] for name, _ in COLUMNS}
+    paths = sorted(glob.glob(os.path.join(directory, 'opportunities-*.bin')))
+    if pyarrow is not None:
+        paths += sorted(glob.glob(os.path.join(directory, 'opportunities-*.arrow')))
+    for path in paths:
+        part = read_arrow(path) if path.endswith('.arrow') else read_binary(path)
+        for name in columns:
+            columns[name].extend(part[name])
+    return columns
+
+
+def aggregate(directory, by=('symbol', 'pair', 'hour')):
+    """
+    :param by: ключи группировки: symbol, pair (биржа покупки -> биржа продажи), hour (UTC)
+    :return: список словарей: ключи группы, число событий, средняя и лучшая чистая прибыль,
+             суммарная ожидаемая прибыль и средний возраст котировок в мс, по убыванию числа событий
+    """
+    columns = load(directory)
+    groups = {}
+    for i, ts in enumerate(columns['ts']):
+        values = {
+            'symbol': columns['symbol'][i],
+            'pair': f"{columns['buy_exchange'][i]}->{columns['sell_exchange'][i]}",
+            'hour': time.strftime('%Y-%m-%d %H:00', time.gmtime(ts / 1e9)),
+        }
+        key = tuple(values[name] for name in by)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {'count': 0, 'net_sum': 0.0, 'net_max': float('-inf'), 'pnl': 0.0,
+                                   'age_sum': 0.0, 'age_count': 0}
+        net = columns['net_profit'][i]
+        pnl = columns['pnl'][i]
+        group['count'] += 1
+        group['net_sum'] += net
+        group['net_max'] = max(group['net_max'], net)
+        if pnl == pnl:
+            group['pnl'] += pnl
+        for age in (columns['buy_age_ms'][i], columns['sell_age_ms'][i]):
+            if age == age:
+                group['age_sum'] += age
+                group['age_count'] += 1
+    rows = []
+    for key, group in groups.items():
+        row = dict(zip(by, key))
+        row.update({
+            'count': group['count'],
+            'avg_net_profit': group['net_sum'] / group['count'],
+            'max_net_profit': group['net_max'],
+            'pnl': group['pnl'],
+            'avg_quote_age_ms': group['age_sum'] / group['age_count'] if group['age_count'] else None,
+        })
+        rows.append(row)
+    rows.sort(key=lambda row: row['count'], reverse=True)
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Сводка по журналу возможностей')
+    parser.add_argument('directory')
+    parser.add_argument('--by', nargs='+', default=['symbol', 'pair', 'hour'], choices=['symbol', 'pair', 'hour'])
+    args = parser.parse_args()
+    for row in aggregate(args.directory, tuple(args.by)):
+        print(row)
@@ -0,0 +1,283 @@
+import asyncio
+import hashlib
+import hmac
+import itertools
+import time
+from collections import Counter, namedtuple
+from decimal import Decimal, ROUND_CEILING, ROUND_FLOOR
+from urllib.parse import urlsplit
+from functions.codec import dumps, loads
+from functions.http_client import AsyncHttpClient, client as http_client
+from functions.latency import LatencyRecorder
+from functions.log_settings import logger
+
+
+ORDER_PATH = '/v5/order/create'
+INSTRUMENTS_PATH = '/v5/market/instruments-info'
+# Сигналы считаются по спотовым котировкам, поэтому и ордера - спотовые
+CATEGORY = 'spot'
+RECV_WINDOW = '5000'
+DEFAULT_NOTIONAL = 10.0
+# Шаг объёма и цены, если фильтры инструмента не загружены
+DEFAULT_STEP = Decimal('0.00000001')
+# Все ноги подписываются по схеме Bybit v5 и уходят на один host - так умеет только локальный симулятор
+LOCAL_HOSTS = ('127.0.0.1', 'localhost', '::1')
+
+NEW = 'new'
+SENT = 'sent'
+ACKED = 'acked'
+REJECTED = 'rejected'
+FAILED = 'failed'
+
+
+# Фильтры инструмента биржи: шаг цены, шаг объёма, минимальный объём и минимальная сумма ордера (Decimal)
+InstrumentFilter = namedtuple('InstrumentFilter', ['tick_size', 'qty_step', 'min_qty', 'min_notional'])
+NO_FILTER = InstrumentFilter(DEFAULT_STEP, DEFAULT_STEP, Decimal(0), Decimal(0))
+
+
+def format_decimal(value):
+    """
+    :return: число строкой без экспоненты и лишних нулей (0.00100000 -> 0.001)
+    """
+    if isinstance(value, Decimal):
+        return format(value.normalize(), 'f')
+    return ('%.8f' % value).rstrip('0').rstrip('.')
+
+
+def round_step(value, step, rounding=ROUND_FLOOR):
+    """
+    :return: value, округлённое до кратного step (Decimal)
+    """
+    return (Decimal(repr(value)) / step).to_integral_value(rounding) * step
+
+
+def is_local(host):
+    return urlsplit(host).hostname in LOCAL_HOSTS
+
+
+def parse_filters(data):
+    """
+    :param data: ответ /v5/market/instruments-info (category=spot)
+    :return: {символ: InstrumentFilter}
+    """
+    filters = {}
+    for item in data['result']['list']:
+        lot, price = item['lotSizeFilter'], item['priceFilter']
+        filters[item['symbol']] = InstrumentFilter(Decimal(price['tickSize']),
+                                                   Decimal(lot.get('basePrecision') or lot['qtyStep']),
+                                                   Decimal(lot['minOrderQty']),
+                                                   Decimal(lot.get('minOrderAmt') or '0'))
+    return filters
+
+
+def fetch_filters(host, category=CATEGORY):
+    """
+    :return: фильтры инструментов host для округления объёма и цены перед подписью
+    """
+    return parse_filters(http_client.get(f'{host}{INSTRUMENTS_PATH}', params={'category': category}).json())
+
+
+class OrderTemplate:
+    """
+    Заготовка запроса на создание лимитного IOC-ордера по схеме Bybit v5.
+    Тело собирается один раз с местами под символ, сторону, объём, цену и orderLinkId,
+    HMAC-SHA256 с ключом создаётся заранее, и на горячем пути остаются подстановка строк и одна подпись:
+    sign = HMAC(secret, timestamp + api_key + recv_window + body)
+    """
+    def __init__(self, exchange, host, api_key, api_secret, category=CATEGORY, recv_window=RECV_WINDOW,
+                 path=ORDER_PATH, filters=None):
+        """
+        :param filters: {символ: InstrumentFilter} (fetch_filters); None - без проверки, шаг DEFAULT_STEP.
+                        Если фильтры заданы, символы без фильтра не торгуются
+        """
+        self.exchange = exchange
+        self.url = f'{host}{path}'
+        self.filters = filters
+        self.body = dumps({
+            'category': category,
+            'symbol': '%s',
+            'side': '%s',
+            'orderType': 'Limit',
+            'qty': '%s',
+            'price': '%s',
+            'timeInForce': 'IOC',
+            'orderLinkId': '%s',
+        })
+        self.sign_prefix = api_key + recv_window
+        self.mac = hmac.new(api_secret.encode(), digestmod=hashlib.sha256)
+        self.headers = {
+            'Content-Type': 'application/json',
+            'X-BAPI-API-KEY': api_key,
+            'X-BAPI-RECV-WINDOW': recv_window,
+        }
+
+    def filter(self, symbol):
+        """
+        :return: InstrumentFilter символа, NO_FILTER без загруженных фильтров или None, если символ не торгуется
+        """
+        if self.filters is None:
+            return NO_FILTER
+        return self.filters.get(symbol)
+
+    def render(self, symbol, side, quantity, price, link_id):
+        """
+        :return: тело запроса и заголовки с подписью
+        """
+        timestamp = str(time.time_ns() // 1_000_000)
+        body = self.body % (symbol, side, format_decimal(quantity), format_decimal(price), link_id)
+        mac = self.mac.copy()
+        mac.update((timestamp + self.sign_prefix + body).encode())
+        headers = self.headers.copy()
+        headers['X-BAPI-TIMESTAMP'] = timestamp
+        headers['X-BAPI-SIGN'] = mac.hexdigest()
+        return body, headers
+
+
+class Order:
+    """
+    Одна нога арбитражной сделки и её состояние: new -> sent -> acked / rejected / failed
+    """
+    __slots__ = ('link_id', 'exchange', 'symbol', 'side', 'quantity', 'price', 'state', 'order_id', 'error',
+                 'detected_ns', 'sent_ns', 'acked_ns')
+
+    def __init__(self, link_id, exchange, symbol, side, quantity, price, detected_ns):
+        self.link_id = link_id
+        self.exchange = exchange
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.price = price
+        self.state = NEW
+        self.order_id = None
+        self.error = None
+        self.detected_ns = detected_ns
+        self.sent_ns = 0
+        self.acked_ns = 0
+
+
+class ExecutionEngine:
+    """
+    Исполнение сигналов детектора: обе ноги (покупка и продажа) отправляются одновременно.
+    on_signal можно звать из любого потока, сделка запускается в цикле asyncio движка.
+    Пока по символу есть неисполненная сделка, новые сигналы по нему пропускаются
+    """
+    def __init__(self, templates, client=None, notional=DEFAULT_NOTIONAL):
+        """
+        :param templates: словарь биржа -> OrderTemplate
+        :param notional: объём сделки в USDT, если детектор не посчитал объём по стаканам
+        """
+        self.templates = templates
+        self.client = client
+        self.notional = notional
+        self.loop = None
+        self.ids = itertools.count(1)
+        self.prefix = f'arb{time.time_ns() // 1_000_000_000}'
+        self.in_flight = set()
+        self.orders = {}
+        self.states = Counter()
+        self.trades = 0
+        self.skipped = 0
+        self.below_minimum = 0
+        self.latency = LatencyRecorder()
+
+    def attach(self, loop):
+        """
+        :param loop: цикл asyncio, в котором будут отправляться ордера
+        """
+        self.loop = loop
+        if self.client is None:
+            self.client = AsyncHttpClient()
+
+    def on_signal(self, symbol, buy_exchange, sell_exchange, buy_price, sell_price, quantity=None, detected_ns=None):
+        """
+        :return: передаёт сигнал детектора в цикл движка, сам детектор не ждёт отправки
+        """
+        detected_ns = detected_ns or time.time_ns()
+        self.loop.call_soon_threadsafe(self.start, symbol, buy_exchange, sell_exchange, buy_price, sell_price,
+                                       quantity, detected_ns)
+
+    def start(self, symbol, buy_exchange, sell_exchange, buy_price, sell_price, quantity, detected_ns):
+        if symbol in self.in_flight or buy_exchange not in self.templates or sell_exchange not in self.templates:
+            self.skipped += 1
+            return
+        buy_filter = self.templates[buy_exchange].filter(symbol)
+        sell_filter = self.templates[sell_exchange].filter(symbol)
+        if buy_filter is None or sell_filter is None:
+            self.skipped += 1
+            return
+        # Объём обеих ног одинаковый - вниз до более крупного шага; цена покупки вниз, продажи вверх до шага цены,
+        # чтобы округление не ухудшало цену сигнала
+        quantity = round_step(quantity or self.notional / buy_price, max(buy_filter.qty_step, sell_filter.qty_step))
+        buy_price = round_step(buy_price, buy_filter.tick_size, ROUND_FLOOR)
+        sell_price = round_step(sell_price, sell_filter.tick_size, ROUND_CEILING)
+        if not (self.allowed(buy_filter, quantity, buy_price) and self.allowed(sell_filter, quantity, sell_price)):
+            self.below_minimum += 1
+            return
+        trade = next(self.ids)
+        buy = Order(f'{self.prefix}-{trade}-b', buy_exchange, symbol, 'Buy', quantity, buy_price, detected_ns)
+        sell = Order(f'{self.prefix}-{trade}-s', sell_exchange, symbol, 'Sell', quantity, sell_price, detected_ns)
+        self.orders[buy.link_id] = buy
+        self.orders[sell.link_id] = sell
+        self.in_flight.add(symbol)
+        self.trades += 1
+        self.loop.create_task(self.execute(symbol, buy, sell))
+
+    @staticmethod
+    def allowed(instrument, quantity, price):
+        """
+        :return: объём и сумма ордера не меньше минимумов инструмента
+        """
+        return quantity > 0 and quantity >= instrument.min_qty and quantity * price >= instrument.min_notional
+
+    async def execute(self, symbol, buy, sell):
+        try:
+            await asyncio.gather(self.send(buy), self.send(sell))
+        finally:
+            self.in_flight.discard(symbol)
+            for order in (buy, sell):
+                self.orders.pop(order.link_id, None)
+                self.states[order.state] += 1
+        if (buy.state == ACKED) != (sell.state == ACKED):
+            logger.warning(f'Исполнена только одна нога сделки {symbol}: покупка {buy.state}, продажа {sell.state}')
+
+    async def send(self, order):
+        body, headers = self.templates[order.exchange].render(order.symbol, order.side, order.quantity, order.price,
+                                                              order.link_id)
+        order.sent_ns = time.time_ns()
+        order.state = SENT
+        self.latency.record(order.exchange, 'signal_to_send', order.sent_ns - order.detected_ns)
+        try:
+            response = await self.client.post(self.templates[order.exchange].url, data=body, headers=headers)
+            reply = loads(response.content)
+        except Exception as e:
+            order.state = FAILED
+            order.error = str(e)
+            logger.error(f'Ошибка отправки ордера {order.link_id} на {order.exchange}: {e}')
+            return
+        order.acked_ns = time.time_ns()
+        self.latency.record(order.exchange, 'round_trip', order.acked_ns - order.sent_ns)
+        if reply.get('retCode') == 0:
+            order.state = ACKED
+            order.order_id = reply['result'].get('orderId')
+        else:
+            order.state = REJECTED
+            order.error = reply.get('retMsg')
+            logger.warning(f'Ордер {order.link_id} на {order.exchange} отклонён: {order.error}')
+
+    def stats(self):
+        """
+        :return: сделки, пропущенные сигналы, сигналы ниже минимумов биржи, ордера по состояниям
+                 (завершённые и в работе) и задержки сигнал -> отправка, отправка -> ответ
+        """
+        return {
+            'trades': self.trades,
+            'skipped': self.skipped,
+            'below_minimum': self.below_minimum,
+            'in_flight': len(self.in_flight),
+            'orders': dict(self.states + Counter(order.state for order in self.orders.values())),
+            'latency': self.latency.summary(),
+        }
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
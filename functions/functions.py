@@ -1,6 +1,8 @@
 import json
-import requests
+import time
 from datetime import datetime
+from functions.http_client import client
+from functions.log_settings import logger
 
 
 def get_data_from_json_file(full_path):
@@ -29,7 +31,7 @@ def calculate_arbitrage_profit(cycle, prices, fee_rate, min_liquidity):
                 liquidity = prices[pair]["bid"] * prices[pair]["bidSize"]
 
             if liquidity < min_liquidity:
-                print(f"Недостаточная ликвидность для {pair}, пропускаем!")
+                logger.info(f"Недостаточная ликвидность для {pair}, пропускаем!")
                 return 0
 
             rate *= (1 - fee_rate)
@@ -42,11 +44,31 @@ def get_server_time(host):
     """
     :return: возвращает такие данные {'timeSecond': '1738692213', 'timeNano': '1738692213900666676'}
     """
-    _bybit_server_time = requests.get(f'{host}/v5/market/time')
+    _bybit_server_time = client.get(f'{host}/v5/market/time')
     server_times = _bybit_server_time.json()['result']
     return server_times
 
 
+def estimate_clock_offset(host, samples=5):
+    """
+    :param host: host Bybit
+    :param samples: количество запросов времени сервера
+    :return: смещение часов сервера относительно локальных в нс (сервер - локальные),
+             берётся замер с наименьшим временем запроса, середина запроса считается моментом ответа
+    """
+    best_rtt = None
+    offset = 0
+    for _ in range(samples):
+        sent = time.time_ns()
+        server_time = int(get_server_time(host)['timeNano'])
+        received = time.time_ns()
+        rtt = received - sent
+        if best_rtt is None or rtt < best_rtt:
+            best_rtt = rtt
+            offset = server_time - (sent + received) // 2
+    return offset
+
+
 def from_int_to_date(timestamp: int) -> str:
     """
     :param timestamp: int значение типа 1738705080000
@@ -82,7 +104,7 @@ def get_historical_volatolity(basecoin, period, host):
         'baseCoin': basecoin.upper(),
         'period': period
     }
-    data = requests.get(_address, params=params)
+    data = client.get(_address, params=params)
     return data.json()
 
 
@@ -102,7 +124,7 @@ def get_wallet_balance(api_key, api_secret, current_time, host):
         'X-BAPI-RECV-WINDOW': '20000',
         'X-BAPI-SIGN': api_secret,
     }
-    request = requests.get(_url, headers=headers)
+    request = client.get(_url, headers=headers)
     try:
         return request.json()
     except json.JSONDecodeError:
@@ -147,7 +169,7 @@ def place_order(api_key, api_secret, current_time, host):
         'X-BAPI-RECV-WINDOW': '20000',
         'X-BAPI-SIGN': api_secret,
     }
-    request = requests.post(_url, headers=headers, data=json_struct)
+    request = client.post(_url, headers=headers, data=json_struct)
     try:
         return request.json()
     except json.JSONDecodeError:
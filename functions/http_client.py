@@ -0,0 +1,132 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+    import h2  # без h2 httpx не умеет HTTP/2
+except ImportError:
+    httpx = None
+
+
+CONNECT_TIMEOUT = 3
+READ_TIMEOUT = 5
+RETRIES = 2
+BACKOFF = 0.05
+POOL_SIZE = 10
+HTTP2 = httpx is not None
+
+
+class HttpClient:
+    """
+    Пул keep-alive сессий requests, по одной на хост: TCP и TLS поднимаются один раз,
+    дальше запросы идут по уже открытым соединениям. У каждого запроса есть таймаут,
+    GET повторяется при сетевых ошибках и 5xx. POST не повторяется: повтор создания ордера
+    может выставить его дважды
+    """
+    def __init__(self, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), retries=RETRIES, backoff=BACKOFF,
+                 pool_size=POOL_SIZE):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.sessions = {}
+
+    def session(self, url):
+        """
+        :return: сессия для хоста из url, создаётся при первом запросе
+        """
+        parts = urlsplit(url)
+        host = f'{parts.scheme}://{parts.netloc}'
+        session = self.sessions.get(host)
+        if session is None:
+            retry = Retry(total=self.retries, backoff_factor=self.backoff, allowed_methods=frozenset(['GET']),
+                          status_forcelist=(500, 502, 503, 504), raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+            session = requests.Session()
+            session.mount(host, adapter)
+            self.sessions[host] = session
+        return session
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session(url).request(method, url, **kwargs)
+
+    def get(self, url, params=None, headers=None):
+        return self.request('GET', url, params=params, headers=headers)
+
+    def post(self, url, data=None, headers=None):
+        return self.request('POST', url, data=data, headers=headers)
+
+    def close(self):
+        for session in self.sessions.values():
+            session.close()
+        self.sessions.clear()
+
+
+class Response:
+    """
+    Ответ асинхронного клиента: одинаковый для httpx и для запасного пути через потоки
+    """
+    __slots__ = ('status_code', 'content', 'http_version')
+
+    def __init__(self, status_code, content, http_version):
+        self.status_code = status_code
+        self.content = content
+        self.http_version = http_version
+
+    def json(self):
+        from functions.codec import loads
+        return loads(self.content)
+
+
+class AsyncHttpClient:
+    """
+    asyncio-клиент: несколько запросов (например, баланс на двух биржах или обе ноги сделки)
+    отправляются одновременно через asyncio.gather. Если установлен httpx с h2, запросы к одному хосту
+    мультиплексируются в одном HTTP/2 соединении, иначе уходят в пул потоков поверх HttpClient
+    """
+    def __init__(self, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), retries=RETRIES, pool_size=POOL_SIZE, http2=HTTP2):
+        self.http2 = http2 and httpx is not None
+        if self.http2:
+            connect, read = timeout
+            limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            self.client = httpx.AsyncClient(
+                timeout=httpx.Timeout(read, connect=connect),
+                transport=httpx.AsyncHTTPTransport(http2=True, limits=limits, retries=retries),
+            )
+        else:
+            self.client = HttpClient(timeout=timeout, retries=retries, pool_size=pool_size)
+            self.executor = ThreadPoolExecutor(max_workers=pool_size)
+
+    async def request(self, method, url, params=None, data=None, headers=None):
+        """
+        :return: Response со статусом, телом и версией протокола
+        """
+        if self.http2:
+            response = await self.client.request(method, url, params=params, content=data, headers=headers)
+            return Response(response.status_code, response.content, response.http_version)
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(
+            self.executor, lambda: self.client.request(method, url, params=params, data=data, headers=headers))
+        return Response(response.status_code, response.content, 'HTTP/1.1')
+
+    async def get(self, url, params=None, headers=None):
+        return await self.request('GET', url, params=params, headers=headers)
+
+    async def post(self, url, data=None, headers=None):
+        return await self.request('POST', url, data=data, headers=headers)
+
+    async def close(self):
+        if self.http2:
+            await self.client.aclose()
+        else:
+            self.client.close()
+            self.executor.shutdown(wait=False)
+
+
+# Общий клиент для синхронных функций из functions.functions
+client = HttpClient()
@@ -1,21 +1,161 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import multiprocessing
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 
 LOGGING_LOG_FILE = f'logs/arbitrage.log'
 LOGGING_FORMATTER_STRING = '%(asctime)s %(levelname)s %(message)s'
+# Сколько записей поток записи забирает из очереди за один проход перед сбросом на диск
+LOGGING_BATCH_SIZE = 512
+# Одинаковые сообщения чаще раза в DEDUP_INTERVAL секунд подавляются, всего не больше RATE_LIMIT записей в секунду
+DEDUP_INTERVAL = 1.0
+RATE_LIMIT = 200
+DEDUP_KEYS_LIMIT = 10000
 
 
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-handler = RotatingFileHandler(LOGGING_LOG_FILE, mode='a', maxBytes=1000000, backupCount=10)
+class BatchFlushMixin:
+    """
+    Обработчик не сбрасывает поток после каждой записи: сброс делает поток записи после пачки
+    """
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class BatchRotatingFileHandler(BatchFlushMixin, RotatingFileHandler):
+    pass
+
+
+class BatchStreamHandler(BatchFlushMixin, logging.StreamHandler):
+    pass
+
+
+class BatchQueueListener(QueueListener):
+    """
+    Поток записи: забирает из очереди всё накопившееся (до LOGGING_BATCH_SIZE записей),
+    пишет пачку и один раз сбрасывает файл и консоль
+    """
+    def _monitor(self):
+        q = self.queue
+        stop = False
+        while not stop:
+            batch = [self.dequeue(True)]
+            while len(batch) < LOGGING_BATCH_SIZE:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            for record in batch:
+                if record is self._sentinel:
+                    stop = True
+                else:
+                    self.handle(record)
+            for handler in self.handlers:
+                handler.flush_batch()
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Фильтр на стороне горячего пути (без ввода-вывода): повтор того же сообщения в течение interval секунд
+    подавляется, сверх rate записей в секунду записи отбрасываются. Число подавленных дописывается
+    к следующей прошедшей записи
+    """
+    def __init__(self, interval=DEDUP_INTERVAL, rate=RATE_LIMIT):
+        super().__init__()
+        self.interval = interval
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.last_seen = {}
+        self.window = 0
+        self.window_count = 0
+        self.suppressed = 0
+
+    def filter(self, record):
+        now = time.monotonic()
+        key = (record.levelno, record.msg if not record.args else record.getMessage())
+        with self.lock:
+            if now - self.last_seen.get(key, -self.interval) < self.interval:
+                self.suppressed += 1
+                return False
+            second = int(now)
+            if second != self.window:
+                self.window = second
+                self.window_count = 0
+            if self.window_count >= self.rate:
+                self.suppressed += 1
+                return False
+            self.window_count += 1
+            if len(self.last_seen) >= DEDUP_KEYS_LIMIT:
+                self.last_seen.clear()
+            self.last_seen[key] = now
+            if self.suppressed:
+                record.msg = f'{record.getMessage()} (подавлено повторов: {self.suppressed})'
+                record.args = None
+                self.suppressed = 0
+        return True
+
+
+# Формат не использует файл, строку, поток и процесс вызова - не собираем их на каждую запись
+# (раздел Optimization в Logging HOWTO)
+logging._srcfile = None
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
+log_queue = queue.SimpleQueue()
 formatter = logging.Formatter(LOGGING_FORMATTER_STRING)
+handler = BatchRotatingFileHandler(LOGGING_LOG_FILE, mode='a', maxBytes=1000000, backupCount=10)
 handler.setFormatter(formatter)
-console_output = logging.StreamHandler()
+console_output = BatchStreamHandler()
 console_output.setFormatter(formatter)
-logger.addHandler(handler)
-logger.addHandler(console_output)
+listener = BatchQueueListener(log_queue, handler, console_output, respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)
+
+
+# Горячий путь только кладёт запись в очередь, запись в файл и консоль - в потоке listener
+queue_handler = QueueHandler(log_queue)
+rate_limit = RateLimitFilter()
+queue_handler.addFilter(rate_limit)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+logger.addHandler(queue_handler)
+
+# Записи процессов приёма (main.py --processes): файл пишет и ротирует только главный процесс
+process_queue = None
+process_listener = None
+
+
+def process_log_queue():
+    """
+    :return: очередь, через которую дочерние процессы передают записи главному;
+             поток чтения в главном процессе запускается при первом вызове (до создания процессов)
+    """
+    global process_queue, process_listener
+    if process_queue is None:
+        process_queue = multiprocessing.Queue()
+        process_listener = BatchQueueListener(process_queue, handler, console_output, respect_handler_level=True)
+        process_listener.start()
+        atexit.register(process_listener.stop)
+    return process_queue
+
+
+def forward_logs(target):
+    """
+    :param target: очередь из process_log_queue() главного процесса
+    :return: в дочернем процессе записи уходят в главный процесс вместо своего файла
+    """
+    queue_handler.queue = target
+    if process_listener is not None:
+        # Унаследованный при fork stop() положил бы в общую очередь сигнал остановки потока главного процесса
+        atexit.unregister(process_listener.stop)
 
 
 if __name__ == '__main__':
-    pass
\ No newline at end of file
+    pass
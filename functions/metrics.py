@@ -0,0 +1,241 @@
+"""
+Метрики в текстовом формате Prometheus на локальном HTTP: http://127.0.0.1:9108/metrics.
+Горячий путь не пишет ничего сверх уже существующих счётчиков: коллекторы в момент запроса читают
+статистику соединений, гистограммы LatencyRecorder детектора и хранилище котировок.
+Запуск вместе с ботом: python main.py --metrics-port 9108
+"""
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from functions.log_settings import logger
+
+
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = 9108
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Границы корзин гистограмм (le) в секундах: от микросекунды до секунд
+BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Этап LatencyRecorder с длительностью прохода детектора - отдельная метрика, а не один из этапов пути котировки
+PASS_STAGE = 'pass'
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def format_value(value):
+    if value != value:
+        return 'NaN'
+    if value in (math.inf, -math.inf):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+class Family:
+    """
+    Одна метрика с набором рядов: samples - список (суффикс имени, метки, значение)
+    """
+    __slots__ = ('name', 'kind', 'help', 'samples')
+
+    def __init__(self, name, kind, help_text):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.samples = []
+
+    def add(self, labels, value, suffix=''):
+        self.samples.append((suffix, labels, value))
+        return self
+
+    def add_histogram(self, labels, histogram):
+        """
+        :param histogram: LatencyHistogram в нс; его логарифмические корзины раскладываются по границам BUCKETS
+        """
+        counts = list(histogram.counts)
+        upper_bound = histogram.upper_bound
+        cumulative = 0
+        bucket = 0
+        for le in BUCKETS:
+            limit = le * 1e9
+            while bucket < len(counts) and upper_bound(bucket) <= limit:
+                cumulative += counts[bucket]
+                bucket += 1
+            self.add(dict(labels, le=repr(le)), cumulative, '_bucket')
+        total = sum(counts)
+        self.add(dict(labels, le='+Inf'), total, '_bucket')
+        self.add(labels, histogram.total / 1e9, '_sum')
+        self.add(labels, total, '_count')
+        return self
+
+    def render(self, lines):
+        lines.append(f'# HELP {self.name} {escape(self.help)}')
+        lines.append(f'# TYPE {self.name} {self.kind}')
+        for suffix, labels, value in self.samples:
+            lines.append(f'{self.name}{suffix}{format_labels(labels)} {format_value(value)}')
+
+
+class MetricsRegistry:
+    """
+    Набор коллекторов: функция без аргументов, возвращающая список Family.
+    Сбой одного коллектора не ломает ответ - его метрики просто пропадают до следующего запроса
+    """
+    def __init__(self):
+        self.collectors = []
+
+    def register(self, collector):
+        self.collectors.append(collector)
+        return collector
+
+    def render(self):
+        lines = []
+        for collector in self.collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                logger.warning(f'Метрики: ошибка коллектора {getattr(collector, "__name__", collector)}: {e}')
+                continue
+            for family in families:
+                family.render(lines)
+        lines.append('')
+        return '\n'.join(lines)
+
+
+def venue_of(label):
+    """
+    :return: биржа по имени соединения (bybit-1 -> bybit)
+    """
+    return label.split('-', 1)[0]
+
+
+class ConnectionCollector:
+    """
+    Сообщения, переподключения и очереди по соединениям. Принимает ConnectorRuntime.snapshot
+    (один процесс) или SharedIngest.stats (процесс на биржу); сообщений в секунду - rate(arb_messages_total[1m])
+    """
+    def __init__(self, connections):
+        self.connections = connections
+
+    def __call__(self):
+        messages = Family('arb_messages_total', 'counter', 'Принятые кадры WebSocket')
+        reconnects = Family('arb_reconnects_total', 'counter', 'Переподключения после обрыва соединения')
+        failovers = Family('arb_failovers_total', 'counter', 'Переключения на резервное соединение')
+        queue = Family('arb_queue_depth', 'gauge', 'Кадры в очереди между чтением сокета и разбором')
+        overflows = Family('arb_ring_overflows_total', 'counter', 'Потерянные уведомления кольца процесса приёма')
+        cpu = Family('arb_ingest_cpu_seconds_total', 'counter', 'Процессорное время процесса приёма')
+        for label, stats in self.connections().items():
+            venue = venue_of(label)
+            labels = {'venue': venue, 'connection': label}
+            received = stats.get('received', stats.get('messages', 0))
+            messages.add(labels, received)
+            if 'reconnects' in stats:
+                reconnects.add(labels, stats['reconnects'])
+            if 'failovers' in stats:
+                failovers.add(labels, stats['failovers'])
+            if 'queue_depth' in stats:
+                queue.add(labels, stats['queue_depth'])
+            if 'overflows' in stats:
+                overflows.add(labels, stats['overflows'])
+            if 'cpu_seconds' in stats:
+                cpu.add(labels, stats['cpu_seconds'])
+        return [messages, reconnects, failovers, queue, overflows, cpu]
+
+
+def detector_collector(detector):
+    """
+    :return: коллектор детектора: время этапов пути котировки (распаковка, разбор, сеть, ...),
+             длительность прохода детектора, проверки, возможности по символам и отброшенные кандидаты
+    """
+    def collect():
+        stages = Family('arb_stage_seconds', 'histogram', 'Время этапа пути котировки по биржам')
+        passes = Family('arb_detector_pass_seconds', 'histogram', 'Длительность on_update детектора')
+        ticks = Family('arb_detector_ticks_total', 'counter', 'Обновления котировок, дошедшие до детектора')
+        opportunities = Family('arb_opportunities_total', 'counter', 'Новые возможности по символам')
+        stale_quotes = Family('arb_stale_quotes_total', 'counter', 'Котировки, убранные из сравнения по возрасту')
+        stale_signals = Family('arb_stale_signals_total', 'counter',
+                               'Кандидаты, отброшенные по возрасту или расхождению времени бирж')
+        with detector.lock:
+            for (exchange, stage), histogram in sorted(detector.latency.histograms.items()):
+                if stage == PASS_STAGE:
+                    passes.add_histogram({'venue': exchange}, histogram)
+                else:
+                    stages.add_histogram({'venue': exchange, 'stage': stage}, histogram)
+            ticks.add({}, detector.ticks)
+            for symbol, count in sorted(detector.symbol_opportunities.items()):
+                opportunities.add({'symbol': symbol}, count)
+            stale_quotes.add({}, detector.stale_quotes)
+            for reason, count in sorted(detector.stale_signals.items()):
+                stale_signals.add({'reason': reason}, count)
+        return [stages, passes, ticks, opportunities, stale_quotes, stale_signals]
+    return collect
+
+
+def quote_age_collector(store):
+    """
+    :return: коллектор возраста котировок от приёма по символам и биржам (ячейки без цены пропускаются)
+    """
+    def collect():
+        ages = Family('arb_quote_age_seconds', 'gauge', 'Возраст котировки от приёма')
+        now_ns = time.time_ns()
+        exchanges = store.exchanges
+        received = store.received_ns
+        bid = store.bid
+        ask = store.ask
+        for symbol_id, symbol in enumerate(store.symbols):
+            for exchange_id, exchange in enumerate(exchanges):
+                slot = symbol_id * len(exchanges) + exchange_id
+                received_ns = received[slot]
+                if received_ns and (bid[slot] == bid[slot] or ask[slot] == ask[slot]):
+                    ages.add({'symbol': symbol, 'venue': exchange}, (now_ns - received_ns) / 1e9)
+        return [ages]
+    return collect
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, registry, host=METRICS_HOST, port=METRICS_PORT):
+        """
+        :param port: 0 - свободный порт, фактический берётся из self.url
+        """
+        super().__init__((host, port), MetricsHandler)
+        self.registry = registry
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/metrics'
+
+    def start(self):
+        """
+        :return: запускает сервер в фоновом потоке и возвращает себя
+        """
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        logger.info(f'Метрики Prometheus: {self.url}')
+        return self
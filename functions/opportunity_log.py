@@ -0,0 +1,56 @@
+import os
+import queue
+import threading
+from functions.codec import dumps
+
+
+BATCH_SIZE = 1024
+
+
+class OpportunitySink:
+    """
+    Структурный журнал возможностей в формате JSON Lines: детектор только кладёт событие в очередь,
+    сериализация и запись пачками идут в отдельном потоке
+    """
+    def __init__(self, path, batch_size=BATCH_SIZE):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.queue = queue.SimpleQueue()
+        self.file = open(path, 'a', encoding='utf-8')
+        self.written = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def emit(self, event):
+        """
+        :param event: словарь события (символ, биржи, цены, прибыль, время)
+        """
+        self.queue.put(event)
+
+    def run(self):
+        stop = False
+        while not stop:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = []
+            for event in batch:
+                if event is None:
+                    stop = True
+                else:
+                    lines.append(dumps(event))
+            if lines:
+                self.file.write('\n'.join(lines) + '\n')
+                self.file.flush()
+                self.written += len(lines)
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        self.file.close()
@@ -0,0 +1,156 @@
+import bisect
+
+
+class BookSide:
+    """
+    Одна сторона стакана: отсортированный список ключей цен и словарь размеров.
+    Для bid ключ - цена со знаком минус, чтобы обе стороны шли от лучшей цены к худшей
+    """
+    def __init__(self, is_bid):
+        self.sign = -1.0 if is_bid else 1.0
+        self.keys = []
+        self.sizes = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def replace(self, levels):
+        sign = self.sign
+        sizes = {}
+        for level in levels:
+            size = float(level[1])
+            if size:
+                sizes[sign * float(level[0])] = size
+        self.sizes = sizes
+        self.keys = sorted(sizes)
+
+    def update(self, levels):
+        sign = self.sign
+        keys = self.keys
+        sizes = self.sizes
+        for level in levels:
+            key = sign * float(level[0])
+            size = float(level[1])
+            if size:
+                if key not in sizes:
+                    bisect.insort(keys, key)
+                sizes[key] = size
+            elif key in sizes:
+                del sizes[key]
+                del keys[bisect.bisect_left(keys, key)]
+
+    def best(self):
+        """
+        :return: (цена, размер) лучшего уровня или None
+        """
+        if not self.keys:
+            return None
+        key = self.keys[0]
+        return self.sign * key, self.sizes[key]
+
+    def levels(self, count=None):
+        """
+        :return: список (цена, размер) от лучшей цены к худшей
+        """
+        keys = self.keys if count is None else self.keys[:count]
+        return [(self.sign * key, self.sizes[key]) for key in keys]
+
+    def vwap(self, notional):
+        """
+        :param notional: сумма в котируемой валюте (USDT), которую нужно исполнить
+        :return: (средняя цена, количество, исполненная сумма); сумма меньше notional, если не хватило стакана
+        """
+        remaining = notional
+        quantity = 0.0
+        for key in self.keys:
+            price = self.sign * key
+            size = self.sizes[key]
+            level_notional = price * size
+            if level_notional >= remaining:
+                quantity += remaining / price
+                remaining = 0.0
+                break
+            quantity += size
+            remaining -= level_notional
+        filled = notional - remaining
+        return (filled / quantity if quantity else None), quantity, filled
+
+    def size_within(self, bps):
+        """
+        :return: суммарный размер уровней не дальше bps базисных пунктов от лучшей цены
+        """
+        if not self.keys:
+            return 0.0
+        # Ключи растут от лучшей цены к худшей на обеих сторонах, поэтому граница одна
+        limit = self.keys[0] + abs(self.keys[0]) * bps / 10000
+        end = bisect.bisect_right(self.keys, limit)
+        return sum(self.sizes[key] for key in self.keys[:end])
+
+
+class OrderBook:
+    """
+    Локальный стакан L2: снимок плюс инкрементальные изменения, контроль номеров обновлений.
+    При пропуске номера стакан помечается несинхронизированным до следующего снимка
+    """
+    def __init__(self, symbol, exchange):
+        self.symbol = symbol
+        self.exchange = exchange
+        self.bids = BookSide(is_bid=True)
+        self.asks = BookSide(is_bid=False)
+        self.seq = None
+        self.synced = False
+        self.gaps = 0
+        self.updates = 0
+
+    def apply_snapshot(self, bids, asks, seq=None):
+        self.bids.replace(bids)
+        self.asks.replace(asks)
+        self.seq = seq
+        self.synced = True
+        self.updates += 1
+
+    def apply_delta(self, bids, asks, seq=None, prev_seq=None):
+        """
+        :param seq: номер этого обновления
+        :param prev_seq: номер предыдущего обновления, если биржа его присылает (OKX), иначе ждём seq + 1
+        :return: False, если стакан не синхронизирован или найден пропуск - нужен новый снимок
+        """
+        if not self.synced:
+            return False
+        if seq is not None and self.seq is not None:
+            expected = self.seq if prev_seq is not None else self.seq + 1
+            if (prev_seq if prev_seq is not None else seq) != expected:
+                self.synced = False
+                self.gaps += 1
+                return False
+        self.bids.update(bids)
+        self.asks.update(asks)
+        if seq is not None:
+            self.seq = seq
+        self.updates += 1
+        return True
+
+    def best_bid(self):
+        return self.bids.best()
+
+    def best_ask(self):
+        return self.asks.best()
+
+    def vwap_buy(self, notional):
+        """
+        :return: (средняя цена, количество, исполненная сумма) покупки на notional USDT по ask
+        """
+        return self.asks.vwap(notional)
+
+    def vwap_sell(self, notional):
+        """
+        :return: (средняя цена, количество, исполненная сумма) продажи на notional USDT по bid
+        """
+        return self.bids.vwap(notional)
+
+    def size_within_bps(self, side, bps):
+        """
+        :param side: 'bid' или 'ask'
+        :return: объём в пределах bps базисных пунктов от лучшей цены стороны
+        """
+        return (self.bids if side == 'bid' else self.asks).size_within(bps)
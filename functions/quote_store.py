@@ -0,0 +1,131 @@
+import math
+import time
+from array import array
+from collections import namedtuple
+
+
+NAN = math.nan
+Quote = namedtuple('Quote', ['bid', 'ask', 'bid_size', 'ask_size', 'exchange_ts', 'received_ns', 'decoded_ns',
+                             'parsed_ns', 'seq'])
+
+
+FIELDS = (
+    ('bid', 'd'),
+    ('ask', 'd'),
+    ('bid_size', 'd'),
+    ('ask_size', 'd'),
+    ('exchange_ts', 'q'),
+    ('received_ns', 'q'),
+    ('decoded_ns', 'q'),
+    ('parsed_ns', 'q'),
+    ('seq', 'q'),
+)
+
+
+class QuoteStore:
+    """
+    Общее хранилище котировок на предвыделенных массивах, индекс ячейки - (symbol_id, exchange_id).
+    Каждое поле лежит в отдельном массиве, поэтому всю таблицу можно читать целиком.
+    Запись идёт по схеме seqlock: нечётный seq - ячейка в процессе записи, читатель повторяет чтение.
+    Если передан buffer (например, shared_memory), массивы полей - это окна в него
+    """
+    def __init__(self, symbols, exchanges, buffer=None):
+        self.symbols = list(symbols)
+        self.exchanges = list(exchanges)
+        self.symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.exchange_ids = {exchange: i for i, exchange in enumerate(self.exchanges)}
+        size = len(self.symbols) * len(self.exchanges)
+        if buffer is None:
+            for name, typecode in FIELDS:
+                setattr(self, name, array(typecode, [NAN if typecode == 'd' else 0]) * size)
+        else:
+            view = memoryview(buffer)
+            for i, (name, typecode) in enumerate(FIELDS):
+                setattr(self, name, view[i * size * 8:(i + 1) * size * 8].cast(typecode))
+
+    @staticmethod
+    def nbytes(symbols, exchanges):
+        """
+        :return: размер буфера в байтах для хранилища с такими символами и биржами
+        """
+        return len(FIELDS) * 8 * len(symbols) * len(exchanges)
+
+    def reset(self):
+        """
+        :return: заполняет все ячейки пустыми значениями (для свежего внешнего буфера)
+        """
+        for name, typecode in FIELDS:
+            field = getattr(self, name)
+            empty = NAN if typecode == 'd' else 0
+            for i in range(len(field)):
+                field[i] = empty
+
+    def release(self):
+        """
+        :return: освобождает окна во внешний буфер, чтобы его можно было закрыть
+        """
+        for name, _ in FIELDS:
+            field = getattr(self, name)
+            if isinstance(field, memoryview):
+                field.release()
+
+    def __contains__(self, symbol):
+        return symbol in self.symbol_ids
+
+    def __iter__(self):
+        return iter(self.symbols)
+
+    def slot(self, symbol, exchange):
+        """
+        :return: номер ячейки для пары (символ, биржа)
+        """
+        return self.symbol_ids[symbol] * len(self.exchanges) + self.exchange_ids[exchange]
+
+    def write(self, symbol, exchange, bid, ask, bid_size=NAN, ask_size=NAN, exchange_ts=0,
+              received_ns=0, decoded_ns=0, parsed_ns=0):
+        """
+        :param exchange_ts: время котировки на бирже в мс
+        :param received_ns: время приёма кадра (time_ns)
+        :param decoded_ns: время окончания распаковки кадра (time_ns)
+        :param parsed_ns: время окончания разбора JSON (time_ns)
+        :return: пишет котировку в ячейку без создания новых объектов в хранилище
+        """
+        self.write_slot(self.slot(symbol, exchange), bid, ask, bid_size, ask_size, exchange_ts,
+                        received_ns, decoded_ns, parsed_ns)
+
+    def write_slot(self, slot, bid, ask, bid_size=NAN, ask_size=NAN, exchange_ts=0,
+                   received_ns=0, decoded_ns=0, parsed_ns=0):
+        # У каждой ячейки один писатель (коннектор своей биржи), поэтому seq не требует блокировки
+        seq = self.seq[slot] + 1
+        self.seq[slot] = seq
+        self.bid[slot] = bid
+        self.ask[slot] = ask
+        self.bid_size[slot] = bid_size
+        self.ask_size[slot] = ask_size
+        self.exchange_ts[slot] = exchange_ts
+        self.received_ns[slot] = received_ns
+        self.decoded_ns[slot] = decoded_ns
+        self.parsed_ns[slot] = parsed_ns
+        self.seq[slot] = seq + 1
+
+    def read(self, symbol, exchange):
+        """
+        :return: согласованная котировка Quote или None, если по ячейке нет цены
+        """
+        return self.read_slot(self.slot(symbol, exchange))
+
+    def read_slot(self, slot):
+        while True:
+            seq = self.seq[slot]
+            if seq & 1:
+                # Писатель прерван посреди записи - отдаём ему GIL и читаем заново
+                time.sleep(0)
+                continue
+            quote = Quote(self.bid[slot], self.ask[slot], self.bid_size[slot], self.ask_size[slot],
+                          self.exchange_ts[slot], self.received_ns[slot], self.decoded_ns[slot],
+                          self.parsed_ns[slot], seq)
+            if self.seq[slot] == seq:
+                break
+        if quote.bid != quote.bid and quote.ask != quote.ask:
+            return None
+        return quote
@@ -0,0 +1,104 @@
+import os
+import struct
+import time
+
+
+MAGIC = b'ARBCAP2'
+# Записи до появления глубины в заголовке: всегда верхушка стакана (depth 0)
+LEGACY_MAGIC = b'ARBCAP1'
+DEPTH = struct.Struct('<H')
+RECORD = struct.Struct('<qBI')
+TEXT, BINARY = 0, 1
+BUFFER_SIZE = 1 << 20
+# Буфер сбрасывается на диск не реже раза в секунду: при аварийной остановке теряется не больше секунды кадров
+FLUSH_INTERVAL = 1.0
+
+
+class FrameRecorder:
+    """
+    Запись сырых кадров одной биржи в двоичный журнал только на дозапись.
+    Заголовок файла: MAGIC, длина и имя биржи, глубина стакана коннектора. Запись: время приёма (time_ns),
+    тип кадра, длина, байты
+    """
+    def __init__(self, path, exchange, depth=0):
+        """
+        :param depth: глубина L2 коннектора (0 - верхушка): от неё зависят каналы, поэтому проигрывание
+                      создаёт коннекторы с той же глубиной
+        """
+        self.path = path
+        self.exchange = exchange
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, 'ab', buffering=BUFFER_SIZE)
+        if is_new:
+            name = exchange.encode()
+            self.file.write(MAGIC + bytes([len(name)]) + name + DEPTH.pack(depth))
+            self.file.flush()
+        self.frames = 0
+        self.flush_interval_ns = int(FLUSH_INTERVAL * 1e9)
+        self.flush_ns = time.time_ns() + self.flush_interval_ns
+
+    def write(self, message, received_ns=None):
+        """
+        :param message: кадр как его отдал сокет (str или bytes)
+        :param received_ns: время приёма, по умолчанию текущее
+        """
+        if isinstance(message, str):
+            kind, data = TEXT, message.encode()
+        else:
+            kind, data = BINARY, message
+        received_ns = received_ns or time.time_ns()
+        self.file.write(RECORD.pack(received_ns, kind, len(data)))
+        self.file.write(data)
+        self.frames += 1
+        if received_ns >= self.flush_ns:
+            self.flush(received_ns)
+
+    def flush(self, now_ns=None):
+        self.file.flush()
+        self.flush_ns = (now_ns or time.time_ns()) + self.flush_interval_ns
+
+    def close(self):
+        self.file.close()
+
+
+def read_header(file, path):
+    magic = file.read(len(MAGIC))
+    if magic not in (MAGIC, LEGACY_MAGIC):
+        raise ValueError(f'{path} не является файлом записи кадров')
+    exchange = file.read(file.read(1)[0]).decode()
+    depth = DEPTH.unpack(file.read(DEPTH.size))[0] if magic == MAGIC else 0
+    return exchange, depth
+
+
+def capture_header(path):
+    """
+    :return: (имя биржи, глубина стакана коннектора при записи)
+    """
+    with open(path, 'rb') as file:
+        return read_header(file, path)
+
+
+def open_capture(path):
+    """
+    :return: (имя биржи, генератор кортежей (время приёма в нс, кадр))
+    """
+    file = open(path, 'rb')
+    try:
+        exchange, _ = read_header(file, path)
+    except ValueError:
+        file.close()
+        raise
+
+    def frames():
+        with file:
+            while True:
+                header = file.read(RECORD.size)
+                if len(header) < RECORD.size:
+                    return
+                received_ns, kind, length = RECORD.unpack(header)
+                data = file.read(length)
+                if len(data) < length:
+                    # Хвост, недописанный при аварийной остановке
+                    return
+                yield received_ns, data.decode() if kind == TEXT else data
+    return exchange, frames()
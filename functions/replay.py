@@ -0,0 +1,111 @@
+import argparse
+import heapq
+import time
+from functions.recorder import capture_header, open_capture
+
+
+class ReplayEngine:
+    """
+    Проигрывание записанных кадров через те же коннекторы, декодеры и детектор, без сети.
+    speed=None - максимальная скорость, иначе множитель к реальному времени (1 - как было).
+    Кадр получает записанное время приёма, а коннекторы и детектор идут по часам записи (now),
+    поэтому задержки, смещение часов бирж и возраст котировок считаются как в момент записи.
+    Глубина стакана коннектора должна совпадать с записанной (capture_depths): от неё зависят каналы
+    """
+    def __init__(self, connectors, speed=None, detector=None):
+        """
+        :param detector: ArbitrageDetector, которому коннекторы сообщают об обновлениях
+        """
+        self.connectors = {connector.name: connector for connector in connectors}
+        for connector in connectors:
+            connector.now = self.now
+        if detector is not None:
+            detector.now = self.now
+        self.speed = speed
+        self.frame_ns = 0
+        self.frame_wall_ns = 0
+        self.frames = 0
+        self.sent = 0
+        self.elapsed = 0.0
+
+    def send(self, text):
+        # Ответы на ping никуда не уходят, только считаются
+        self.sent += 1
+
+    def now(self):
+        """
+        :return: время записи в нс: время приёма текущего кадра плюс реально прошедшее с начала его обработки
+        """
+        return self.frame_ns + time.time_ns() - self.frame_wall_ns
+
+    @staticmethod
+    def stream(connector, frames):
+        for received_ns, message in frames:
+            yield received_ns, connector, message
+
+    def run(self, paths):
+        """
+        :param paths: файлы записи, по одному на биржу; кадры сливаются по времени приёма
+        :return: статистика проигрывания
+        """
+        streams = []
+        for path in paths:
+            exchange, depth = capture_header(path)
+            connector = self.connectors[exchange]
+            if connector.depth != depth:
+                raise ValueError(f'{path}: запись с глубиной стакана {depth}, у коннектора {exchange} - '
+                                 f'{connector.depth}')
+            exchange, frames = open_capture(path)
+            streams.append(self.stream(connector, frames))
+
+        started = time.perf_counter()
+        first_ns = None
+        for received_ns, connector, message in heapq.merge(*streams, key=lambda frame: frame[0]):
+            if self.speed is not None:
+                if first_ns is None:
+                    first_ns = received_ns
+                delay = (received_ns - first_ns) / 1e9 / self.speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            self.frame_ns = received_ns
+            self.frame_wall_ns = time.time_ns()
+            connector.handle_message(message, self.send, received_ns)
+            self.frames += 1
+        self.elapsed = time.perf_counter() - started
+        return self.stats()
+
+    @staticmethod
+    def capture_depths(paths):
+        """
+        :return: {биржа: глубина стакана коннектора при записи} для создания коннекторов проигрывания
+        """
+        return dict(capture_header(path) for path in paths)
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'pongs': self.sent,
+            'seconds': self.elapsed,
+            'frames_per_second': self.frames / self.elapsed if self.elapsed else 0.0,
+        }
+
+
+if __name__ == '__main__':
+    from main import SYMBOLS, EXCHANGES, ARBITRAGE_THRESHOLD, TRADING_FEE, EXCHANGE_FEES, CONNECTORS
+    from functions.detector import ArbitrageDetector
+    from functions.quote_store import QuoteStore
+
+    parser = argparse.ArgumentParser(description='Проигрывание записанных кадров бирж')
+    parser.add_argument('paths', nargs='+', help='файлы записи из main.py --capture')
+    parser.add_argument('--speed', default='max', help='max или множитель скорости (1, 10, ...)')
+    args = parser.parse_args()
+
+    store = QuoteStore(SYMBOLS, EXCHANGES)
+    books = {}
+    detector = ArbitrageDetector(store, ARBITRAGE_THRESHOLD, TRADING_FEE, EXCHANGE_FEES, books)
+    depths = ReplayEngine.capture_depths(args.paths)
+    engine = ReplayEngine([connector(store, detector.on_update, books=books, depth=depths.get(name, 0))
+                           for name, connector in CONNECTORS.items()],
+                          speed=None if args.speed == 'max' else float(args.speed), detector=detector)
+    print(f'Проигрывание: {engine.run(args.paths)}')
+    print(f'Детектор: {detector.stats()}')
@@ -0,0 +1,106 @@
+import time
+from multiprocessing import shared_memory
+from functions.quote_store import QuoteStore
+
+
+RING_CAPACITY = 65536
+# Заголовок кольца: head, tail, переполнения, процессорное время процесса-писателя (нс), принятые сообщения,
+# переподключения соединений процесса
+HEAD, TAIL, OVERFLOWS, CPU_NS, MESSAGES, RECONNECTS = range(6)
+HEADER_SIZE = 8
+
+
+def create_store(symbols, exchanges):
+    """
+    :return: (shm, store) - хранилище котировок в новом сегменте разделяемой памяти
+    """
+    shm = shared_memory.SharedMemory(create=True, size=QuoteStore.nbytes(symbols, exchanges))
+    store = QuoteStore(symbols, exchanges, shm.buf)
+    store.reset()
+    return shm, store
+
+
+def attach_store(name, symbols, exchanges):
+    """
+    :return: (shm, store) - хранилище, открытое по имени сегмента в другом процессе
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, QuoteStore(symbols, exchanges, shm.buf)
+
+
+class UpdateRing:
+    """
+    Кольцевой буфер без блокировок в разделяемой памяти: один процесс-писатель, один читатель.
+    Запись - номер ячейки хранилища и время публикации (monotonic_ns), без pickle
+    """
+    def __init__(self, shm, capacity):
+        self.shm = shm
+        self.capacity = capacity
+        view = shm.buf.cast('q')
+        self.header = view[:HEADER_SIZE]
+        self.entries = view[HEADER_SIZE:HEADER_SIZE + 2 * capacity]
+        self.view = view
+
+    @classmethod
+    def create(cls, capacity=RING_CAPACITY):
+        shm = shared_memory.SharedMemory(create=True, size=8 * (HEADER_SIZE + 2 * capacity))
+        ring = cls(shm, capacity)
+        for i in range(HEADER_SIZE):
+            ring.header[i] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name, capacity=RING_CAPACITY):
+        return cls(shared_memory.SharedMemory(name=name), capacity)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def push(self, slot):
+        header = self.header
+        head = header[HEAD]
+        header[MESSAGES] += 1
+        if head - header[TAIL] >= self.capacity:
+            # Читатель отстал: котировка уже лежит в хранилище, теряется только уведомление
+            header[OVERFLOWS] += 1
+            return
+        position = 2 * (head % self.capacity)
+        self.entries[position] = slot
+        self.entries[position + 1] = time.monotonic_ns()
+        header[HEAD] = head + 1
+
+    def drain(self, callback):
+        """
+        :param callback: callback(slot, published_ns) для каждой записи
+        :return: количество прочитанных записей
+        """
+        header = self.header
+        tail = header[TAIL]
+        head = header[HEAD]
+        for index in range(tail, head):
+            position = 2 * (index % self.capacity)
+            callback(self.entries[position], self.entries[position + 1])
+        header[TAIL] = head
+        return head - tail
+
+    def set_cpu_time(self):
+        self.header[CPU_NS] = time.process_time_ns()
+
+    def set_reconnects(self, count):
+        self.header[RECONNECTS] = count
+
+    def counters(self):
+        return {
+            'messages': self.header[MESSAGES],
+            'overflows': self.header[OVERFLOWS],
+            'backlog': self.header[HEAD] - self.header[TAIL],
+            'cpu_seconds': self.header[CPU_NS] / 1e9,
+            'reconnects': self.header[RECONNECTS],
+        }
+
+    def close(self):
+        self.header.release()
+        self.entries.release()
+        self.view.release()
+        self.shm.close()
@@ -0,0 +1,55 @@
+from collections import namedtuple
+
+
+Fill = namedtuple('Fill', ['quantity', 'pnl', 'buy_price', 'sell_price'])
+EMPTY_FILL = Fill(0.0, 0.0, None, None)
+
+
+def max_profit_fill(buy_book, sell_book, buy_fee, sell_fee, max_quantity=None):
+    """
+    Слияние двух отсортированных сторон: покупаем по ask одной биржи, продаём по bid другой,
+    пока очередная единица приносит прибыль после комиссий. Прибыль каждого следующего
+    уровня не растёт (ask только дорожает, bid только дешевеет), поэтому остановка на первом
+    неприбыльном уровне даёт количество с максимальной чистой прибылью
+    :param buy_book: стакан биржи покупки (OrderBook)
+    :param sell_book: стакан биржи продажи (OrderBook)
+    :param max_quantity: ограничение количества (баланс, лимиты), None - без ограничения
+    :return: Fill(количество, чистая прибыль в котируемой валюте, средняя цена покупки, средняя цена продажи)
+    """
+    asks = buy_book.asks
+    bids = sell_book.bids
+    ask_keys, ask_sizes = asks.keys, asks.sizes
+    bid_keys, bid_sizes = bids.keys, bids.sizes
+    buy_factor = 1 + buy_fee
+    sell_factor = 1 - sell_fee
+    limit = float('inf') if max_quantity is None else max_quantity
+
+    i = j = 0
+    ask_left = ask_sizes[ask_keys[0]] if ask_keys else 0.0
+    bid_left = bid_sizes[bid_keys[0]] if bid_keys else 0.0
+    quantity = cost = revenue = pnl = 0.0
+    while i < len(ask_keys) and j < len(bid_keys) and quantity < limit:
+        ask = ask_keys[i]
+        bid = -bid_keys[j]
+        margin = bid * sell_factor - ask * buy_factor
+        if margin <= 0:
+            break
+        step = min(ask_left, bid_left, limit - quantity)
+        quantity += step
+        cost += step * ask
+        revenue += step * bid
+        pnl += step * margin
+        ask_left -= step
+        bid_left -= step
+        if ask_left <= 0:
+            i += 1
+            if i < len(ask_keys):
+                ask_left = ask_sizes[ask_keys[i]]
+        if bid_left <= 0:
+            j += 1
+            if j < len(bid_keys):
+                bid_left = bid_sizes[bid_keys[j]]
+
+    if not quantity:
+        return EMPTY_FILL
+    return Fill(quantity, pnl, cost / quantity, revenue / quantity)
@@ -0,0 +1,44 @@
+import numpy as np
+
+
+def store_snapshot(store):
+    """
+    :param store: QuoteStore
+    :return: (bid, ask) матрицы формы (символы, биржи); ячейки, которые менялись во время копирования, = nan
+    """
+    shape = (len(store.symbols), len(store.exchanges))
+    seq_before = np.frombuffer(store.seq, dtype=np.int64).copy()
+    bid = np.frombuffer(store.bid, dtype=np.float64).copy()
+    ask = np.frombuffer(store.ask, dtype=np.float64).copy()
+    seq_after = np.frombuffer(store.seq, dtype=np.int64)
+    unstable = (seq_before != seq_after) | (seq_before & 1).astype(bool)
+    bid[unstable] = np.nan
+    ask[unstable] = np.nan
+    return bid.reshape(shape), ask.reshape(shape)
+
+
+def spread_matrix(bid, ask, fees):
+    """
+    :param bid: матрица bid (символы, биржи)
+    :param ask: матрица ask (символы, биржи)
+    :param fees: комиссии бирж, вектор длины "биржи"
+    :return: тензор чистого спреда (символ, биржа покупки, биржа продажи)
+    """
+    fees = np.asarray(fees, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        gross = bid[:, None, :] / ask[:, :, None] - 1.0
+    return gross - fees[None, :, None] - fees[None, None, :]
+
+
+def find_opportunities(bid, ask, fees, threshold):
+    """
+    :return: все тройки (символ, биржа покупки, биржа продажи) с чистым спредом выше порога:
+             индексы символов, бирж покупки и продажи и массив чистого спреда
+    """
+    net = spread_matrix(bid, ask, fees)
+    with np.errstate(invalid='ignore'):
+        mask = net > threshold
+    diagonal = np.arange(bid.shape[1])
+    mask[:, diagonal, diagonal] = False
+    symbol_idx, buy_idx, sell_idx = np.nonzero(mask)
+    return symbol_idx, buy_idx, sell_idx, net[symbol_idx, buy_idx, sell_idx]
@@ -0,0 +1,159 @@
+"""
+Реестр символов: единый список инструментов с целыми номерами и их названия на каждой бирже.
+Список читается из файла (symbols.json в корне проекта) или собирается по метаданным бирж:
+python -m functions.symbols --discover --output symbols.json
+"""
+import argparse
+import json
+import os
+from collections import namedtuple
+from functions.http_client import client
+
+
+SYMBOLS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'symbols.json')
+EXCHANGES = ['bingx', 'bybit', 'htx', 'okx']
+# Названия инструмента на биржах: BTCUSDT, BTC-USDT, btcusdt
+VENUE_NAMING = {
+    'bybit': lambda base, quote: f'{base}{quote}',
+    'okx': lambda base, quote: f'{base}-{quote}',
+    'htx': lambda base, quote: f'{base}{quote}'.lower(),
+    'bingx': lambda base, quote: f'{base}-{quote}',
+}
+# Списки инструментов бирж; ответ разбирают функции PARSERS в пары (base, quote) торгуемых инструментов
+INSTRUMENTS_URLS = {
+    'bybit': 'https://api.bybit.com/v5/market/instruments-info?category=spot',
+    'okx': 'https://www.okx.com/api/v5/public/instruments?instType=SPOT',
+    'htx': 'https://api.huobi.pro/v2/settings/common/symbols',
+    'bingx': 'https://open-api.bingx.com/openApi/swap/v2/quote/contracts',
+}
+MIN_VENUES = 2
+
+Instrument = namedtuple('Instrument', ['id', 'symbol', 'base', 'quote', 'venues'])
+
+
+def parse_bybit(data):
+    return [(item['baseCoin'], item['quoteCoin']) for item in data['result']['list'] if item['status'] == 'Trading']
+
+
+def parse_okx(data):
+    return [(item['baseCcy'], item['quoteCcy']) for item in data['data'] if item['state'] == 'live']
+
+
+def parse_htx(data):
+    return [(item['bc'].upper(), item['qc'].upper()) for item in data['data'] if item['state'] == 'online']
+
+
+def parse_bingx(data):
+    return [tuple(item['symbol'].split('-', 1)) for item in data['data'] if item.get('status') == 1]
+
+
+PARSERS = {'bybit': parse_bybit, 'okx': parse_okx, 'htx': parse_htx, 'bingx': parse_bingx}
+
+
+class SymbolRegistry:
+    """
+    Номер символа совпадает с его строкой в QuoteStore (порядок списка), символ хранилища - BTCUSDT.
+    У каждого инструмента свой набор бирж: коннектор подписывается только на то, что торгуется на его бирже
+    """
+    def __init__(self, instruments):
+        """
+        :param instruments: список словарей {'base': 'BTC', 'quote': 'USDT', 'venues': [...]};
+                            без venues инструмент считается торгуемым на всех биржах EXCHANGES
+        """
+        self.instruments = []
+        self.ids = {}
+        self.venue_names = {}
+        for item in instruments:
+            base, quote = item['base'].upper(), item['quote'].upper()
+            symbol = f'{base}{quote}'
+            if symbol in self.ids:
+                continue
+            instrument = Instrument(len(self.instruments), symbol, base, quote, tuple(item.get('venues', EXCHANGES)))
+            self.instruments.append(instrument)
+            self.ids[symbol] = instrument.id
+            for venue in instrument.venues:
+                self.venue_names[(venue, symbol)] = VENUE_NAMING[venue](base, quote)
+        self.symbols = [instrument.symbol for instrument in self.instruments]
+
+    @classmethod
+    def from_file(cls, path=SYMBOLS_FILE):
+        """
+        :param path: JSON со списком инструментов: строки "BTC-USDT" или словари base/quote/venues
+        """
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+        items = data['instruments'] if isinstance(data, dict) else data
+        return cls([dict(zip(('base', 'quote'), item.split('-'))) if isinstance(item, str) else item
+                    for item in items])
+
+    @classmethod
+    def discover(cls, venues=EXCHANGES, quote='USDT', min_venues=MIN_VENUES, limit=None):
+        """
+        :return: реестр по метаданным бирж: инструменты с котируемой валютой quote,
+                 торгуемые не меньше чем на min_venues биржах (иначе арбитражу не с чем сравнивать)
+        """
+        listed = {}
+        for venue in venues:
+            for base, quote_currency in PARSERS[venue](client.get(INSTRUMENTS_URLS[venue]).json()):
+                if quote_currency.upper() == quote:
+                    listed.setdefault(base.upper(), []).append(venue)
+        instruments = [{'base': base, 'quote': quote, 'venues': sorted(names)}
+                       for base, names in sorted(listed.items(), key=lambda item: (-len(item[1]), item[0]))
+                       if len(names) >= min_venues]
+        return cls(instruments[:limit])
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'instruments': [{'base': instrument.base, 'quote': instrument.quote,
+                                        'venues': list(instrument.venues)} for instrument in self.instruments]},
+                      file, indent=2)
+
+    def __len__(self):
+        return len(self.instruments)
+
+    def __iter__(self):
+        return iter(self.instruments)
+
+    def id_of(self, symbol):
+        return self.ids[symbol]
+
+    def venue_name(self, venue, symbol):
+        """
+        :return: название символа на бирже (btcusdt для HTX) или None, если там он не торгуется
+        """
+        return self.venue_names.get((venue, symbol))
+
+    def venue_symbols(self, venue):
+        """
+        :return: символы хранилища, торгуемые на бирже, в порядке номеров
+        """
+        return [instrument.symbol for instrument in self.instruments if venue in instrument.venues]
+
+    def shards(self, venue, max_topics):
+        """
+        :param max_topics: предел каналов на одно соединение
+        :return: символы биржи, разбитые на группы - по соединению на группу
+        """
+        symbols = self.venue_symbols(venue)
+        return [symbols[i:i + max_topics] for i in range(0, len(symbols), max_topics)]
+
+
+registry = SymbolRegistry.from_file()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Список инструментов для арбитража')
+    parser.add_argument('--discover', action='store_true', help='собрать список по метаданным бирж')
+    parser.add_argument('--quote', default='USDT')
+    parser.add_argument('--min-venues', type=int, default=MIN_VENUES)
+    parser.add_argument('--limit', type=int, help='не больше N инструментов (самые распространённые)')
+    parser.add_argument('--output', metavar='PATH', help='записать список в PATH (например, symbols.json)')
+    args = parser.parse_args()
+    result = registry
+    if args.discover:
+        result = SymbolRegistry.discover(quote=args.quote, min_venues=args.min_venues, limit=args.limit)
+    if args.output:
+        result.save(args.output)
+    for instrument in result:
+        print(instrument.id, instrument.symbol, ', '.join(f'{venue}: {result.venue_name(venue, instrument.symbol)}'
+                                                          for venue in instrument.venues))
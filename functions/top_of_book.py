@@ -0,0 +1,83 @@
+import heapq
+import itertools
+
+
+COMPACT_FACTOR = 4
+
+
+class TopOfBook:
+    """
+    Кросс-биржевой индекс лучших цен: для каждого символа по куче на bid и ask.
+    Обновление котировки - O(log n), чтение лучшей цены и биржи - O(1).
+    Устаревшие записи в кучах удаляются лениво по номеру версии
+    """
+    def __init__(self):
+        self.bids = {}
+        self.asks = {}
+        self.quotes = {}
+        self.versions = itertools.count()
+
+    def update(self, symbol, exchange, bid, ask):
+        """
+        :param symbol: символ (BTCUSDT)
+        :param exchange: биржа (bybit)
+        :param bid: лучшая цена покупки на бирже или None
+        :param ask: лучшая цена продажи на бирже или None
+        """
+        version = next(self.versions)
+        quotes = self.quotes.setdefault(symbol, {})
+        quotes[exchange] = version
+        bids = self.bids.setdefault(symbol, [])
+        asks = self.asks.setdefault(symbol, [])
+        if bid:
+            heapq.heappush(bids, (-bid, version, exchange))
+        if ask:
+            heapq.heappush(asks, (ask, version, exchange))
+        self._prune(symbol, quotes, bids, asks)
+
+    def remove(self, symbol, exchange):
+        """
+        :return: убирает котировку биржи по символу из индекса
+        """
+        quotes = self.quotes.get(symbol)
+        if quotes is None or quotes.pop(exchange, None) is None:
+            return
+        self._prune(symbol, quotes, self.bids[symbol], self.asks[symbol])
+
+    def best_bid(self, symbol):
+        """
+        :return: (цена, биржа) лучшего bid по символу или None
+        """
+        bids = self.bids.get(symbol)
+        if not bids:
+            return None
+        price, _, exchange = bids[0]
+        return -price, exchange
+
+    def best_ask(self, symbol):
+        """
+        :return: (цена, биржа) лучшего ask по символу или None
+        """
+        asks = self.asks.get(symbol)
+        if not asks:
+            return None
+        price, _, exchange = asks[0]
+        return price, exchange
+
+    def _prune(self, symbol, quotes, bids, asks):
+        # На вершине кучи всегда должна лежать актуальная запись, иначе чтение не будет O(1)
+        while bids and quotes.get(bids[0][2]) != bids[0][1]:
+            heapq.heappop(bids)
+        while asks and quotes.get(asks[0][2]) != asks[0][1]:
+            heapq.heappop(asks)
+        limit = COMPACT_FACTOR * len(quotes) + 8
+        if len(bids) > limit:
+            self.bids[symbol] = self._compact(quotes, bids)
+        if len(asks) > limit:
+            self.asks[symbol] = self._compact(quotes, asks)
+
+    @staticmethod
+    def _compact(quotes, heap):
+        alive = [entry for entry in heap if quotes.get(entry[2]) == entry[1]]
+        heapq.heapify(alive)
+        return alive
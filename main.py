@@ -1,92 +1,226 @@
+import argparse
+import asyncio
+import functools
+import os
+import signal
 import threading
 import time
 from functions.log_settings import logger
+from functions.detector import ArbitrageDetector
+from functions.execution import ExecutionEngine, OrderTemplate, fetch_filters, is_local
+from functions.functions import estimate_clock_offset
+from functions.metrics import ConnectionCollector, MetricsRegistry, MetricsServer, detector_collector, \
+    quote_age_collector
+from functions.event_store import OpportunityStore
+from functions.opportunity_log import OpportunitySink
+from functions.quote_store import QuoteStore
+from functions.recorder import FrameRecorder
+from functions.symbols import SYMBOLS_FILE, SymbolRegistry, registry as default_registry
+from arbitrages.ingest import SharedIngest
+from arbitrages.runtime import ConnectorRuntime
 from arbitrages.bingx import BingXWebSocket
 from arbitrages.bybit import BybitWebSocket
 from arbitrages.htx import HTXWebSocket
 from arbitrages.okx import OKXWebSocket
 
 
-prices_dict = {
-    'BTCUSDT': {},
-    'ETHUSDT': {},
-    'SOLUSDT': {},
-    'XRPUSDT': {},
-    'DOGEUSDT': {},
-    'SUIUSDT': {},
-    'LTCUSDT': {},
-    'IPUSDT': {},
-    'ADAUSDT': {},
-    'TONUSDT': {}
+SYMBOLS = default_registry.symbols
+EXCHANGES = ['bingx', 'bybit', 'htx', 'okx']
+CONNECTORS = {
+    'bingx': BingXWebSocket,
+    'bybit': BybitWebSocket,
+    'htx': HTXWebSocket,
+    'okx': OKXWebSocket
 }
 ARBITRAGE_THRESHOLD = 0.002
 TRADING_FEE = 0.001
-
-
-def run_bingx():
-    print("🔹 Запускаем BingX WebSocket")
-    bingx_ws = BingXWebSocket(prices_dict)
-    bingx_ws.start()
-
-def run_bybit():
-    print("🔹 Запускаем Bybit WebSocket")
-    bybit_ws = BybitWebSocket(prices_dict)
-    bybit_ws.start()
-
-def run_htx():
-    print("🔹 Запускаем HTX WebSocket")
-    htx_ws = HTXWebSocket(prices_dict)
-    htx_ws.start()
-
-def run_okx():
-    print("🔹 Запускаем OKX WebSocket")
-    okx_ws = OKXWebSocket(prices_dict)
-    okx_ws.start()
-
-threads = [
-    threading.Thread(target=run_bingx, daemon=True),
-    threading.Thread(target=run_bybit, daemon=True),
-    threading.Thread(target=run_htx, daemon=True),
-    threading.Thread(target=run_okx, daemon=True)
-]
-
-for thread in threads:
-    thread.start()
-
-def find_arbitrage_opportunities(prices):
+EXCHANGE_FEES = {exchange: TRADING_FEE for exchange in EXCHANGES}
+# Предельный возраст котировки по биржам в секундах: BingX присылает стакан раз в 500 мс, HTX - раз в секунду,
+# Bybit и OKX - по изменению, поэтому предел - несколько интервалов обновления
+EXCHANGE_MAX_AGE = {'bingx': 2.0, 'bybit': 5.0, 'htx': 3.0, 'okx': 5.0}
+STATS_INTERVAL = 60
+BYBIT_HOST = 'https://api.bybit.com'
+
+
+def capture_path(capture_dir, name):
+    return os.path.join(capture_dir, f'{name}-{time.strftime("%Y%m%d-%H%M%S")}.bin')
+
+
+def simulator_urls(base):
+    """
+    :param base: адрес simulator.ws, например ws://127.0.0.1:9000
+    :return: {биржа: url} для коннекторов или None, если симулятор не задан
+    """
+    return {name: f'{base.rstrip("/")}/{name}' for name in EXCHANGES} if base else None
+
+
+def build_connectors(names, store, on_update, capture_dir=None, books=None, urls=None, registry=default_registry,
+                     l2=()):
+    """
+    :param l2: биржи, для которых вести локальные стаканы L2 (глубина book_depth коннектора)
+    :return: коннекторы бирж: по соединению на каждый шард символов биржи из реестра
+    """
+    connectors = []
+    for name in names:
+        connector_class = CONNECTORS[name]
+        shards = connector_class.shards(registry)
+        logger.info(f"🔹 Запускаем {connector_class.title} WebSocket: символов {sum(map(len, shards))}, "
+                    f"соединений {len(shards)}")
+        depth = connector_class.book_depth if name in l2 else 0
+        recorder = FrameRecorder(capture_path(capture_dir, name), name, depth) if capture_dir else None
+        url = urls.get(name) if urls else None
+        for i, symbols in enumerate(shards):
+            connectors.append(connector_class(store, on_update, url=url, recorder=recorder, books=books,
+                                              registry=registry, symbols=symbols, shard=i, depth=depth))
+    return connectors
+
+
+def build_engine(host):
+    """
+    :param host: локальный REST API для ордеров всех бирж (simulator.rest); None - без исполнения.
+                 Ноги всех бирж подписываются по схеме Bybit v5, поэтому настоящие биржи не поддерживаются
+    :return: ExecutionEngine с ключами из переменных окружения API_KEY и API_SECRET и фильтрами инструментов host
+    """
+    if not host:
+        return None
+    if not is_local(host):
+        raise ValueError(f'Исполнение поддерживается только на локальном симуляторе, а не на {host}')
+    api_key, api_secret = os.environ.get('API_KEY', ''), os.environ.get('API_SECRET', '')
+    filters = fetch_filters(host)
+    engine = ExecutionEngine({name: OrderTemplate(name, host, api_key, api_secret, filters=filters)
+                              for name in EXCHANGES})
+    engine.attach(asyncio.get_running_loop())
+    return engine
+
+
+async def log_stats(detector, connections, engine=None):
     while True:
-        for symbol, exchanges in prices.items():
-            best_bid = None
-            best_ask = None
-            bid_exchange = None
-            ask_exchange = None
-
-            for exchange, data in exchanges.items():
-                bid = data.get("bid")
-                ask = data.get("ask")
-
-                if bid and (best_bid is None or bid > best_bid):
-                    best_bid = bid
-                    bid_exchange = exchange
-
-                if ask and (best_ask is None or ask < best_ask):
-                    best_ask = ask
-                    ask_exchange = exchange
-
-            if best_bid and best_ask and best_bid > best_ask:
-                profit_percent = (best_bid - best_ask) / best_ask
-
-                net_profit_percent = profit_percent - 2 * TRADING_FEE
-                if net_profit_percent > ARBITRAGE_THRESHOLD:
-                    txt = f'''Монета: {symbol} с чистой прибылью {net_profit_percent * 100:.2f}%!
-                    Купить на {ask_exchange} за {best_ask}
-                    Продать на {bid_exchange} за {best_bid}'''
-                    logger.info(txt)
-
-        time.sleep(1)
-
-arbitrage_thread = threading.Thread(target=find_arbitrage_opportunities, args=(prices_dict,), daemon=True)
-arbitrage_thread.start()
-
-while True:
-    time.sleep(1)
+        await asyncio.sleep(STATS_INTERVAL)
+        logger.info(f'Статистика детектора: {detector.stats()}')
+        logger.info(f'Задержки по этапам: {detector.latency_stats()}')
+        logger.info(f'Смещение часов бирж: {detector.clock_stats()}')
+        logger.info(f'Статистика соединений: {connections()}')
+        if engine is not None:
+            logger.info(f'Статистика исполнения: {engine.stats()}')
+
+
+def start_metrics(port, detector, store, connections):
+    """
+    :param port: порт HTTP /metrics на 127.0.0.1; None - без метрик
+    :return: MetricsServer или None
+    """
+    if port is None:
+        return None
+    metrics = MetricsRegistry()
+    metrics.register(ConnectionCollector(connections))
+    metrics.register(detector_collector(detector))
+    metrics.register(quote_age_collector(store))
+    return MetricsServer(metrics, port=port).start()
+
+
+def set_clock_offsets(detector, urls=None):
+    """
+    :param urls: адреса симулятора: у симулятора свои часы, поэтому замер по REST Bybit пропускается,
+                 а смещение оценивается по кадрам
+    """
+    if urls:
+        return
+    try:
+        detector.clock_offsets['bybit'] = estimate_clock_offset(BYBIT_HOST)
+        logger.info(f"Смещение часов Bybit: {detector.clock_offsets['bybit'] / 1e6:.3f} мс")
+    except Exception as e:
+        logger.warning(f"Не удалось оценить смещение часов Bybit: {e}")
+
+
+async def run_single_process(capture_dir, execute_host=None, urls=None, sink=None, registry=default_registry,
+                             standby=False, metrics_port=None, l2=()):
+    quote_store = QuoteStore(registry.symbols, EXCHANGES)
+    books = {}
+    engine = build_engine(execute_host)
+    detector = ArbitrageDetector(quote_store, ARBITRAGE_THRESHOLD, TRADING_FEE, EXCHANGE_FEES, books,
+                                 on_signal=engine.on_signal if engine else None, sink=sink,
+                                 max_quote_age=EXCHANGE_MAX_AGE)
+    set_clock_offsets(detector, urls)
+    runtime = ConnectorRuntime(build_connectors(EXCHANGES, quote_store, detector.on_update, capture_dir, books,
+                                                urls, registry, l2), standby=standby)
+    metrics = start_metrics(metrics_port, detector, quote_store, runtime.snapshot)
+    try:
+        await asyncio.gather(runtime.run(), log_stats(detector, runtime.snapshot, engine))
+    finally:
+        for connector in runtime.connectors:
+            if connector.recorder is not None:
+                connector.recorder.close()
+        if metrics is not None:
+            metrics.shutdown()
+        if engine is not None:
+            await engine.close()
+
+
+async def run_multi_process(capture_dir, execute_host=None, urls=None, sink=None, registry=default_registry,
+                            standby=False, metrics_port=None):
+    ingest = SharedIngest(CONNECTORS, registry.symbols, EXCHANGES, capture_dir, urls, registry, standby)
+    engine = build_engine(execute_host)
+    metrics = None
+    try:
+        detector = ArbitrageDetector(ingest.store, ARBITRAGE_THRESHOLD, TRADING_FEE, EXCHANGE_FEES,
+                                     on_signal=engine.on_signal if engine else None, sink=sink,
+                                     max_quote_age=EXCHANGE_MAX_AGE)
+        set_clock_offsets(detector, urls)
+        ingest.start(detector.on_update)
+        threading.Thread(target=ingest.poll_forever, daemon=True).start()
+        metrics = start_metrics(metrics_port, detector, ingest.store, ingest.stats)
+        await log_stats(detector, ingest.stats, engine)
+    finally:
+        if metrics is not None:
+            metrics.shutdown()
+        ingest.close()
+        if engine is not None:
+            await engine.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--processes', action='store_true', help='отдельный процесс приёма на каждую биржу')
+    parser.add_argument('--capture', metavar='DIR', help='записывать сырые кадры бирж в каталог DIR')
+    parser.add_argument('--execute', metavar='HOST',
+                        help='отправлять обе ноги сигналов на локальный REST API HOST (например, '
+                             'http://127.0.0.1:8800 из python -m simulator.rest)')
+    parser.add_argument('--simulator', metavar='URL',
+                        help='подключаться к симулятору бирж вместо бирж (например, ws://127.0.0.1:9000 '
+                             'из python -m simulator.ws)')
+    parser.add_argument('--symbols', metavar='PATH', default=SYMBOLS_FILE,
+                        help='список инструментов (по умолчанию symbols.json; собрать по биржам: '
+                             'python -m functions.symbols --discover --output PATH)')
+    parser.add_argument('--standby', action='store_true',
+                        help='держать резервное подписанное соединение для мгновенного переключения при обрыве')
+    parser.add_argument('--l2', nargs='+', choices=EXCHANGES, default=[], metavar='EXCHANGE',
+                        help='вести локальные стаканы L2 и считать по ним объём сделки на этих биржах '
+                             '(по умолчанию - только верхушка стакана)')
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help='отдавать метрики Prometheus на http://127.0.0.1:PORT/metrics (например, 9108)')
+    journal = parser.add_mutually_exclusive_group()
+    journal.add_argument('--opportunities', metavar='PATH', help='писать возможности в PATH в формате JSON Lines')
+    journal.add_argument('--events', metavar='DIR',
+                         help='писать возможности по колонкам в почасовые файлы каталога DIR '
+                              '(сводка: python -m functions.event_store DIR)')
+    args = parser.parse_args()
+    if args.execute and not is_local(args.execute):
+        parser.error('--execute: поддерживается только локальный симулятор (python -m simulator.rest)')
+    if args.l2 and args.processes:
+        parser.error('--l2: стаканы L2 ведутся в процессах приёма и недоступны детектору при --processes')
+    if args.capture:
+        os.makedirs(args.capture, exist_ok=True)
+    opportunity_sink = None
+    if args.opportunities:
+        opportunity_sink = OpportunitySink(args.opportunities)
+    elif args.events:
+        opportunity_sink = OpportunityStore(args.events)
+    # SIGTERM останавливает бота как Ctrl-C: блоки finally закрывают запись кадров и журналы
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    run = run_multi_process if args.processes else functools.partial(run_single_process, l2=args.l2)
+    try:
+        asyncio.run(run(args.capture, args.execute, simulator_urls(args.simulator), opportunity_sink,
+                        SymbolRegistry.from_file(args.symbols), args.standby, args.metrics_port))
+    finally:
+        if opportunity_sink is not None:
+            opportunity_sink.close()
@@ -0,0 +1,133 @@
+"""
+Локальный mock REST API биржи в стиле Bybit v5 для бенчмарков и проверки клиента без сети.
+Отвечает на /v5/market/time, /v5/market/historical-volatility, /v5/market/instruments-info (спот, символы реестра),
+/v5/account/wallet-balance и /v5/order/create, держит keep-alive (HTTP/1.1)
+и может добавлять искусственную задержку ответа.
+Запуск: python -m simulator.rest --port 8800 --delay-ms 1
+"""
+import argparse
+import hashlib
+import hmac
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from functions.codec import dumps, loads
+from functions.symbols import registry
+
+
+def server_time():
+    now = time.time_ns()
+    return {'timeSecond': str(now // 1_000_000_000), 'timeNano': str(now)}
+
+
+def instruments():
+    return {'category': 'spot', 'list': [{
+        'symbol': symbol,
+        'status': 'Trading',
+        'lotSizeFilter': {'basePrecision': '0.0001', 'minOrderQty': '0.0001', 'minOrderAmt': '5'},
+        'priceFilter': {'tickSize': '0.0001'},
+    } for symbol in registry.symbols]}
+
+
+def ok(result):
+    return {'retCode': 0, 'retMsg': 'OK', 'result': result, 'time': time.time_ns() // 1_000_000}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Заголовки и тело пишутся отдельно, без TCP_NODELAY keep-alive упирается в delayed ACK (~40 мс)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, payload):
+        delay = self.server.delay
+        if delay:
+            time.sleep(delay)
+        body = dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def signed(self, body):
+        """
+        :return: проверка подписи Bybit v5, если серверу задан секрет: HMAC(secret, ts + api_key + recv_window + body)
+        """
+        secret = self.server.secret
+        if secret is None:
+            return True
+        headers = self.headers
+        payload = (headers.get('X-BAPI-TIMESTAMP', '') + headers.get('X-BAPI-API-KEY', '') +
+                   headers.get('X-BAPI-RECV-WINDOW', '')).encode() + body
+        expected = hmac.new(secret.encode(), payload, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, headers.get('X-BAPI-SIGN', ''))
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == '/v5/market/time':
+            self.reply(ok(server_time()))
+        elif path == '/v5/market/instruments-info':
+            self.reply(ok(instruments()))
+        elif path == '/v5/market/historical-volatility':
+            self.reply(ok([{'period': 7, 'value': '0.5', 'time': str(time.time_ns() // 1_000_000)}]))
+        elif path == '/v5/account/wallet-balance':
+            self.reply(ok({'list': [{'accountType': 'UNIFIED', 'totalEquity': '1000',
+                                     'coin': [{'coin': 'USDT', 'walletBalance': '1000'}]}]}))
+        else:
+            self.reply({'retCode': 10001, 'retMsg': f'unknown path {path}', 'result': {}})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path.split('?')[0] == '/v5/order/create':
+            if not self.signed(body):
+                self.reply({'retCode': 10004, 'retMsg': 'error sign!', 'result': {}})
+                return
+            order = loads(body) if body else {}
+            with self.server.lock:
+                self.server.orders += 1
+                order_id = self.server.orders
+            self.reply(ok({'orderId': str(order_id), 'orderLinkId': order.get('orderLinkId', '')}))
+        else:
+            self.reply({'retCode': 10001, 'retMsg': f'unknown path {self.path}', 'result': {}})
+
+
+class MockRestServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, delay=0.0, secret=None):
+        """
+        :param port: 0 - свободный порт, фактический берётся из self.url
+        :param delay: задержка каждого ответа в секундах (имитация сети и биржи)
+        :param secret: секрет API; если задан, подпись ордеров проверяется
+        """
+        super().__init__((host, port), MockHandler)
+        self.delay = delay
+        self.secret = secret
+        self.lock = threading.Lock()
+        self.orders = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """
+        :return: запускает сервер в фоновом потоке и возвращает себя
+        """
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mock REST API биржи')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--delay-ms', type=float, default=0.0)
+    parser.add_argument('--secret', help='проверять подпись ордеров этим секретом')
+    args = parser.parse_args()
+    server = MockRestServer(port=args.port, delay=args.delay_ms / 1000, secret=args.secret)
+    print(f'Mock REST API на {server.url}')
+    server.serve_forever()
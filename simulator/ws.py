@@ -0,0 +1,394 @@
+"""
+Локальный симулятор WebSocket бирж для нагрузочных тестов коннекторов.
+Один сервер говорит на протоколе каждой биржи по своему пути:
+ws://HOST:PORT/bybit (op: subscribe, снимок и изменения стакана), /okx (arg/data, ping -> pong),
+/htx и /bingx (gzip-кадры, ping/pong сервера). Цены - общий для всех бирж случайный путь по символу
+с небольшим расхождением бирж, поэтому детектор время от времени видит арбитраж.
+Запуск: python -m simulator.ws --port 9000 --rate 10000
+"""
+import argparse
+import asyncio
+import gzip
+import multiprocessing
+import random
+import time
+import websockets
+from functions import codec
+
+
+PORT = 9000
+RATE = 10000
+LEVELS = 5
+VOLATILITY = 0.0002
+DISPERSION = 0.001
+PING_INTERVAL = 5
+# 0 - соединения не обрываются; иначе каждое соединение закрывается через 0.5-1.5 такого интервала
+DROP_INTERVAL = 0
+# Сколько кадров отправлять подряд, прежде чем отдать управление циклу
+BATCH = 500
+# Отставание больше секунды не догоняется: лишние кадры пропускаются и считаются в lagged
+MAX_BACKLOG = 1.0
+
+
+class Market:
+    """
+    Справедливая цена каждого символа - случайное блуждание, котировка биржи - справедливая цена
+    со своим шумом (dispersion)
+    """
+    def __init__(self, volatility=VOLATILITY, dispersion=DISPERSION, seed=None):
+        self.volatility = volatility
+        self.dispersion = dispersion
+        self.random = random.Random(seed)
+        self.prices = {}
+
+    def quote(self, symbol):
+        price = self.prices.get(symbol)
+        if price is None:
+            price = random.Random(symbol).uniform(1, 1000)
+        price *= 1 + self.random.gauss(0, self.volatility)
+        self.prices[symbol] = price
+        return price * (1 + self.random.gauss(0, self.dispersion))
+
+    def levels(self, mid, count):
+        """
+        :return: (bids, asks) по count уровней с шагом в 1 базисный пункт от mid
+        """
+        step = mid * 0.0001
+        uniform = self.random.uniform
+        bids = [(mid - step * (i + 0.5), uniform(0.01, 5)) for i in range(count)]
+        asks = [(mid + step * (i + 0.5), uniform(0.01, 5)) for i in range(count)]
+        return bids, asks
+
+
+def as_text(levels):
+    return [[f'{price:.8g}', f'{size:.4f}'] for price, size in levels]
+
+
+def now_ms():
+    return time.time_ns() // 1_000_000
+
+
+class Venue:
+    """
+    Протокол одной биржи: разбор подписок клиента и сборка кадров рыночных данных
+    """
+    name = None
+    compressed = False
+
+    def __init__(self, market, levels=LEVELS):
+        self.market = market
+        self.levels = levels
+
+    def subscribe(self, data):
+        """
+        :return: (список новых каналов, ответ клиенту или None)
+        """
+        return [], None
+
+    def frame(self, channel, state):
+        """
+        :param state: словарь состояния канала в этом соединении (номер обновления, прошлые уровни)
+        :return: текст кадра рыночных данных
+        """
+        raise NotImplementedError
+
+    def ping(self):
+        """
+        :return: текст служебного ping от сервера или None, если биржа не пингует сама
+        """
+        return None
+
+    def reply(self, message):
+        """
+        :return: ответ на служебное сообщение клиента (ping, pong) или None
+        """
+        return None
+
+    def encode(self, text):
+        return gzip.compress(text.encode(), 1) if self.compressed else text
+
+
+class BybitVenue(Venue):
+    name = 'bybit'
+
+    def subscribe(self, data):
+        if data.get('op') != 'subscribe':
+            return [], None
+        topics = list(data.get('args', []))
+        return topics, codec.dumps({'success': True, 'ret_msg': 'subscribe', 'op': 'subscribe', 'conn_id': 'sim'})
+
+    def reply(self, message):
+        if '"ping"' in message:
+            return codec.dumps({'success': True, 'ret_msg': 'pong', 'op': 'ping'})
+        return None
+
+    def frame(self, topic, state):
+        symbol = topic.rsplit('.', 1)[-1]
+        bids, asks = self.market.levels(self.market.quote(symbol), self.levels)
+        update = state.get('u', 0) + 1
+        state['u'] = update
+        # orderbook.1 - всегда снимок верхушки, как у Bybit
+        if update == 1 or topic.startswith('orderbook.1.'):
+            kind, bid_levels, ask_levels = 'snapshot', as_text(bids), as_text(asks)
+        else:
+            # Изменение: прежние уровни удаляются (размер 0), новые добавляются
+            kind = 'delta'
+            bid_levels = [[price, '0'] for price, _ in state['b']] + as_text(bids)
+            ask_levels = [[price, '0'] for price, _ in state['a']] + as_text(asks)
+        state['b'], state['a'] = as_text(bids), as_text(asks)
+        return codec.dumps({'topic': topic, 'type': kind, 'ts': now_ms(),
+                            'data': {'s': symbol, 'b': bid_levels, 'a': ask_levels, 'u': update, 'seq': update},
+                            'cts': now_ms()})
+
+
+class OKXVenue(Venue):
+    name = 'okx'
+
+    def subscribe(self, data):
+        if data.get('op') != 'subscribe':
+            return [], None
+        args = data.get('args', [])
+        channels = [(arg['channel'], arg['instId']) for arg in args]
+        return channels, codec.dumps({'event': 'subscribe', 'arg': args[0] if args else {}, 'connId': 'sim'})
+
+    def reply(self, message):
+        return 'pong' if message == 'ping' else None
+
+    def frame(self, channel, state):
+        name, inst_id = channel
+        mid = self.market.quote(inst_id.replace('-', ''))
+        ts = str(now_ms())
+        if name == 'tickers':
+            data = {'instType': 'SPOT', 'instId': inst_id, 'last': f'{mid:.8g}', 'lastSz': '0.01',
+                    'askPx': f'{mid * 1.00005:.8g}', 'askSz': '1.5', 'bidPx': f'{mid * 0.99995:.8g}', 'bidSz': '1.5',
+                    'ts': ts}
+        else:
+            bids, asks = self.market.levels(mid, self.levels)
+            state['seq'] = state.get('seq', 0) + 1
+            data = {'asks': [level + ['0', '1'] for level in as_text(asks)],
+                    'bids': [level + ['0', '1'] for level in as_text(bids)],
+                    'instId': inst_id, 'ts': ts, 'seqId': state['seq']}
+        return codec.dumps({'arg': {'channel': name, 'instId': inst_id}, 'data': [data]})
+
+
+class HTXVenue(Venue):
+    name = 'htx'
+    compressed = True
+
+    def subscribe(self, data):
+        if 'sub' not in data:
+            return [], None
+        answer = {'id': data.get('id'), 'status': 'ok', 'subbed': data['sub'], 'ts': now_ms()}
+        return [data['sub']], codec.dumps(answer)
+
+    def ping(self):
+        return codec.dumps({'ping': now_ms()})
+
+    def frame(self, channel, state):
+        symbol = channel.split('.')[1].upper()
+        bids, asks = self.market.levels(self.market.quote(symbol), self.levels)
+        state['version'] = state.get('version', 0) + 1
+        ts = now_ms()
+        return codec.dumps({'ch': channel, 'ts': ts,
+                            'tick': {'bids': [[round(price, 8), round(size, 4)] for price, size in bids],
+                                     'asks': [[round(price, 8), round(size, 4)] for price, size in asks],
+                                     'version': state['version'], 'ts': ts}})
+
+
+class BingXVenue(Venue):
+    name = 'bingx'
+    compressed = True
+
+    def subscribe(self, data):
+        if data.get('reqType') != 'sub':
+            return [], None
+        return [data['dataType']], codec.dumps({'id': data.get('id'), 'code': 0, 'msg': ''})
+
+    def ping(self):
+        return 'Ping'
+
+    def frame(self, channel, state):
+        symbol = channel.split('@')[0].replace('-', '')
+        bids, asks = self.market.levels(self.market.quote(symbol), self.levels)
+        return codec.dumps({'code': 0, 'dataType': channel, 'ts': now_ms(),
+                            'data': {'bids': as_text(bids), 'asks': as_text(asks)}})
+
+
+VENUES = {venue.name: venue for venue in (BybitVenue, OKXVenue, HTXVenue, BingXVenue)}
+
+
+class SimulatorStats:
+    def __init__(self):
+        self.connections = 0
+        self.sent = 0
+        self.lagged = 0
+        self.pongs = 0
+        self.drops = 0
+
+    def as_dict(self):
+        return {'connections': self.connections, 'sent': self.sent, 'lagged': self.lagged, 'pongs': self.pongs,
+                'drops': self.drops}
+
+
+class ExchangeSimulator:
+    """
+    :param rate: кадров в секунду на одно соединение (по кругу по всем подписанным каналам)
+    :param pool: если > 0, кадры каждого канала собираются заранее (pool штук) и отправляются по кругу -
+                 так сервер выдаёт сотни тысяч кадров в секунду, но время в кадрах не меняется
+                 (а номера изменений Bybit повторяются, поэтому для Bybit pool не применяется)
+    :param drop_interval: средний срок жизни соединения в секундах для проверки переподключения, 0 - без обрывов
+    """
+    def __init__(self, rate=RATE, levels=LEVELS, pool=0, seed=None, ping_interval=PING_INTERVAL,
+                 drop_interval=DROP_INTERVAL):
+        self.rate = rate
+        self.pool = pool
+        self.ping_interval = ping_interval
+        self.drop_interval = drop_interval
+        self.random = random.Random(seed)
+        self.market = Market(seed=seed)
+        self.venues = {name: venue(self.market, levels) for name, venue in VENUES.items()}
+        self.stats = {name: SimulatorStats() for name in VENUES}
+
+    async def handle(self, ws):
+        name = ws.request.path.strip('/').split('/')[0]
+        venue = self.venues.get(name)
+        if venue is None:
+            await ws.close(1008, f'unknown exchange {name}')
+            return
+        stats = self.stats[name]
+        stats.connections += 1
+        channels = []
+        states = {}
+        tasks = [asyncio.create_task(self.stream(ws, venue, channels, states, stats))]
+        if venue.ping() is not None:
+            tasks.append(asyncio.create_task(self.pinger(ws, venue)))
+        if self.drop_interval:
+            tasks.append(asyncio.create_task(self.dropper(ws, stats)))
+        try:
+            async for message in ws:
+                if isinstance(message, bytes):
+                    message = message.decode()
+                if message == 'Pong' or message.startswith('{"pong"'):
+                    stats.pongs += 1
+                    continue
+                answer = venue.reply(message)
+                if answer is None:
+                    try:
+                        added, answer = venue.subscribe(codec.loads(message))
+                    except ValueError:
+                        continue
+                    for channel in added:
+                        key = channel if isinstance(channel, str) else tuple(channel)
+                        if channel in channels:
+                            # Повторная подписка (resync коннектора) начинает канал заново со снимка
+                            states.pop(key, None)
+                        else:
+                            channels.append(channel)
+                if answer is not None:
+                    await ws.send(venue.encode(answer))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def pinger(self, ws, venue):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await ws.send(venue.encode(venue.ping()))
+
+    async def dropper(self, ws, stats):
+        await asyncio.sleep(self.drop_interval * self.random.uniform(0.5, 1.5))
+        stats.drops += 1
+        await ws.close(1001, 'simulated drop')
+
+    async def stream(self, ws, venue, channels, states, stats):
+        pools = {}
+        use_pool = self.pool and venue.name != 'bybit'
+        sent = 0
+        started = time.perf_counter()
+        while True:
+            if not channels:
+                await asyncio.sleep(0.01)
+                started = time.perf_counter()
+                continue
+            due = int((time.perf_counter() - started) * self.rate) - sent
+            if due > self.rate * MAX_BACKLOG:
+                stats.lagged += due
+                sent += due
+                await asyncio.sleep(0)
+                continue
+            if due <= 0:
+                await asyncio.sleep(0.001)
+                continue
+            for _ in range(min(due, BATCH)):
+                channel = channels[sent % len(channels)]
+                key = channel if isinstance(channel, str) else tuple(channel)
+                if use_pool:
+                    frames = pools.get(key)
+                    if frames is None:
+                        frames = pools[key] = [venue.encode(venue.frame(channel, states.setdefault(key, {})))
+                                               for _ in range(self.pool)]
+                    frame = frames[sent // len(channels) % self.pool]
+                else:
+                    frame = venue.encode(venue.frame(channel, states.setdefault(key, {})))
+                await ws.send(frame)
+                sent += 1
+            stats.sent = sent
+            await asyncio.sleep(0)
+
+    async def serve(self, host='127.0.0.1', port=PORT):
+        """
+        :return: запущенный сервер websockets
+        """
+        return await websockets.serve(self.handle, host, port, max_size=None, compression=None)
+
+    async def run_forever(self, host='127.0.0.1', port=PORT, report=5):
+        server = await self.serve(host, port)
+        print(f'Симулятор бирж на ws://{host}:{port}/{{{",".join(VENUES)}}}, {self.rate} кадров/с на соединение')
+        async with server:
+            previous = {name: 0 for name in VENUES}
+            while True:
+                await asyncio.sleep(report)
+                for name, stats in self.stats.items():
+                    if stats.connections:
+                        rate = (stats.sent - previous[name]) / report
+                        previous[name] = stats.sent
+                        print(f'{name}: {rate:.0f} кадров/с, {stats.as_dict()}')
+
+
+def run_simulator(port=PORT, rate=RATE, levels=LEVELS, pool=0, seed=None, host='127.0.0.1',
+                  drop_interval=DROP_INTERVAL):
+    simulator = ExchangeSimulator(rate=rate, levels=levels, pool=pool, seed=seed, drop_interval=drop_interval)
+    asyncio.run(simulator.run_forever(host, port))
+
+
+def start_in_process(port=PORT, rate=RATE, levels=LEVELS, pool=0, seed=None, drop_interval=DROP_INTERVAL):
+    """
+    :return: симулятор в отдельном процессе, чтобы генерация кадров не делила ядро с коннекторами
+    """
+    process = multiprocessing.Process(target=run_simulator,
+                                      args=(port, rate, levels, pool, seed, '127.0.0.1', drop_interval), daemon=True)
+    process.start()
+    return process
+
+
+def urls(host='127.0.0.1', port=PORT):
+    """
+    :return: {биржа: url} для параметра url коннекторов
+    """
+    return {name: f'ws://{host}:{port}/{name}' for name in VENUES}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Симулятор WebSocket бирж')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--rate', type=int, default=RATE, help='кадров в секунду на соединение')
+    parser.add_argument('--levels', type=int, default=LEVELS, help='уровней стакана в кадре')
+    parser.add_argument('--pool', type=int, default=0, help='готовых кадров на канал (для максимальной скорости)')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--drop-interval', type=float, default=DROP_INTERVAL,
+                        help='средний срок жизни соединения в секундах (проверка переподключения)')
+    args = parser.parse_args()
+    run_simulator(args.port, args.rate, args.levels, args.pool, args.seed, args.host, args.drop_interval)